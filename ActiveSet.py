@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+class ActiveSetView(object):
+    """Class to represent the model variables over the (crop, cell)
+    pairs in which crops are present. The pairs are laid out along the
+    longitude dimension of a map with one crop and one latitude row, so
+    that arrays keep the dimensions (crop, ..., lat, lon) which the
+    modules expect: arrays with dimensions (lat, lon) become (1, n),
+    (crop, lat, lon) become (1, 1, n) and (crop, x, lat, lon) become
+    (1, x, 1, n), where n is the number of pairs. Arrays are gathered
+    when they are first read, and scattered back by ActiveSet once the
+    module has been computed.
+    """
+
+    internal = ['_model', '_index', '_views', '_modules', 'nCrop', 'nLat', 'nLon']
+
+    def __init__(self, model, index, modules):
+        self._model = model
+        self._index = index
+        self._views = {}
+        self._modules = modules
+        self.nCrop = 1
+        self.nLat = 1
+        self.nLon = index[0].size
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        # modules computed over the active set call the instances of the
+        # active set
+        if name in self._modules:
+            return self._modules[name]
+
+        if name in self._views:
+            return self._views[name]
+        value = getattr(self._model, name)
+        if is_crop_spatial(value, self._model):
+            value = gather(value, self._index)
+            self._views[name] = value
+        return value
+
+    def assigned(self):
+        """Function to get the variables assigned over the active set"""
+        return [name for name in self.__dict__.keys() if name not in self.internal]
+
+def is_crop_spatial(value, model):
+    """Function to test whether a value is an array over the clone map,
+    with dimensions (lat, lon), (crop, lat, lon) or (crop, x, lat, lon)
+    """
+    if not isinstance(value, np.ndarray) or value.shape[-2:] != (model.nLat, model.nLon):
+        return False
+    return value.ndim == 2 or (value.ndim in [3, 4] and value.shape[0] == model.nCrop)
+
+def gather(value, index):
+    I, J, K = index
+    if value.ndim == 2:
+        return value[J,K][None,:]
+    if value.ndim == 3:
+        return value[I,J,K][None,None,:]
+    return np.ascontiguousarray(value[I,:,J,K].T)[None,:,None,:]
+
+def scatter(value, out, index):
+    I, J, K = index
+    if out.ndim == 2:
+        out[J,K] = value[0,:]
+    elif out.ndim == 3:
+        out[I,J,K] = value[0,0,:]
+    else:
+        out[I,:,J,K] = value[0,:,0,:].T
+
+class ActiveSetModule(object):
+    """Class to stand in for a module of the model which is computed
+    over the active set. Only the dynamic function is computed over the
+    active set; other attributes are those of the original module.
+    """
+
+    # modules computed over the active set are not computed in latitude
+    # bands (see BandExecutor)
+    compute_in_bands = False
+
+    def __init__(self, executor, name, module):
+        self.executor = executor
+        self.name = name
+        self.module = module
+
+    def dynamic(self, *args, **kwargs):
+        self.executor.run(self.name, args, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.module, name)
+
+class ActiveSet(object):
+    """Class to compute the soil water modules only over the (crop, cell)
+    pairs in which crops are present (CropPresence, see
+    CropParameters.read_crop_presence). The water content of the other
+    pairs is not simulated by these modules, and their outputs keep the
+    values they had at the start of the run. Crops which are not present
+    are therefore left out of the initial condition of new growing
+    seasons (see InitialCondition.dynamic).
+
+    The model state keeps all crops in all cells: variables read by a
+    module are gathered into arrays over the active set on each call,
+    and the variables it updates are scattered back, so computation,
+    but not memory use, scales with the number of pairs. The active set
+    is used if the configuration option globalOptions:cropActiveSet
+    equals 1.
+    """
+
+    # Modules which may be computed over the active set: these only
+    # compute elementwise or along the compartment dimension, and the
+    # values they keep between calls do not change during the run
+    modules = ['drainage_module',
+               'infiltration_module',
+               'capillary_rise_module']
+
+    def __init__(self, ActiveSet_variable):
+        self.var = ActiveSet_variable
+
+    def initial(self):
+        self.var.cropActiveSet = self.var._configuration.globalOptions['cropActiveSet'] == "1"
+        if not self.var.cropActiveSet:
+            return
+
+        self.index = np.nonzero(self.var.CropPresence)
+        self.instances = {}
+        view = ActiveSetView(self.var, self.index, self.instances)
+        for name in self.modules:
+            if not hasattr(self.var, name):
+                continue
+            module = getattr(self.var, name)
+            self.instances[name] = self.active_set_instance(module, view)
+
+            # values over the clone map are now held by the active set
+            for key in list(vars(module).keys()):
+                if is_crop_spatial(getattr(module, key), self.var):
+                    delattr(module, key)
+            setattr(self.var, name, ActiveSetModule(self, name, module))
+
+        logger.info('Computing %i modules over %i of %i crop/cell pairs',
+                    len(self.instances), self.index[0].size, self.var.CropPresence.size)
+
+    def active_set_instance(self, module, view):
+        """Function to make the instance of a module over the active set,
+        without calling initial() again
+        """
+        instance = object.__new__(type(module))
+        for key, value in vars(module).items():
+            if is_crop_spatial(value, self.var):
+                value = gather(value, self.index)
+            setattr(instance, key, value)
+        instance.var = view
+        return instance
+
+    def run(self, name, args, kwargs):
+        """Function to compute the dynamic function of a module over the
+        active set and scatter the variables it reads or assigns
+        """
+        view = ActiveSetView(self.var, self.index, self.instances)
+        for instance in self.instances.values():
+            instance.var = view
+        self.instances[name].dynamic(*args, **kwargs)
+
+        # arrays which were read may have been updated in place (arrays
+        # over cells are read by all crops of the cell, and not updated)
+        for key, value in view._views.items():
+            out = getattr(self.var, key)
+            if out.ndim > 2 and out.flags.writeable:
+                scatter(value, out, self.index)
+
+        # pairs which are not present keep their previous value
+        for key in view.assigned():
+            value = getattr(view, key)
+            if value is view._views.get(key):
+                continue
+            out = getattr(self.var, key, None)
+            if isinstance(value, np.ndarray) and value.shape[-2:] == (view.nLat, view.nLon) and value.ndim >= 2:
+                if out is None or not is_crop_spatial(out, self.var) or out.ndim != value.ndim or out.ndim == 2:
+                    raise ValueError('Variable %s assigned by %s cannot be scattered from the active set' % (key, name))
+                out = np.copy(out)
+                scatter(value, out, self.index)
+                value = out
+            setattr(self.var, key, value)
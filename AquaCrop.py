@@ -14,6 +14,8 @@ import VirtualOS as vos
 from Messages import *
 
 from Model import Model
+from ActiveSet import *
+from BandExecutor import *
 from BiomassAccumulation import *
 from CanopyCover import *
 from CapillaryRise import *
@@ -34,7 +36,9 @@ from Inflow import *
 from InitialCondition import *
 from IrrigationMgmtParameters import *
 from Irrigation import *
+from MemoryPlanner import *
 from Meteo import *
+from PhenologyWindows import *
 from PreIrrigation import *
 from RainfallPartition import *
 from RootDevelopment import *
@@ -60,6 +64,7 @@ class AquaCrop(Model):
         self.field_mgmt_parameters_module = FieldMgmtParameters(self)
         self.irrigation_mgmt_parameters_module = IrrigationMgmtParameters(self)
         self.soil_parameters_module = SoilAndTopoParameters(self)
+        self.memory_planner_module = AQMemoryPlanner(self)
         
         self.initial_condition_module = InitialCondition(self)
         self.gdd_module = GrowingDegreeDay(self)
@@ -82,6 +87,7 @@ class AquaCrop(Model):
         self.evapotranspiration_module = AQEvapotranspiration(self)
         self.inflow_module = Inflow(self)
         self.HI_ref_current_day_module = HIrefCurrentDay(self)
+        self.phenology_windows_module = PhenologyWindows(self)
         self.biomass_accumulation_module = BiomassAccumulation(self)
         self.temperature_stress_module = TemperatureStress(self)
         self.harvest_index_module = HarvestIndex(self)
@@ -91,6 +97,7 @@ class AquaCrop(Model):
         self.meteo_module.initial()
         self.groundwater_module.initial()
         self.carbon_dioxide_module.initial()
+        self.memory_planner_module.initial()
         self.crop_parameters_module.initial()
         self.field_mgmt_parameters_module.initial()
         self.irrigation_mgmt_parameters_module.initial()
@@ -117,10 +124,20 @@ class AquaCrop(Model):
         self.evapotranspiration_module.initial()
         self.inflow_module.initial()
         self.HI_ref_current_day_module.initial()
+        self.phenology_windows_module.initial()
         self.biomass_accumulation_module.initial()
         self.temperature_stress_module.initial()
         self.harvest_index_module.initial()
         self.crop_yield_module.initial()
+        self.memory_planner_module.check_state()
+
+        # compute the soil water modules over the crops which are present
+        self.active_set = ActiveSet(self)
+        self.active_set.initial()
+
+        # compute modules in latitude bands on a pool of threads
+        self.band_executor = BandExecutor(self)
+        self.band_executor.initial()
         
     def dynamic(self):
         """Function to update model state for current time step"""
@@ -167,6 +184,7 @@ class AquaCrop(Model):
         self.inflow_module.dynamic()
         
         self.HI_ref_current_day_module.dynamic()
+        self.phenology_windows_module.dynamic()
         self.biomass_accumulation_module.dynamic()
 
         self.root_zone_water_module.dynamic()
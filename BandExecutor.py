@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import numpy as np
+
+try:
+    from concurrent.futures import ThreadPoolExecutor
+except ImportError:
+    # Python 2: thread pool with the same map interface
+    from multiprocessing.pool import ThreadPool as ThreadPoolExecutor
+
+import logging
+logger = logging.getLogger(__name__)
+
+class BandView(object):
+    """Class to represent the model variables over one latitude band.
+    Spatial arrays of the model, with dimensions (..., lat, lon), are
+    read as views of the band, so that updates in place are written
+    directly to the model arrays. Variables assigned by a module are held
+    by the view until they are merged by BandExecutor.
+    """
+
+    internal = ['_model', '_rows', '_views', '_modules', 'nLat']
+
+    def __init__(self, model, rows, modules):
+        self._model = model
+        self._rows = rows
+        self._views = {}
+        self._modules = modules
+        self.nLat = rows.stop - rows.start
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+
+        # modules computed in bands call the instances of their band
+        if name in self._modules:
+            return self._modules[name]
+
+        if name in self._views:
+            return self._views[name]
+        value = getattr(self._model, name)
+        if is_spatial(value, self._model.nLat, self._model.nLon):
+            value = value[..., self._rows, :]
+            self._views[name] = value
+        return value
+
+    def assigned(self):
+        """Function to get the variables assigned in the band"""
+        return [name for name in self.__dict__.keys() if name not in self.internal]
+
+def is_spatial(value, nLat, nLon):
+    return isinstance(value, np.ndarray) and value.ndim >= 2 and value.shape[-2:] == (nLat, nLon)
+
+class BandModule(object):
+    """Class to stand in for a module of the model which is computed in
+    latitude bands. Only the dynamic function is computed in bands;
+    other attributes are those of the original module.
+    """
+
+    def __init__(self, executor, name, module):
+        self.executor = executor
+        self.name = name
+        self.module = module
+
+    def dynamic(self, *args, **kwargs):
+        self.executor.run(self.name, args, kwargs)
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.module, name)
+
+class BandExecutor(object):
+    """Class to compute model modules in latitude bands on a pool of
+    threads. The model has no lateral flow, so each band can be computed
+    independently; numpy releases the GIL in elementwise operations on
+    large arrays, so the bands of a module are computed in parallel
+    without copying the model state to other processes (see
+    tile_runner.py). The number of bands is set in the configuration
+    file (globalOptions:nBands).
+
+    Each band has its own instance of each module, which shares the state
+    of the model's instance: values which modules keep between calls
+    (e.g. the root zone storages of RootZoneWater) are sliced to the band,
+    so that they are held once. Variables assigned by a module are merged
+    into arrays over the complete clone map once all bands have been
+    computed. The pool is stopped by shutdown() at the end of the run.
+    """
+
+    # Modules which may be computed in bands: these only compute
+    # elementwise or along the crop and compartment dimensions, and the
+    # values they keep between calls are either arrays over the clone map
+    # or the same for all cells. Modules which call each other must be
+    # computed in bands together (canopy cover and water stress, biomass
+    # accumulation and temperature stress, transpiration and root zone
+    # water)
+    modules = ['check_groundwater_table_module',
+               'drainage_module',
+               'rainfall_partition_module',
+               'root_zone_water_module',
+               'infiltration_module',
+               'capillary_rise_module',
+               'germination_module',
+               'root_development_module',
+               'water_stress_module',
+               'canopy_cover_module',
+               'soil_evaporation_module',
+               'transpiration_module',
+               'biomass_accumulation_module',
+               'temperature_stress_module',
+               'harvest_index_module']
+
+    def __init__(self, BandExecutor_variable):
+        self.var = BandExecutor_variable
+
+    def initial(self):
+        nBands = int(self.var._configuration.globalOptions['nBands'])
+        self.nBands = min(max(nBands, 1), self.var.nLat)
+        if self.nBands < 2:
+            return
+
+        rows = np.array_split(np.arange(self.var.nLat), self.nBands)
+        self.bands = [slice(int(r[0]), int(r[-1]) + 1) for r in rows]
+
+        # compiled kernels are already parallel, and the kernel of one
+        # module cannot be called from several threads at the same time
+        names = []
+        for name in self.modules:
+            if not hasattr(self.var, name):
+                continue
+            if getattr(getattr(self.var, name), 'use_numba', False):
+                continue
+            if not getattr(getattr(self.var, name), 'compute_in_bands', True):
+                continue
+            names.append(name)
+
+        # the instances of a band share the state of the model's
+        # instances, with values over the clone map sliced to the band
+        self.instances = []
+        for band in self.bands:
+            instances = {}
+            view = BandView(self.var, band, instances)
+            for name in names:
+                instances[name] = self.band_instance(getattr(self.var, name), view)
+            self.instances.append(instances)
+
+        # values over the clone map are now held by the bands
+        for name in names:
+            module = getattr(self.var, name)
+            for key in list(vars(module).keys()):
+                if self.band_value(getattr(module, key), self.bands[0]) is not getattr(module, key):
+                    delattr(module, key)
+
+        for name in names:
+            setattr(self.var, name, BandModule(self, name, getattr(self.var, name)))
+
+        self.pool = ThreadPoolExecutor(self.nBands)
+        logger.info('Computing %i modules in %i latitude bands', len(names), self.nBands)
+
+    def band_value(self, value, rows):
+        """Function to get the value of a module attribute over a latitude
+        band: arrays with dimensions (..., lat, lon), or (..., lat, lon,
+        comp) as the compartment storages of SoilEvaporation, are sliced;
+        other values are shared by all bands
+        """
+        if isinstance(value, (list, tuple)):
+            values = [self.band_value(item, rows) for item in value]
+            if all([item is band_item for item, band_item in zip(value, values)]):
+                return value
+            return type(value)(values)
+        if is_spatial(value, self.var.nLat, self.var.nLon):
+            return value[..., rows, :]
+        if isinstance(value, np.ndarray) and value.ndim >= 3 and value.shape[-3:-1] == (self.var.nLat, self.var.nLon):
+            return value[..., rows, :, :]
+        return value
+
+    def band_instance(self, module, view):
+        """Function to make the instance of a module over a latitude band,
+        without calling initial() again
+        """
+        instance = object.__new__(type(module))
+        for key, value in vars(module).items():
+            setattr(instance, key, self.band_value(value, view._rows))
+        instance.var = view
+        return instance
+
+    def shutdown(self):
+        """Function to stop the threads of the pool"""
+        pool = getattr(self, 'pool', None)
+        if pool is None:
+            return
+        if hasattr(pool, 'shutdown'):
+            pool.shutdown()
+        else:
+            pool.close()
+            pool.join()
+        self.pool = None
+
+    def run(self, name, args, kwargs):
+        """Function to compute the dynamic function of a module in all
+        bands and merge the variables it assigns
+        """
+        views = []
+        for band, instances in zip(self.bands, self.instances):
+            view = BandView(self.var, band, instances)
+            for instance in instances.values():
+                instance.var = view
+            views.append(view)
+
+        def run_band(view):
+            view._modules[name].dynamic(*args, **kwargs)
+
+        list(self.pool.map(run_band, views))
+        self.merge(name, views)
+
+    def merge(self, module, views):
+        """Function to merge the variables assigned in the bands into
+        the model
+        """
+        names = set()
+        for view in views:
+            names.update(view.assigned())
+
+        for name in names:
+            values = []
+            for view in views:
+                if name not in view.__dict__ and not hasattr(self.var, name):
+                    raise ValueError('Variable %s is not assigned in all latitude bands by %s' % (name, module))
+                values.append(getattr(view, name))
+
+            # variables which were updated in place are already merged
+            if all([value is view._views.get(name) for value, view in zip(values, views)]):
+                continue
+
+            if all([is_spatial(value, view.nLat, self.var.nLon) for value, view in zip(values, views)]):
+                if any([isinstance(value, np.ma.MaskedArray) for value in values]):
+                    setattr(self.var, name, np.ma.concatenate(values, axis=-2))
+                else:
+                    setattr(self.var, name, np.concatenate(values, axis=-2))
+            elif all([value is values[0] or np.array_equal(value, values[0]) for value in values[1:]]):
+                setattr(self.var, name, values[0])
+            else:
+                raise ValueError('Variable %s assigned by %s cannot be merged from latitude bands' % (name, module))
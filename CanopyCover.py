@@ -5,6 +5,8 @@
 
 import numpy as np
 
+from GrowthStage import EMERGENCE_REACHED, CANOPYDEVEND_REACHED, CANOPYDEVEND_PASSED, SENESCENCE_REACHED, SENESCENCE_PASSED, MATURITY_PASSED, MATURITY_DAY_PASSED
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -49,64 +51,69 @@ class CanopyCover(object):
         
     def canopy_cover_development(self, CC0, CCx, CGC, CDC, dt, Mode):
         """Function to calculate canopy cover development by end of the 
-        current simulation day
+        current simulation day. Input arrays can have any (matching) 
+        shape, so the function is normally called for the cells which 
+        need it only.
         """
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         if Mode == 'Growth':
             CC = (CC0 * np.exp(CGC * dt))
             cond1 = (CC > (CCx / 2.))
-            CC[cond1] = (CCx - 0.25 * np.divide(CCx, CC0, out=np.copy(arr_zeros), where=CC0!=0) * CCx * np.exp(-CGC * dt))[cond1]
+            CCx1 = CCx[cond1]
+            CC01 = CC0[cond1]
+            CC[cond1] = (CCx1 - 0.25 * np.divide(CCx1, CC01, out=np.zeros_like(CCx1), where=CC01!=0) * CCx1 * np.exp(-CGC[cond1] * dt[cond1]))
             CC = np.clip(CC, None, CCx)
         elif Mode == 'Decline':
-            CC = np.copy(arr_zeros)
+            CC = np.zeros_like(CCx)
             cond2 = (CCx >= 0.001)
-            CC[cond2] = (CCx * (1. - 0.05 * (np.exp(dt * np.divide(CDC, CCx, out=np.copy(arr_zeros), where=CCx!=0)) - 1.)))[cond2]
+            CCx2 = CCx[cond2]
+            CC[cond2] = (CCx2 * (1. - 0.05 * (np.exp(dt[cond2] * np.divide(CDC[cond2], CCx2)) - 1.)))
 
         CC = np.clip(CC, 0, 1)
         return CC
 
-    def canopy_cover_required_time(self, CC0, CCx, CGC, CDC, dt, tSum, Mode):
+    def canopy_cover_required_time(self, CCprev, CC0, CCx, CGC, CDC, dt, tSum, Mode):
         """Function to find required time to reach CC at end of previous 
-        day, given current CGC or CDC
+        day (CCprev), given current CGC or CDC. Input arrays can have any
+        (matching) shape.
         """
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         if Mode == 'CGC':
-            CGCx = np.copy(arr_zeros)
-            cond1 = (self.var.CCprev <= (CCx / 2))
-            x = np.divide(self.var.CCprev, CC0, out=np.copy(arr_zeros), where=CC0!=0)
-            CGCx_divd = np.log(x, out=np.copy(arr_zeros), where=x>0)
+            CGCx = np.zeros_like(CCprev)
             CGCx_divs = tSum - dt
-            CGCx[cond1] = np.divide(CGCx_divd, CGCx_divs, out=np.copy(arr_zeros), where=CGCx_divs!=0)[cond1]
-            cond2 = np.logical_not(cond1)
+            cond1 = (CCprev <= (CCx / 2))
+            x = np.divide(CCprev[cond1], CC0[cond1], out=np.zeros_like(CCprev[cond1]), where=CC0[cond1]!=0)
+            CGCx_divd = np.log(x, out=np.zeros_like(x), where=x>0)
+            CGCx[cond1] = np.divide(CGCx_divd, CGCx_divs[cond1], out=np.zeros_like(x), where=CGCx_divs[cond1]!=0)
 
-            x1 = np.divide(0.25 * CCx * CCx, CC0, out=np.copy(arr_zeros), where=CC0!=0)
-            x2 = CCx - self.var.CCprev
-            x3 = np.divide(x1, x2, out=np.copy(arr_zeros), where=x2!=0)
-            CGCx_divd = np.log(x3, out=np.copy(arr_zeros), where=x3>0)
-            CGCx_divs = tSum - dt
-            CGCx[cond2] = np.divide(CGCx_divd, CGCx_divs, out=np.copy(arr_zeros), where=CGCx_divs!=0)[cond2]
-            tReq = (tSum - dt) * np.divide(CGCx, CGC, out=np.copy(arr_zeros), where=CGC!=0)
+            cond2 = np.logical_not(cond1)
+            CCx2 = CCx[cond2]
+            CC02 = CC0[cond2]
+            x1 = np.divide(0.25 * CCx2 * CCx2, CC02, out=np.zeros_like(CC02), where=CC02!=0)
+            x2 = CCx2 - CCprev[cond2]
+            x3 = np.divide(x1, x2, out=np.zeros_like(x2), where=x2!=0)
+            CGCx_divd = np.log(x3, out=np.zeros_like(x3), where=x3>0)
+            CGCx[cond2] = np.divide(CGCx_divd, CGCx_divs[cond2], out=np.zeros_like(x3), where=CGCx_divs[cond2]!=0)
+            tReq = (tSum - dt) * np.divide(CGCx, CGC, out=np.zeros_like(CGCx), where=CGC!=0)
         elif Mode == 'CDC':
             
-            x1 = np.divide(self.var.CCprev, CCx, out=np.copy(arr_zeros), where=CCx!=0)
+            x1 = np.divide(CCprev, CCx, out=np.zeros_like(CCx), where=CCx!=0)
             x2 = 1 + (1 - x1) / 0.05
-            tReq_divd = np.log(x2, out=np.copy(arr_zeros), where=x2!=0)
-            tReq_divs = np.divide(CDC, CCx, out=np.copy(arr_zeros), where=CCx!=0)
-            tReq = np.divide(tReq_divd, tReq_divs, out=np.copy(arr_zeros), where=tReq_divs!=0)
+            tReq_divd = np.log(x2, out=np.zeros_like(x2), where=x2!=0)
+            tReq_divs = np.divide(CDC, CCx, out=np.zeros_like(CCx), where=CCx!=0)
+            tReq = np.divide(tReq_divd, tReq_divs, out=np.zeros_like(tReq_divs), where=tReq_divs!=0)
             
         return tReq
 
-    def adjust_CCx(self, CC0, CCx, CGC, CDC, dt, tSum, CanopyDevEnd):
+    def adjust_CCx(self, CCprev, CC0, CCx, CGC, CDC, dt, tSum, CanopyDevEnd):
         """Function to adjust CCx value for changes in CGC due to water 
         stress during the growing season
         """
         # Get time required to reach CC on previous day, then calculate
         # adjusted CCx
-        tCCtmp = self.canopy_cover_required_time(CC0, CCx, CGC, CDC, dt, tSum, 'CGC')
+        tCCtmp = self.canopy_cover_required_time(CCprev, CC0, CCx, CGC, CDC, dt, tSum, 'CGC')
         cond1 = (tCCtmp > 0)
-        tCCtmp[cond1] += ((CanopyDevEnd - tSum) + dt)[cond1]
-        CCxAdj = self.canopy_cover_development(CC0, CCx, CGC, CDC, tCCtmp, 'Growth')
-        CCxAdj[np.logical_not(cond1)] = 0
+        tCCtmp = tCCtmp[cond1] + ((CanopyDevEnd - tSum) + dt)[cond1]
+        CCxAdj = np.zeros_like(CCx)
+        CCxAdj[cond1] = self.canopy_cover_development(CC0[cond1], CCx[cond1], CGC[cond1], CDC[cond1], tCCtmp, 'Growth')
         return CCxAdj
     
     def potential_canopy_development(self, tCC, dtCC):
@@ -123,13 +130,12 @@ class CanopyCover(object):
         # Very small initial CC as it is first day or due to senescence. In this
         # case assume no leaf expansion stress
         cond21 = (cond2 & (CC_NSprev <= self.var.CC0))
-        self.var.CC_NS[cond21] = (self.var.CC0 * np.exp(self.var.CGC * dtCC))[cond21]
+        self.var.CC_NS[cond21] = (self.var.CC0[cond21] * np.exp(self.var.CGC[cond21] * dtCC[cond21]))
 
         # Canopy growing
         cond22 = (cond2 & np.logical_not(cond21))
-        tmp_tCC = tCC - self.var.Emergence
-        tmp_CC_NS = self.canopy_cover_development(self.var.CC0, self.var.CCx, self.var.CGC, self.var.CDC, tmp_tCC, 'Growth')
-        self.var.CC_NS[cond22] = tmp_CC_NS[cond22]
+        tmp_tCC = (tCC - self.var.Emergence)[cond22]
+        self.var.CC_NS[cond22] = self.canopy_cover_development(self.var.CC0[cond22], self.var.CCx[cond22], self.var.CGC[cond22], self.var.CDC[cond22], tmp_tCC, 'Growth')
 
         # Update maximum canopy cover size in growing season
         self.var.CCxAct_NS[cond2] = self.var.CC_NS[cond2]
@@ -146,35 +152,34 @@ class CanopyCover(object):
 
         # Late-season stage - canopy decline
         cond32 = (cond3 & np.logical_not(cond31))
-        tmp_tCC = tCC - self.var.Emergence
-        tmp_CC_NS = self.canopy_cover_development(self.var.CC0, self.var.CCx, self.var.CGC, self.var.CDC, tmp_tCC, 'Decline')
-        self.var.CC_NS[cond32] = tmp_CC_NS[cond32]
+        tmp_tCC = (tCC - self.var.Emergence)[cond32]
+        self.var.CC_NS[cond32] = self.canopy_cover_development(self.var.CC0[cond32], self.var.CCx[cond32], self.var.CGC[cond32], self.var.CDC[cond32], tmp_tCC, 'Decline')
         # return CC_NS, CCxAct_NS, CCxW_NS
 
     def actual_canopy_development(self, tCC, tCCadj, dtCC):
 
         # CCprev = np.copy(CC)
+        events = self.var.PhenoEvents
 
         # No canopy development before emergence/germination or after maturity
-        cond4 = (self.var.GrowingSeasonIndex & ((tCCadj < self.var.Emergence) | (np.round(tCCadj) > self.var.Maturity)))
+        cond4 = (self.var.GrowingSeasonIndex & (((events & EMERGENCE_REACHED) == 0) | ((events & MATURITY_DAY_PASSED) != 0)))
         self.var.CC[cond4] = 0
 
         # Otherwise, canopy growth can occur
-        cond5 = (self.var.GrowingSeasonIndex & np.logical_not(cond4) & (tCCadj < self.var.CanopyDevEnd))
+        cond5 = (self.var.GrowingSeasonIndex & np.logical_not(cond4) & ((events & CANOPYDEVEND_REACHED) == 0))
         cond51 = (cond5 & (self.var.CCprev <= self.var.CC0adj))
 
         # Very small initial CC as it is first day or due to senescence. In
         # this case, assume no leaf expansion stress
-        self.var.CC[cond51] = (self.var.CC0adj * np.exp(self.var.CGC * dtCC))[cond51]
+        self.var.CC[cond51] = (self.var.CC0adj[cond51] * np.exp(self.var.CGC[cond51] * dtCC[cond51]))
 
         # Canopy growing
         cond52 = (cond5 & np.logical_not(cond51))
 
         # Canopy approaching maximum size
         cond521 = (cond52 & (self.var.CCprev >= (0.9799 * self.var.CCx)))
-        tmp_tCC = tCC - self.var.Emergence
-        tmp_CC = self.canopy_cover_development(self.var.CC0, self.var.CCx, self.var.CGC, self.var.CDC, tmp_tCC, 'Growth')
-        self.var.CC[cond521] = tmp_CC[cond521]
+        tmp_tCC = (tCC - self.var.Emergence)[cond521]
+        self.var.CC[cond521] = self.canopy_cover_development(self.var.CC0[cond521], self.var.CCx[cond521], self.var.CGC[cond521], self.var.CDC[cond521], tmp_tCC, 'Growth')
         self.var.CC0adj[cond521] = self.var.CC0[cond521]
 
         # Adjust canopy growth coefficient for leaf expansion water stress
@@ -184,27 +189,24 @@ class CanopyCover(object):
 
         # Adjust CCx for change in CGC
         cond5221 = (cond522 & (CGCadj > 0))
-        CCxAdj = self.adjust_CCx(self.var.CC0adj, self.var.CCx, CGCadj, self.var.CDC, dtCC, tCCadj, self.var.CanopyDevEnd)
-        # CCxAdj = self.adjust_CCx(self.var.CCprev, self.var.CC0adj, self.var.CCx, CGCadj, self.var.CDC, dtCC, tCCadj, self.var.CanopyDevEnd)
+        CCxAdj = np.zeros_like(self.var.CCx)
+        CCxAdj[cond5221] = self.adjust_CCx(self.var.CCprev[cond5221], self.var.CC0adj[cond5221], self.var.CCx[cond5221], CGCadj[cond5221], self.var.CDC[cond5221], dtCC[cond5221], tCCadj[cond5221], self.var.CanopyDevEnd[cond5221])
         cond52211 = (cond5221 & (CCxAdj > 0))
         # Approaching maximum canopy size
         cond522111 = (cond52211 & (np.abs(self.var.CCprev - self.var.CCx) < 0.00001))
-        tmp_tCC = tCC - self.var.Emergence
-        # tmp_CC = self.canopy_cover_development(tmp_tCC, 'Growth')
-        tmp_CC = self.canopy_cover_development(self.var.CC0, self.var.CCx, self.var.CGC, self.var.CDC, tmp_tCC, 'Growth')
-        self.var.CC[cond522111] = tmp_CC[cond522111]
+        tmp_tCC = (tCC - self.var.Emergence)[cond522111]
+        self.var.CC[cond522111] = self.canopy_cover_development(self.var.CC0[cond522111], self.var.CCx[cond522111], self.var.CGC[cond522111], self.var.CDC[cond522111], tmp_tCC, 'Growth')
 
         # Determine time required to reach CC on previous day, given CGCadj
         # value
         cond522112 = (cond52211 & np.logical_not(cond522111))
-        tReq = self.canopy_cover_required_time(self.var.CC0adj, CCxAdj, CGCadj, self.var.CDC, dtCC, tCCadj, 'CGC')
-        tmp_tCC = tReq + dtCC
+        tmp_tCC = np.zeros_like(tCCadj)
+        tReq = self.canopy_cover_required_time(self.var.CCprev[cond522112], self.var.CC0adj[cond522112], CCxAdj[cond522112], CGCadj[cond522112], self.var.CDC[cond522112], dtCC[cond522112], tCCadj[cond522112], 'CGC')
+        tmp_tCC[cond522112] = tReq + dtCC[cond522112]
 
         # Determine new canopy size
         cond5221121 = (cond522112 & (tmp_tCC > 0))
-        # tmp_CC = self.canopy_cover_development(tmp_tCC, 'Growth')
-        tmp_CC = self.canopy_cover_development(self.var.CC0adj, CCxAdj, CGCadj, self.var.CDC, tmp_tCC, 'Growth')
-        self.var.CC[cond5221121] = tmp_CC[cond5221121]
+        self.var.CC[cond5221121] = self.canopy_cover_development(self.var.CC0adj[cond5221121], CCxAdj[cond5221121], CGCadj[cond5221121], self.var.CDC[cond5221121], tmp_tCC[cond5221121], 'Growth')
 
         # No canopy growth (line 110)
         cond5221122 = (cond522112 & np.logical_not(cond5221121))
@@ -227,11 +229,11 @@ class CanopyCover(object):
         self.var.CCxAct[cond53] = self.var.CC[cond53]
 
         # No more canopy growth is possible or canopy is in decline (line 132)
-        cond6 = (self.var.GrowingSeasonIndex & np.logical_not(cond4 | cond5) & (tCCadj > self.var.CanopyDevEnd))
+        cond6 = (self.var.GrowingSeasonIndex & np.logical_not(cond4 | cond5) & ((events & CANOPYDEVEND_PASSED) != 0))
 
         # Mid-season stage - no canopy growth: update actual maximum canopy
         # cover size during growing season only (i.e. do not update CC)
-        cond61 = (cond6 & (tCCadj < self.var.Senescence))
+        cond61 = (cond6 & ((events & SENESCENCE_REACHED) == 0))
         self.var.CC[cond61] = self.var.CCprev[cond61]
         cond611 = (cond61 & (self.var.CC > self.var.CCxAct))
         self.var.CCxAct[cond611] = self.var.CC[cond611]
@@ -240,19 +242,21 @@ class CanopyCover(object):
         # for difference between actual and potential CCx, and determine new
         # canopy size
         cond62 = (cond6 & np.logical_not(cond61))
-        CDCadj = (self.var.CDC * np.divide(self.var.CCxAct, self.var.CCx, out=np.zeros_like(self.var.CCx), where=self.var.CCx!=0))
-        tmp_tCC = tCCadj - self.var.Senescence
-        tmp_CC = self.canopy_cover_development(self.var.CC0adj, self.var.CCxAct, self.var.CGC, CDCadj, tmp_tCC, 'Decline')
-        self.var.CC[cond62] = tmp_CC[cond62]
+        CCx = self.var.CCx[cond62]
+        CCxAct = self.var.CCxAct[cond62]
+        CDCadj = (self.var.CDC[cond62] * np.divide(CCxAct, CCx, out=np.zeros_like(CCx), where=CCx!=0))
+        tmp_tCC = (tCCadj - self.var.Senescence)[cond62]
+        self.var.CC[cond62] = self.canopy_cover_development(self.var.CC0adj[cond62], CCxAct, self.var.CGC[cond62], CDCadj, tmp_tCC, 'Decline')
 
     def update_CC_after_senescence(self, tCCadj, dtCC):
 
         CCsen = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        cond7 = (self.var.GrowingSeasonIndex & (tCCadj >= self.var.Emergence))
+        events = self.var.PhenoEvents
+        cond7 = (self.var.GrowingSeasonIndex & ((events & EMERGENCE_REACHED) != 0))
         
         # Check for early canopy senescence starting/continuing due to severe
         # water stress
-        cond71 = (cond7 & ((tCCadj < self.var.Senescence) | (self.var.tEarlySen > 0)))
+        cond71 = (cond7 & (((events & SENESCENCE_REACHED) == 0) | (self.var.tEarlySen > 0)))
         
         # Early canopy senescence
         cond711 = (cond71 & (self.var.Ksw_Sen < 1))
@@ -270,19 +274,17 @@ class CanopyCover(object):
 
         # Get time required to reach CC at end of previous day, given CDCadj
         cond7115 = (cond711 & np.logical_not(cond7114))
-        tReq = self.canopy_cover_required_time(self.var.CC0adj, self.var.CCxEarlySen, self.var.CGC, CDCadj, dtCC, tCCadj, 'CDC')
+        CC0adj = self.var.CC0adj[cond7115]
+        CCxEarlySen = self.var.CCxEarlySen[cond7115]
+        CGC = self.var.CGC[cond7115]
+        tReq = self.canopy_cover_required_time(self.var.CCprev[cond7115], CC0adj, CCxEarlySen, CGC, CDCadj[cond7115], dtCC[cond7115], tCCadj[cond7115], 'CDC')
 
         # Calculate GDD's for canopy decline and determine new canopy size
-        tmp_tCC = tReq + dtCC
-        tmp_CCsen = self.canopy_cover_development(
-            self.var.CC0adj,
-            self.var.CCxEarlySen,
-            self.var.CGC,
-            CDCadj, tmp_tCC, 'Decline')
-        CCsen[cond7115] = tmp_CCsen[cond7115]
+        tmp_tCC = tReq + dtCC[cond7115]
+        CCsen[cond7115] = self.canopy_cover_development(CC0adj, CCxEarlySen, CGC, CDCadj[cond7115], tmp_tCC, 'Decline')
 
         # Update canopy cover size
-        cond7116 = (cond711 & (tCCadj < self.var.Senescence))
+        cond7116 = (cond711 & ((events & SENESCENCE_REACHED) == 0))
 
         # Limit CC to CCx
         CCsen[cond7116] = np.clip(CCsen, None, self.var.CCx)[cond7116]
@@ -316,12 +318,11 @@ class CanopyCover(object):
 
         # Rewatering of canopy in late season: get adjusted values of CCx and
         # CDC and update CC
-        cond7121 = (cond712 & ((tCCadj > self.var.Senescence) & (self.var.tEarlySen > 0)))
-        tmp_tCC = tCCadj - dtCC - self.var.Senescence
-        CCxAdj,CDCadj = self.update_CCx_and_CDC(tmp_tCC)
-        tmp_tCC = tCCadj - self.var.Senescence
-        tmp_CC = self.canopy_cover_development(self.var.CC0adj, CCxAdj, self.var.CGC, CDCadj, tmp_tCC, 'Decline')
-        self.var.CC[cond7121] = tmp_CC[cond7121]
+        cond7121 = (cond712 & (((events & SENESCENCE_PASSED) != 0) & (self.var.tEarlySen > 0)))
+        tmp_tCC = (tCCadj - dtCC - self.var.Senescence)[cond7121]
+        CCxAdj,CDCadj = self.update_CCx_and_CDC(self.var.CCprev[cond7121], self.var.CCx[cond7121], self.var.CDC[cond7121], tmp_tCC)
+        tmp_tCC = (tCCadj - self.var.Senescence)[cond7121]
+        self.var.CC[cond7121] = self.canopy_cover_development(self.var.CC0adj[cond7121], CCxAdj, self.var.CGC[cond7121], CDCadj, tmp_tCC, 'Decline')
 
         # Check for crop growth termination
         cond71211 = (cond7121 & ((self.var.CC < 0.001) & np.logical_not(self.var.CropDead)))
@@ -335,23 +336,18 @@ class CanopyCover(object):
         self.var.CCxW[cond71] = np.clip(self.var.CCxW, self.var.CC, None)[cond71]
         # return CC, CC0adj, CCxAct, CCxW, CropDead, PrematSenes, tEarlySen
 
-    def update_CCx_and_CDC(self, dt):
+    def update_CCx_and_CDC(self, CCprev, CCx, CDC, dt):
         """Function to update CCx and CDC parameter values for 
         rewatering in late season of an early declining canopy
         """
-        CCxAdj = self.var.CCprev / (1 - 0.05 * (np.exp(dt * (np.divide(self.var.CDC, self.var.CCx, out=np.zeros_like(self.var.CCx), where=self.var.CCx!=0))) - 1))
-        CDCadj = self.var.CDC * np.divide(CCxAdj, self.var.CCx, out=np.zeros_like(self.var.CCx), where=self.var.CCx!=0)
+        CCxAdj = CCprev / (1 - 0.05 * (np.exp(dt * (np.divide(CDC, CCx, out=np.zeros_like(CCx), where=CCx!=0))) - 1))
+        CDCadj = CDC * np.divide(CCxAdj, CCx, out=np.zeros_like(CCx), where=CCx!=0)
         return CCxAdj,CDCadj
         
     def dynamic(self):
         if np.any(self.var.GrowingSeasonDayOne):
             self.reset_initial_conditions()            
 
-        # Preallocate some variables
-        CCxAdj = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        CDCadj = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        CCsen = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-
         # Store initial condition
         self.var.CCprev = np.copy(self.var.CC)
 
@@ -373,7 +369,8 @@ class CanopyCover(object):
         
         # Check for crop growth termination: if the following conditions are
         # met, the crop has died
-        cond6 = (self.var.GrowingSeasonIndex & ((tCCadj <= self.var.Maturity) & (tCCadj >= self.var.Emergence) & (tCCadj > self.var.CanopyDevEnd)))
+        events = self.var.PhenoEvents
+        cond6 = (self.var.GrowingSeasonIndex & (((events & MATURITY_PASSED) == 0) & ((events & EMERGENCE_REACHED) != 0) & ((events & CANOPYDEVEND_PASSED) != 0)))
         cond63 = (cond6 & ((self.var.CC < 0.001) & np.logical_not(self.var.CropDead)))
         self.var.CC[cond63] = 0
         self.var.CropDead[cond63] = True
@@ -381,11 +378,11 @@ class CanopyCover(object):
         # Canopy senescence due to water stress (actual)
         # ##############################################
         
-        cond7 = (self.var.GrowingSeasonIndex & (tCCadj >= self.var.Emergence))
+        cond7 = (self.var.GrowingSeasonIndex & ((events & EMERGENCE_REACHED) != 0))
 
         # Check for early canopy senescence starting/continuing due to severe
         # water stress
-        cond71 = (cond7 & ((tCCadj < self.var.Senescence) | (self.var.tEarlySen > 0)))
+        cond71 = (cond7 & (((events & SENESCENCE_REACHED) == 0) | (self.var.tEarlySen > 0)))
 
         # Early canopy senescence
         cond711 = (cond71 & (self.var.Ksw_Sen < 1))
@@ -116,7 +116,6 @@ class CapillaryRise(object):
             
             zBot = np.sum(self.var.dz)
             zBotMid = zBot - (self.var.dz[-1] / 2)  # depth to midpoint of bottom layer
-            thnew = np.copy(self.var.th)
 
             # Get maximum capillary rise for bottom compartment
             MaxCR = self.maximum_capillary_rise(
@@ -169,7 +168,10 @@ class CapillaryRise(object):
                     zBot,
                     self.var.dz[compi])
 
-                thnew[:,compi,...][cond1] = thnew_comp[cond1]
+                # Each compartment is only read before it is updated, so the
+                # water content can be modified in place
+                self.var.th[:,compi,...][cond1] = thnew_comp[cond1]
+                self.var.thChanged |= cond1
                 CrTot[cond1] += CRcomp[cond1]
 
                 # Update bottom elevation of compartment and compartment counter
@@ -188,5 +190,4 @@ class CapillaryRise(object):
                     cond11 = (cond1 & (MaxCR > LimCR))
                     MaxCR[cond11] = LimCR[cond11]
 
-            self.var.th = np.copy(thnew)
             self.var.CrTot = CrTot
@@ -20,9 +20,77 @@ class CheckGroundwaterTable(object):
         arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         self.var.th_fc_adj = np.copy(self.var.th_fc_comp)
         self.var.WTinSoil = np.copy(arr_zeros.astype(bool))
+        self.var.WTinSoilComp = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon), dtype=bool)
+
+        # Depth to groundwater for which th_fc_adj was last computed (inf
+        # ensures th_fc_adj is computed for all cells on the first day)
+        self.var.zGWprev = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), np.inf)
+        
+        # get the mid point of each compartment
+        zBot = np.cumsum(self.var.dz)
+        zTop = zBot - self.var.dz
+        self.var.zMidComp = (zTop + zBot) / 2
+
+        # get Xmax
+        Xmax = np.zeros((self.var.nCrop,self.var.nComp,self.var.nLat,self.var.nLon))
+        cond1 = self.var.th_fc_comp <= 0.1
+        cond2 = self.var.th_fc_comp >= 0.3
+        cond3 = np.logical_not(cond1 | cond2) # i.e. 0.1 < fc < 0.3
+        Xmax[cond1] = 1
+        Xmax[cond2] = 2
+        pF = 2 + 0.3 * (self.var.th_fc_comp - 0.1) / 0.2
+        Xmax_cond3 = np.exp(pF * np.log(10)) / 100
+        Xmax[cond3] = Xmax_cond3[cond3]
+        self.var.Xmax = Xmax
+        self.var.dV = self.var.th_s_comp - self.var.th_fc_comp
 
     def reset_initial_conditions(self):
         self.var.WTinSoil[self.var.GrowingSeasonDayOne] = False
+
+    def adjust_field_capacity(self, zGW, Xmax, th_fc, th_s, dV):
+        """Function to compute field capacity adjusted for the presence 
+        of a shallow water table, for a subset of cells
+
+        Args:
+          zGW   : depth to groundwater, dimension (cell)
+          Xmax, th_fc, th_s, dV : dimension (cell,comp)
+
+        Returns:
+          th_fc_adj, dimension (cell,comp)
+        """
+        zGW_comp = zGW[:,None]
+        zMid = self.var.zMidComp[None,:]
+        cond4 = (zGW_comp < 0) | ((zGW_comp - zMid) >= Xmax)
+
+        # Index of the compartment to which each element belongs (shallow ->
+        # deep, i.e. 1 is the shallowest)
+        compartment = np.arange(1, self.var.nComp + 1)[None,:]
+
+        # Index of the lowest compartment (i.e. the maximum value) for which
+        # cond4 is met, cast to all compartments (achieved by multiplying
+        # compartments by cond4 to set elements that do not equal the
+        # condition to zero, but retain the compartment number of elements
+        # that do meet the condition
+        cond4_max_compartment = np.amax(compartment * cond4, axis=1)[:,None]
+
+        # Now, identify compartments that are shallower than the deepest
+        # compartment for which cond4 is met
+        cond4 = (compartment <= cond4_max_compartment)
+
+        # 'cond4' is a special case because if ANY compartment meets the
+        # condition then all overlying compartments are automatically assumed to
+        # meet the condition. Thus in subsequent conditions we have to be careful
+        # to ensure that True elements in 'cond4' do not also belong to 'cond5',
+        # 'cond6' or 'cond7'. We use numpy.logical_not(...) for this purpose.
+        cond5 = (th_fc >= th_s) & np.logical_not(cond4)
+        cond6 = (zMid >= zGW_comp) & np.logical_not(cond4 | cond5)
+        cond7 = np.logical_not(cond4 | cond5 | cond6)
+        dFC = (dV / (Xmax ** 2)) * ((zMid - (zGW_comp - Xmax)) ** 2)
+
+        th_fc_adj = np.copy(th_fc)
+        th_fc_adj[cond6] = th_s[cond6]
+        th_fc_adj[cond7] = (th_fc + dFC)[cond7]
+        return th_fc_adj
         
     def dynamic(self):
 
@@ -33,71 +101,37 @@ class CheckGroundwaterTable(object):
         if self.var.WaterTable:
             # Copy depth to groundwater, and add crop dimension for convenience
             self.var.zGW = self.var.zGW[None,:,:] * np.ones((self.var.nCrop))[:,None,None]
-            zGW_comp = self.var.zGW[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None]
-
-            # get the mid point of each compartment
-            zBot = np.cumsum(self.var.dz)
-            zTop = zBot - self.var.dz
-            zMid = (zTop + zBot) / 2
-            zMid = zMid[None,:,None,None] * np.ones((self.var.nCrop,self.var.nLat,self.var.nLon))[:,None,:,:]
 
-            # Check if water table is within modelled soil profile
-            WTinSoilComp = (zMid >= zGW_comp)
-            # WTinSoilComp = (zMid >= self.var.zGW)
-            self.var.th[WTinSoilComp] = self.var.th_s_comp[WTinSoilComp]
+            # Compartments and field capacity only need to be updated where
+            # the depth to groundwater has changed since the last time step
+            # (cells without data, in which zGW is NaN, are unchanged)
+            unchanged = ((self.var.zGW == self.var.zGWprev) | (np.isnan(self.var.zGW) & np.isnan(self.var.zGWprev)))
+            I,J,K = np.nonzero(~unchanged)
+            if I.size > 0:
+                zGW = self.var.zGW[I,J,K]
+
+                # Check if water table is within modelled soil profile
+                self.var.WTinSoilComp[I,:,J,K] = (self.var.zMidComp[None,:] >= zGW[:,None])
+
+                # Adjust field capacity
+                self.var.th_fc_adj[I,:,J,K] = self.adjust_field_capacity(
+                    zGW,
+                    self.var.Xmax[I,:,J,K],
+                    self.var.th_fc_comp[I,:,J,K],
+                    self.var.th_s_comp[I,:,J,K],
+                    self.var.dV[I,:,J,K])
+                self.var.zGWprev = np.copy(self.var.zGW)
+
+            # Compartments below the water table are saturated
+            self.var.th[self.var.WTinSoilComp] = self.var.th_s_comp[self.var.WTinSoilComp]
+            self.var.thChanged |= np.any(self.var.WTinSoilComp, axis=1)
 
             # Flatten WTinSoilComp to provide an array with dimensions
             # (ncrop, nLat, nLon), indicating crops where the water
             # table is in the soil profile
-            self.var.WTinSoil = np.sum(WTinSoilComp, axis=1).astype(bool)
-
-            # get Xmax
-            Xmax = np.zeros((self.var.nCrop,self.var.nComp,self.var.nLat,self.var.nLon))
-            cond1 = self.var.th_fc_comp <= 0.1
-            cond2 = self.var.th_fc_comp >= 0.3
-            cond3 = np.logical_not(cond1 | cond2) # i.e. 0.1 < fc < 0.3
-            Xmax[cond1] = 1
-            Xmax[cond2] = 2
-            pF = 2 + 0.3 * (self.var.th_fc_comp - 0.1) / 0.2
-            Xmax_cond3 = np.exp(pF * np.log(10)) / 100
-            Xmax[cond3] = Xmax_cond3[cond3]
-            cond4 = (zGW_comp < 0) | ((zGW_comp - zMid) >= Xmax)
-            # cond4 = (self.var.zGW < 0) | ((self.var.zGW - zMid) >= Xmax)
-
-            # Index of the compartment to which each element belongs (shallow ->
-            # deep, i.e. 1 is the shallowest)
-            compartment = (np.arange(1, self.var.nComp + 1)[None,:,None,None] * np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))[:,None,:,:])
-
-            # Index of the lowest compartment (i.e. the maximum value) for which
-            # cond4 is met, cast to all compartments (achieved by multiplying
-            # compartments by cond4 to set elements that do not equal the
-            # condition to zero, but retain the compartment number of elements
-            # that do meet the condition
-            cond4_max_compartment = (np.amax(compartment * cond4, axis=1)[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None])
-
-            # Now, identify compartments that are shallower than the deepest
-            # compartment for which cond4 is met
-            cond4 = (compartment <= cond4_max_compartment)
-
-            # 'cond4' is a special case because if ANY compartment meets the
-            # condition then all overlying compartments are automatically assumed to
-            # meet the condition. Thus in subsequent conditions we have to be careful
-            # to ensure that True elements in 'cond4' do not also belong to 'cond5',
-            # 'cond6' or 'cond7'. We use numpy.logical_not(...) for this purpose.
-            cond5 = (self.var.th_fc_comp >= self.var.th_s_comp) & np.logical_not(cond4)
-            cond6 = (zMid >= zGW_comp) & np.logical_not(cond4 | cond5)
-            # cond6 = (zMid >= self.var.zGW) & np.logical_not(cond4 | cond5)
-            cond7 = np.logical_not(cond4 | cond5 | cond6)
-            dV = self.var.th_s_comp - self.var.th_fc_comp
-            dFC = (dV / (Xmax ** 2)) * ((zMid - (zGW_comp - Xmax)) ** 2)
-            # dFC = (dV / (Xmax ** 2)) * ((zMid - (self.var.zGW - Xmax)) ** 2)
-
-            self.var.th_fc_adj[cond4] = self.var.th_fc_comp[cond4]
-            self.var.th_fc_adj[cond5] = self.var.th_fc_comp[cond5]
-            self.var.th_fc_adj[cond6] = self.var.th_s_comp[cond6]
-            self.var.th_fc_adj[cond7] = self.var.th_fc_comp[cond7] + dFC[cond7]
+            self.var.WTinSoil = np.any(self.var.WTinSoilComp, axis=1)
 
         else:
+            # th_fc_adj equals th_fc_comp, as set in initial()
             self.var.zGW = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon)) * -999
             self.var.WTinSoil = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), False)
-            self.var.th_fc_adj = np.copy(self.var.th_fc_comp)
@@ -187,7 +187,7 @@ class Configuration(object):
             self.soilOptions[item] = vos.getFullPath(self.soilOptions[item], self.globalOptions['inputDir'])
 
         # crop parameter input file
-        cropInputFiles = ['cropParameterNC','PotYieldNC']
+        cropInputFiles = ['cropParameterNC','PotYieldNC','cropPresenceNC']
         for item in cropInputFiles:
             if item in self.cropOptions:
                 if self.cropOptions[item] != "None":
@@ -286,7 +286,56 @@ class Configuration(object):
 
         if 'InterpMethod' not in self.globalOptions.keys():
             self.globalOptions['InterpMethod'] = "layer"
-            
+
+        # memory options
+        # ==============
+
+        if 'memoryBudget' not in self.globalOptions.keys():
+            self.globalOptions['memoryBudget'] = "None"
+
+        # estimate the run time by timing numpy at the start of the run
+        if 'estimateRunTime' not in self.globalOptions.keys():
+            self.globalOptions['estimateRunTime'] = "0"
+
+        # compiled kernels options
+        # ========================
+
+        # the compiled kernels agree with the numpy implementation to
+        # rounding error (~1e-13), so they are only used on request
+        if 'UseNumba' not in self.globalOptions.keys():
+            self.globalOptions['UseNumba'] = "0"
+
+        # parallel options
+        # ================
+
+        # number of worker processes and number of tiles used by the tile
+        # runner (None: one worker per processor, two tiles per worker);
+        # tiles are bands of rows ('rows') or rectangles ('blocks'). The
+        # crop runner uses at most one worker per crop
+        if 'nWorkers' not in self.globalOptions.keys():
+            self.globalOptions['nWorkers'] = "None"
+        if 'nTiles' not in self.globalOptions.keys():
+            self.globalOptions['nTiles'] = "None"
+        if 'tileShape' not in self.globalOptions.keys():
+            self.globalOptions['tileShape'] = "rows"
+
+        # read static parameters and daily forcing once for all workers,
+        # into shared memory with a ring buffer of sharedInputSlots days
+        if 'sharedInput' not in self.globalOptions.keys():
+            self.globalOptions['sharedInput'] = "0"
+        if 'sharedInputSlots' not in self.globalOptions.keys():
+            self.globalOptions['sharedInputSlots'] = "8"
+
+        # number of latitude bands in which modules are computed by a pool
+        # of threads within the model process (1: no bands)
+        if 'nBands' not in self.globalOptions.keys():
+            self.globalOptions['nBands'] = "1"
+
+        # compute the soil water modules only over the (crop, cell) pairs
+        # in which crops are present (see ActiveSet.py)
+        if 'cropActiveSet' not in self.globalOptions.keys():
+            self.globalOptions['cropActiveSet'] = "0"
+
         # groundwater options
         # ===================
         
@@ -335,3 +384,21 @@ class Configuration(object):
         # irrigation schedule file 
         if 'irrScheduleNC' not in self.irrMgmtOptions.keys():
             self.irrMgmtOptions['irrScheduleNC'] = "None"
+
+        # crop options
+        # ============
+
+        # crop presence file (if None, crop presence is derived from
+        # planting and harvest dates)
+        if 'cropPresenceNC' not in self.cropOptions.keys():
+            self.cropOptions['cropPresenceNC'] = "None"
+
+        # soil evaporation options
+        # ========================
+
+        # number of sub-daily time steps for stage 2 soil evaporation; if a
+        # tolerance (mm/day) is given the time steps are chosen adaptively
+        if 'EvapTimeSteps' not in self.soilOptions.keys():
+            self.soilOptions['EvapTimeSteps'] = "20"
+        if 'EvapTolerance' not in self.soilOptions.keys():
+            self.soilOptions['EvapTolerance'] = "None"
@@ -11,6 +11,9 @@ import netCDF4 as nc
 import datetime as datetime
 import calendar as calendar
 
+import logging
+logger = logging.getLogger(__name__)
+
 class CropParameters(object):
     
     def __init__(self, CropParameters_variable):
@@ -25,6 +28,7 @@ class CropParameters(object):
         self.var.GrowingSeasonIndex = np.copy(arr_zeros.astype(bool))
         self.var.GrowingSeasonDayOne = np.copy(arr_zeros.astype(bool))
         self.var.DAP = np.copy(arr_zeros)
+        self.season_day_one = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon), dtype=np.int32)
         
     def read(self):
         """Function to read crop input parameters"""
@@ -35,56 +39,112 @@ class CropParameters(object):
                     self.var.cropParameterFileNC,
                     param,
                     cloneMapFileName=self.var.cloneMap)
+        self.read_crop_presence()
+        self.compute_season_table()
+
+    def read_crop_presence(self):
+        """Function to read the (crop, cell) pairs in which each crop 
+        is grown. If no crop presence file is supplied, a crop is 
+        assumed to be present where both planting and harvest dates 
+        are valid days of the year.
+
+        Crops which are not present never enter a growing season (see
+        compute_season_table), so the modules which only act within
+        growing seasons leave them unchanged. If the configuration option
+        globalOptions:cropActiveSet equals 1, the soil water modules are
+        only computed over the pairs in which crops are present (see
+        ActiveSet.py); model arrays keep all crops in all cells.
+        """
+        cropPresenceFileNC = self.var._configuration.cropOptions['cropPresenceNC']
+        if cropPresenceFileNC != "None":
+            presence = vos.netcdf2PCRobjCloneWithoutTime(
+                cropPresenceFileNC,
+                'CropPresence',
+                cloneMapFileName=self.var.cloneMap)
+            self.var.CropPresence = (np.nan_to_num(presence) > 0)
+        else:
+            pd = np.nan_to_num(self.var.PlantingDate)
+            hd = np.nan_to_num(self.var.HarvestDate)
+            self.var.CropPresence = ((pd >= 1) & (pd <= 366) & (hd >= 1) & (hd <= 366))
+
+        logger.info('Crops are present in %i of %i crop/cell pairs', np.sum(self.var.CropPresence), self.var.CropPresence.size)
         
-    def adjust_planting_and_harvesting_date(self):
+    def compute_season_table(self):
+        """Function to compute the growing season table for the whole
+        run. Planting and harvest dates are adjusted to preserve the
+        date in leap years, so the table holds one set of seasons for
+        common years and one for leap years. For each (crop, cell) pair
+        a year contains at most two periods of the growing season: one
+        from planting, or from 1 January if the season started in the
+        previous year, to harvest, and one from planting to 31 December
+        if the season ends in the following year. Periods are stored
+        as days of the year, and converted to time step indices once a
+        year.
+        """
+        self.season_table = {}
+        for leap in [False, True]:
 
-        if self.var._modelTime.timeStepPCR == 1 or self.var._modelTime.doy == 1:
-            
+            # adjust values for leap year (objective is to preserve date)
             pd = np.copy(self.var.PlantingDate)
             hd = np.copy(self.var.HarvestDate)
-            st = self.var._modelTime.currTime
-            sd = self.var._modelTime.currTime.timetuple().tm_yday
+            pd[(leap & (pd >= 60))] += 1  # TODO: check these
+            hd[(leap & (hd >= 60) & (hd > pd))] += 1
+
+            valid = (np.isfinite(pd) & np.isfinite(hd) & self.var.CropPresence)
+            cond1 = (valid & (pd < hd))
+            cond2 = (valid & (pd > hd))
+            with np.errstate(invalid='ignore'):
+                pd_day = np.nan_to_num(np.ceil(pd)).astype(np.int32)
+                hd_day = np.nan_to_num(np.floor(hd)).astype(np.int32)
+                self.season_table[leap] = {
+                    'PlantingDateAdj' : pd,
+                    'HarvestDateAdj' : hd,
+                    'PlantingDay' : np.where((np.isfinite(pd) & (pd == np.round(pd)) & self.var.CropPresence), pd_day, 0),
+                    'HarvestOffset' : np.trunc(hd - 1),
+                    'Start' : [np.where(cond1, pd_day, 1), np.where(cond2, pd_day, 1)],
+                    'End' : [np.where((cond1 | cond2), hd_day, 0), np.where(cond2, 366, 0)]}
 
-            # adjust values for leap year (objective is to preserve date)
-            isLeapYear1 = calendar.isleap(st.year)
-            # isLeapYear2 = calendar.isleap(st.year + 1)
-            pd[(isLeapYear1 & (pd >= 60))] += 1  # TODO: check these
-            hd[(isLeapYear1 & (hd >= 60) & (hd > pd))] += 1
-            # hd[(isLeapYear2 & (hd >= 60) & (hd < pd))] += 1
-            
-            self.var.PlantingDateAdj = np.copy(pd)
-            self.var.HarvestDateAdj = np.copy(hd)
+    def adjust_planting_and_harvesting_date(self):
+
+        if self.var._modelTime.timeStepPCR == 1 or self.var._modelTime.doy == 1:
+
+            table = self.season_table[self.var._modelTime.isLeapYear]
+            self.var.PlantingDateAdj = table['PlantingDateAdj']
+            self.var.HarvestDateAdj = table['HarvestDateAdj']
+
+            # Convert days of the current year to time step indices (the
+            # first time step has index 0)
+            offset = (self.var._modelTime.timeStepPCR - 1) - self.var._modelTime.doy
+            last_idx = self.var._modelTime.nrOfTimeSteps - 1
+
+            # Growing seasons are only simulated if the harvest date in
+            # the current year is within the simulation period
+            with np.errstate(invalid='ignore'):
+                cond3 = (offset + 1 + table['HarvestOffset'] <= last_idx)
+            self.season_start = [offset + start for start in table['Start']]
+            self.season_end = [np.where(cond3, offset + end, -1) for end in table['End']]
+            self.planting_idx = np.where(table['PlantingDay'] > 0, offset + table['PlantingDay'], -1)
 
     def update_growing_season(self):
 
         # TODO: check both PlantingDateAdj and HarvestDateAdj are not the same!        
-        cond1 = ((self.var.PlantingDateAdj < self.var.HarvestDateAdj)
-                 & ((self.var.PlantingDateAdj <= self.var._modelTime.doy)
-                    & (self.var._modelTime.doy <= self.var.HarvestDateAdj)))
-        cond2 = ((self.var.PlantingDateAdj > self.var.HarvestDateAdj)
-                 & ((self.var.PlantingDateAdj <= self.var._modelTime.doy)
-                    | (self.var._modelTime.doy <= self.var.HarvestDateAdj)))
-
         # ***TODO: introduce another condition to check whether current growing season starts before simulation start time***
-        
-        hd_arr = (np.datetime64(str(datetime.datetime(self.var._modelTime.year, 1, 1))) + np.array(self.var.HarvestDateAdj - 1, dtype='timedelta64[D]'))        
-        cond3 = hd_arr <= np.datetime64(str(self.var._modelTime.endTime))
-        
-        self.var.GrowingSeason = ((cond1 & cond3) | (cond2 & cond3))
-
-        # print self.var.PlantingDateAdj[:,10,10]
-        # print self.var.HarvestDateAdj[:,10,10]
+        idx = self.var._modelTime.timeStepPCR - 1
+        self.var.GrowingSeason = (((self.season_start[0] <= idx) & (idx <= self.season_end[0]))
+                                  | ((self.season_start[1] <= idx) & (idx <= self.season_end[1])))
                 
         self.var.GrowingSeasonIndex = np.copy(self.var.GrowingSeason)
         self.var.GrowingSeasonIndex *= np.logical_not(self.var.CropDead | self.var.CropMature)
 
-        self.var.GrowingSeasonDayOne = self.var._modelTime.doy == self.var.PlantingDateAdj
-        # self.var.GrowingSeasonDayOne = self.var._modelTime.doy == self.var.PlantingDate
-        self.var.DAP[self.var.GrowingSeasonDayOne] = 0
+        self.var.GrowingSeasonDayOne = (self.planting_idx == idx)
         self.var.GrowingSeasonIndex[self.var.GrowingSeasonDayOne] = True
 
-        self.var.DAP[self.var.GrowingSeasonIndex] += 1
-        self.var.DAP[np.logical_not(self.var.GrowingSeasonIndex)] = 0
+        # Days after planting are counted from planting, or from the first
+        # day of the growing season if it was not preceded by planting (e.g.
+        # growing seasons which started before the simulation)
+        cond4 = (self.var.GrowingSeasonDayOne | (self.var.GrowingSeasonIndex & (self.var.DAP == 0)))
+        self.season_day_one[cond4] = idx
+        self.var.DAP = np.where(self.var.GrowingSeasonIndex, (idx + 1) - self.season_day_one, 0).astype(np.float64)
         
 class AQCropParameters(CropParameters):
 
@@ -306,7 +366,7 @@ class AQCropParameters(CropParameters):
 
             pd = np.copy(self.var.PlantingDate)
             hd = np.copy(self.var.HarvestDate)
-            sd = self.var._modelTime.startTime.timetuple().tm_yday
+            sd = self.var._modelTime.startTimeDOY
 
             # NEW:
             isLeapYear1 = calendar.isleap(self.var._modelTime.startTime.year)
@@ -325,6 +385,10 @@ class AQCropParameters(CropParameters):
             pd[cond] += 365
             hd[cond] += 365
 
+            # ignore crops which are not grown in a given cell
+            pd[np.logical_not(self.var.CropPresence)] = sd
+            hd[np.logical_not(self.var.CropPresence)] = sd
+
             # OLD:
             # # if start day of simulation is greater than planting day the
             # # first complete growing season will not be until the
@@ -346,8 +410,6 @@ class AQCropParameters(CropParameters):
             # hd[(isLeapYear2 & (hd >= 425))] += 1            
 
             max_harvest_date = int(np.max(hd))
-            day_idx = np.arange(sd, max_harvest_date + 1)[:,None,None,None] * np.ones_like(self.var.PlantingDate)[None,:,:,:]
-            growing_season_idx = ((day_idx >= pd) & (day_idx <= hd))
 
             # Extract weather data for first growing season
             tmin = vos.netcdf2NumPyTimeSlice(self.var.tmpFileNC, self.var.tmnVarName,
@@ -362,66 +424,70 @@ class AQCropParameters(CropParameters):
                                              cloneMapFileName = self.var.cloneMap,
                                              LatitudeLongitude = True)
 
-            # broadcast to crop dimension
-            tmax = tmax[:,None,:,:] * np.ones((self.var.PlantingDate.shape[0]))[None,:,None,None]
-            tmin = tmin[:,None,:,:] * np.ones((self.var.PlantingDate.shape[0]))[None,:,None,None]
-
-            # for convenience
-            tupp = self.var.Tupp[None,:,:,:] * np.ones((tmin.shape[0]))[:,None,None,None]
-            tbase = self.var.Tbase[None,:,:,:] * np.ones((tmin.shape[0]))[:,None,None,None]
-
-            # calculate GDD according to the various methods
-            if self.var.GDDmethod == 1:
-                tmean = ((tmax + tmin) / 2)
-                tmean = np.clip(tmean, self.var.Tbase, self.var.Tupp)
-            elif self.var.GDDmethod == 2:
-                tmax = np.clip(tmax, self.var.Tbase, self.var.Tupp)
-                tmin = np.clip(tmin, self.var.Tbase, self.var.Tupp)
-                tmean = ((tmax + tmin) / 2)
-            elif self.var.GDDmethod == 3:
-                tmax = np.clip(tmax, self.var.Tbase, self.var.Tupp)
-                tmin = np.clip(tmin, None, self.var.Tupp)
-                tmean = ((tmax + tmin) / 2)
-                tmean = np.clip(tmean, self.var.Tbase, None)
-
-            tmean[np.logical_not(growing_season_idx)] = 0
-            tbase[np.logical_not(growing_season_idx)] = 0
-            GDD = (tmean - tbase)
-            GDDcum = np.cumsum(GDD, axis=0)
-
-            # "Check if converting crop calendar to GDD mode"
-            # if Mode == 1 & self.var.SwitchGDD:
-            if self.var.CalendarType == 1 & self.var.SwitchGDD:
+            # Arrays with dimension (day,crop,lat,lon) are computed in
+            # latitude bands so that they fit in the memory budget
+            FloweringEnd = np.zeros_like(self.var.PlantingDate)
+            for rows in self.var.memory_planner_module.latitude_bands(max_harvest_date - sd + 1):
+                
+                day_idx = np.arange(sd, max_harvest_date + 1)[:,None,None,None] * np.ones_like(self.var.PlantingDate[:,rows,:])[None,:,:,:]
+                GDDcum = self.compute_cumulative_GDD(tmin, tmax, day_idx, pd, hd, rows)
+
+                # "Check if converting crop calendar to GDD mode"
+                # if Mode == 1 & self.var.SwitchGDD:
+                if self.var.CalendarType == 1 & self.var.SwitchGDD:
+
+                    # Find GDD equivalent for each crop calendar variable
+                    m,n,p = day_idx.shape[1:]  # crop,lat,lon
+                    I,J,K = np.ogrid[:m,:n,:p]
+
+                    emergence_idx = (pd + self.var.EmergenceCD)[:,rows,:]  # crop,lat,lon
+                    self.var.Emergence[:,rows,:] = GDDcum[emergence_idx,I,J,K]
+                    canopy10pct_idx = (pd + self.var.Canopy10PctCD)[:,rows,:]
+                    self.var.Canopy10Pct[:,rows,:] = GDDcum[canopy10pct_idx,I,J,K]
+                    maxrooting_idx = (pd + self.var.MaxRootingCD)[:,rows,:]
+                    self.var.MaxRooting[:,rows,:] = GDDcum[maxrooting_idx,I,J,K]
+                    maxcanopy_idx = (pd + self.var.MaxCanopyCD)[:,rows,:]
+                    self.var.MaxCanopy[:,rows,:] = GDDcum[maxcanopy_idx,I,J,K]
+                    canopydevend_idx = (pd + self.var.CanopyDevEndCD)[:,rows,:]
+                    self.var.CanopyDevEnd[:,rows,:] = GDDcum[canopydevend_idx,I,J,K]
+                    senescence_idx = (pd + self.var.SenescenceCD)[:,rows,:]
+                    self.var.Senescence[:,rows,:] = GDDcum[senescence_idx,I,J,K]
+                    maturity_idx = (pd + self.var.MaturityCD)[:,rows,:]
+                    self.var.Maturity[:,rows,:] = GDDcum[maturity_idx,I,J,K]
+                    histart_idx = (pd + self.var.HIstartCD)[:,rows,:]
+                    self.var.HIstart[:,rows,:] = GDDcum[histart_idx,I,J,K]
+                    hiend_idx = (pd + self.var.HIendCD)[:,rows,:]
+                    self.var.HIend[:,rows,:] = GDDcum[hiend_idx,I,J,K]
+                    yldform_idx = (pd + self.var.YldFormCD)[:,rows,:]
+                    self.var.YldForm[:,rows,:] = GDDcum[yldform_idx,I,J,K]
+
+                    cond2 = (self.var.CropType[:,rows,:] == 3)
+                    floweringend_idx = (pd + self.var.FloweringEndCD)[:,rows,:]
+                    self.var.FloweringEnd[:,rows,:][cond2] = GDDcum[floweringend_idx,I,J,K][cond2]
+                    self.var.Flowering[:,rows,:][cond2] = (self.var.FloweringEnd - self.var.HIstart)[:,rows,:][cond2]
+
+                # elif Mode == 2:
+                elif self.var.CalendarType == 2:
+
+                    # "Find calendar days [equivalent] for some variables"
+                    pd_rows = pd[:,rows,:]
+
+                    # "1 Calendar days from sowing to maximum canopy cover"
+                    self.var.MaxCanopyCD[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.MaxCanopy[:,rows,:])
+
+                    # "2 Calendar days from sowing to end of vegetative growth"
+                    self.var.CanopyDevEndCD[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.CanopyDevEnd[:,rows,:])
+
+                    # "3 Calendar days from sowing to start of yield formation"
+                    self.var.HIstartCD[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.HIstart[:,rows,:])
+
+                    # "4 Calendar days from sowing to end of yield formation"
+                    self.var.HIendCD[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.HIend[:,rows,:])
+
+                    # "1 Calendar days from sowing to end of flowering"
+                    FloweringEnd[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.FloweringEnd[:,rows,:])
 
-                # Find GDD equivalent for each crop calendar variable
-                m,n,p = pd.shape  # crop,lat,lon
-                I,J,K = np.ogrid[:m,:n,:p]
-
-                emergence_idx = pd + self.var.EmergenceCD  # crop,lat,lon
-                self.var.Emergence = GDDcum[emergence_idx,I,J,K]
-                canopy10pct_idx = pd + self.var.Canopy10PctCD
-                self.var.Canopy10Pct = GDDcum[canopy10pct_idx,I,J,K]
-                maxrooting_idx = pd + self.var.MaxRootingCD
-                self.var.MaxRooting = GDDcum[maxrooting_idx,I,J,K]
-                maxcanopy_idx = pd + self.var.MaxCanopyCD
-                self.var.MaxCanopy = GDDcum[maxcanopy_idx,I,J,K]
-                canopydevend_idx = pd + self.var.CanopyDevEndCD
-                self.var.CanopyDevEnd = GDDcum[canopydevend_idx,I,J,K]
-                senescence_idx = pd + self.var.SenescenceCD
-                self.var.Senescence = GDDcum[senescence_idx,I,J,K]
-                maturity_idx = pd + self.var.MaturityCD
-                self.var.Maturity = GDDcum[maturity_idx,I,J,K]
-                histart_idx = pd + self.var.HIstartCD
-                self.var.HIstart = GDDcum[histart_idx,I,J,K]
-                hiend_idx = pd + self.var.HIendCD
-                self.var.HIend = GDDcum[hiend_idx,I,J,K]
-                yldform_idx = pd + self.var.YldFormCD
-                self.var.YldForm = GDDcum[yldform_idx,I,J,K]
-
-                cond2 = (self.var.CropType == 3)
-                floweringend_idx = pd + self.var.FloweringEndCD
-                self.var.FloweringEnd[cond2] = GDDcum[floweringend_idx,I,J,K][cond2]
-                self.var.Flowering[cond2] = (self.var.FloweringEnd - self.var.HIstart)[cond2]
+            if self.var.CalendarType == 1 & self.var.SwitchGDD:
 
                 # "Convert CGC to GDD mode"
                 # self.var.CGC_CD = self.var.CGC
@@ -438,58 +504,66 @@ class AQCropParameters(CropParameters):
                 # "Set calendar type to GDD mode"
                 self.var._configuration.cropOptions['CalendarType'] = "2"
             
-            # elif Mode == 2:
             elif self.var.CalendarType == 2:
-
-                # "Find calendar days [equivalent] for some variables"
-
-                # "1 Calendar days from sowing to maximum canopy cover"
-
-                # # TODO: check this indexing
-                # day_idx = np.arange(0, GDD.shape[0])[:,None,None,None] * np.ones((self.var.nCrop, self.var.nLon, self.var.nLat))[None,:,:,:]
-                # pd,hd = self.var.adjust_planting_and_harvesting_date(self.var.modelTime.startTime)
-
-                maxcanopy_idx = np.copy(day_idx)
-                maxcanopy_idx[np.logical_not(GDDcum > self.var.MaxCanopy)] = 999
-                # maxcanopy_idx[np.logical_not(GDDcum > self.var.MaxCanopy)] = np.nan
-                maxcanopy_idx = np.nanmin(maxcanopy_idx, axis=0)
-                self.var.MaxCanopyCD = maxcanopy_idx - pd + 1
-
-                # "2 Calendar days from sowing to end of vegetative growth"
-                canopydevend_idx = np.copy(day_idx)
-                canopydevend_idx[np.logical_not(GDDcum > self.var.CanopyDevEnd)] = 999
-                # canopydevend_idx[np.logical_not(GDDcum > self.var.CanopyDevEnd)] = np.nan
-                canopydevend_idx = np.nanmin(canopydevend_idx, axis=0)
-                self.var.CanopyDevEndCD = canopydevend_idx - pd + 1
-
-                # "3 Calendar days from sowing to start of yield formation"
-                histart_idx = np.copy(day_idx)
-                histart_idx[np.logical_not(GDDcum > self.var.HIstart)] = 999
-                # histart_idx[np.logical_not(GDDcum > self.var.HIstart)] = np.nan
-                histart_idx = np.nanmin(histart_idx, axis=0)
-                self.var.HIstartCD = histart_idx - pd + 1
-
-                # "4 Calendar days from sowing to end of yield formation"
-                hiend_idx = np.copy(day_idx)
-                hiend_idx[np.logical_not(GDDcum > self.var.HIend)] = 999
-                # hiend_idx[np.logical_not(GDDcum > self.var.HIend)] = np.nan
-                hiend_idx = np.nanmin(hiend_idx, axis=0)
-                self.var.HIendCD = hiend_idx - pd + 1
-
+                
                 # "Duration of yield formation in calendar days"
                 self.var.YldFormCD = self.var.HIendCD - self.var.HIstartCD
 
+                # "2 Duration of flowering in calendar days"
                 cond1 = (self.var.CropType == 3)
+                self.var.FloweringCD[cond1] = (FloweringEnd - self.var.HIstartCD)[cond1]
 
-                # "1 Calendar days from sowing to end of flowering"
-                floweringend_idx = np.copy(day_idx)
-                floweringend_idx[np.logical_not(GDDcum > self.var.FloweringEnd)] = 999
-                # floweringend_idx[np.logical_not(GDDcum > self.var.FloweringEnd)] = np.nan
-                floweringend_idx = np.nanmin(floweringend_idx, axis=0)
-                FloweringEnd = floweringend_idx - pd + 1
+    def compute_cumulative_GDD(self, tmin, tmax, day_idx, pd, hd, rows):
+        """Function to compute cumulative growing degree days during 
+        the growing season for latitude rows 'rows', with dimension 
+        (day,crop,lat,lon)
 
-                # "2 Duration of flowering in calendar days"
-                self.var.FloweringCD[cond1] = (FloweringEnd - self.var.HIstartCD)[cond1]
+        Args:
+          tmin, tmax : daily temperature with dimension (day,lat,lon)
+          day_idx    : day of year with dimension (day,crop,lat,lon), 
+                       for latitude rows 'rows' only
+          pd, hd     : adjusted planting and harvest day
+          rows       : slice along the latitude dimension
+
+        """
+        growing_season_idx = ((day_idx >= pd[:,rows,:]) & (day_idx <= hd[:,rows,:]))
+        Tbase = self.var.Tbase[:,rows,:]
+        Tupp = self.var.Tupp[:,rows,:]
+
+        # broadcast to crop dimension
+        tmax = tmax[:,None,rows,:] * np.ones((self.var.nCrop))[None,:,None,None]
+        tmin = tmin[:,None,rows,:] * np.ones((self.var.nCrop))[None,:,None,None]
+
+        # for convenience
+        tbase = Tbase[None,:,:,:] * np.ones((tmin.shape[0]))[:,None,None,None]
+
+        # calculate GDD according to the various methods
+        if self.var.GDDmethod == 1:
+            tmean = ((tmax + tmin) / 2)
+            tmean = np.clip(tmean, Tbase, Tupp)
+        elif self.var.GDDmethod == 2:
+            tmax = np.clip(tmax, Tbase, Tupp)
+            tmin = np.clip(tmin, Tbase, Tupp)
+            tmean = ((tmax + tmin) / 2)
+        elif self.var.GDDmethod == 3:
+            tmax = np.clip(tmax, Tbase, Tupp)
+            tmin = np.clip(tmin, None, Tupp)
+            tmean = ((tmax + tmin) / 2)
+            tmean = np.clip(tmean, Tbase, None)
+
+        tmean[np.logical_not(growing_season_idx)] = 0
+        tbase[np.logical_not(growing_season_idx)] = 0
+        GDD = (tmean - tbase)
+        return np.cumsum(GDD, axis=0)
+
+    def calendar_days_to_GDD(self, GDDcum, day_idx, pd, GDD):
+        """Function to find the number of calendar days from sowing 
+        until cumulative GDD first exceeds GDD
+        """
+        idx = np.copy(day_idx)
+        idx[np.logical_not(GDDcum > GDD)] = 999
+        idx = np.nanmin(idx, axis=0)
+        return idx - pd + 1
                 
     def update_crop_parameters(self):
         """Function to update certain crop parameters for current 
@@ -499,7 +573,7 @@ class AQCropParameters(CropParameters):
         pd = np.copy(self.var.PlantingDateAdj)
         hd = np.copy(self.var.HarvestDateAdj)
         hd[hd < pd] += 365
-        sd = self.var._modelTime.currTime.timetuple().tm_yday
+        sd = self.var._modelTime.doy
 
         # Update certain crop parameters if using GDD mode
         if (self.var.CalendarType == 2):
@@ -511,9 +585,7 @@ class AQCropParameters(CropParameters):
 
             if (max_harvest_date > 0):
 
-                # Dimension (day,crop,lat,lon)
-                day_idx = np.arange(sd, max_harvest_date + 1)[:,None,None,None] * np.ones_like(self.var.PlantingDate)[None,:,:,:]
-                growing_season_idx = ((day_idx >= pd) & (day_idx <= hd))
+                FloweringEnd = np.zeros_like(self.var.PlantingDate)
 
                 # Extract weather data for first growing season
                 tmin = vos.netcdf2NumPyTimeSlice(self.var.tmpFileNC, self.var.tmnVarName,
@@ -528,77 +600,39 @@ class AQCropParameters(CropParameters):
                                                  cloneMapFileName = self.var.cloneMap,
                                                  LatitudeLongitude = True)
 
-                # broadcast to crop dimension
-                tmax = tmax[:,None,:,:] * np.ones((self.var.nCrop))[None,:,None,None]
-                tmin = tmin[:,None,:,:] * np.ones((self.var.nCrop))[None,:,None,None]
-
-                # for convenience
-                tupp = self.var.Tupp[None,:,:,:] * np.ones((tmin.shape[0]))[:,None,None,None]
-                tbase = self.var.Tbase[None,:,:,:] * np.ones((tmin.shape[0]))[:,None,None,None]
-
-                # calculate GDD according to the various methods
-                if self.var.GDDmethod == 1:
-                    tmean = ((tmax + tmin) / 2)
-                    tmean = np.clip(tmean, self.var.Tbase, self.var.Tupp)
-                elif self.var.GDDmethod == 2:
-                    tmax = np.clip(tmax, self.var.Tbase, self.var.Tupp)
-                    tmin = np.clip(tmin, self.var.Tbase, self.var.Tupp)
-                    tmean = ((tmax + tmin) / 2)
-                elif self.var.GDDmethod == 3:
-                    tmax = np.clip(tmax, self.var.Tbase, self.var.Tupp)
-                    tmin = np.clip(tmin, None, self.var.Tupp)
-                    tmean = ((tmax + tmin) / 2)
-                    tmean = np.clip(tmean, self.var.Tbase, None)
-
-                tmean[np.logical_not(growing_season_idx)] = 0
-                tbase[np.logical_not(growing_season_idx)] = 0
-                GDD = (tmean - tbase)
-                GDDcum = np.cumsum(GDD, axis=0)
-        
-                # 1 - Calendar days from sowing to maximum canopy cover
-                maxcanopy_idx = np.copy(day_idx)
-                maxcanopy_idx[np.logical_not(GDDcum > self.var.MaxCanopy)] = 999
-                # maxcanopy_idx[np.logical_not(GDDcum > self.var.MaxCanopy)] = np.nan
-                maxcanopy_idx = np.nanmin(maxcanopy_idx, axis=0)
-                MaxCanopyCD = (maxcanopy_idx - pd + 1)
-                self.var.MaxCanopyCD[cond1] = MaxCanopyCD[cond1]
-
-                # 2 - Calendar days from sowing to end of vegetative growth
-                canopydevend_idx = np.copy(day_idx)
-                canopydevend_idx[np.logical_not(GDDcum > self.var.CanopyDevEnd)] = 999
-                # canopydevend_idx[np.logical_not(GDDcum > self.var.CanopyDevEnd)] = np.nan
-                canopydevend_idx = np.nanmin(canopydevend_idx, axis=0)
-                CanopyDevEndCD = canopydevend_idx - pd + 1
-                self.var.CanopyDevEndCD[cond1] = CanopyDevEndCD[cond1]
-
-                # 3 - Calendar days from sowing to start of yield formation
-                histart_idx = np.copy(day_idx)
-                histart_idx[np.logical_not(GDDcum > self.var.HIstart)] = 999
-                # histart_idx[np.logical_not(GDDcum > self.var.HIstart)] = np.nan
-                histart_idx = np.nanmin(histart_idx, axis=0)
-                HIstartCD = histart_idx - pd + 1
-                self.var.HIstartCD[cond1] = HIstartCD[cond1]
-
-                # 4 - Calendar days from sowing to end of yield formation
-                hiend_idx = np.copy(day_idx)
-                hiend_idx[np.logical_not(GDDcum > self.var.HIend)] = 999
-                # hiend_idx[np.logical_not(GDDcum > self.var.HIend)] = np.nan
-                hiend_idx = np.nanmin(hiend_idx, axis=0)
-                HIendCD = hiend_idx - pd + 1
-                self.var.HIendCD[cond1] = HIendCD[cond1]
+                # Arrays with dimension (day,crop,lat,lon) are computed in
+                # latitude bands so that they fit in the memory budget
+                for rows in self.var.memory_planner_module.latitude_bands(max_harvest_date - sd + 1):
+
+                    day_idx = np.arange(sd, max_harvest_date + 1)[:,None,None,None] * np.ones_like(self.var.PlantingDate[:,rows,:])[None,:,:,:]
+                    GDDcum = self.compute_cumulative_GDD(tmin, tmax, day_idx, pd, hd, rows)
+                    pd_rows = pd[:,rows,:]
+                    cond1_rows = cond1[:,rows,:]
+
+                    # 1 - Calendar days from sowing to maximum canopy cover
+                    MaxCanopyCD = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.MaxCanopy[:,rows,:])
+                    self.var.MaxCanopyCD[:,rows,:][cond1_rows] = MaxCanopyCD[cond1_rows]
+
+                    # 2 - Calendar days from sowing to end of vegetative growth
+                    CanopyDevEndCD = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.CanopyDevEnd[:,rows,:])
+                    self.var.CanopyDevEndCD[:,rows,:][cond1_rows] = CanopyDevEndCD[cond1_rows]
+
+                    # 3 - Calendar days from sowing to start of yield formation
+                    HIstartCD = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.HIstart[:,rows,:])
+                    self.var.HIstartCD[:,rows,:][cond1_rows] = HIstartCD[cond1_rows]
+
+                    # 4 - Calendar days from sowing to end of yield formation
+                    HIendCD = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.HIend[:,rows,:])
+                    self.var.HIendCD[:,rows,:][cond1_rows] = HIendCD[cond1_rows]
+
+                    # 1 Calendar days from sowing to end of flowering
+                    FloweringEnd[:,rows,:] = self.calendar_days_to_GDD(GDDcum, day_idx, pd_rows, self.var.FloweringEnd[:,rows,:])
 
                 # Duration of yield formation in calendar days
                 self.var.YldFormCD[cond1] = (self.var.HIendCD - self.var.HIstartCD)[cond1]
 
                 cond11 = (cond1 & (self.var.CropType == 3))
 
-                # 1 Calendar days from sowing to end of flowering
-                floweringend_idx = np.copy(day_idx)
-                floweringend_idx[np.logical_not(GDDcum > self.var.FloweringEnd)] = 999
-                # floweringend_idx[np.logical_not(GDDcum > self.var.FloweringEnd)] = np.nan
-                floweringend_idx = np.nanmin(floweringend_idx, axis=0)
-                FloweringEnd = floweringend_idx - pd + 1
-
                 # 2 Duration of flowering in calendar days
                 self.var.FloweringCD[cond11] = (FloweringEnd - self.var.HIstartCD)[cond11]
 
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+from multiprocessing.sharedctypes import RawValue
+
+import numpy as np
+
+from SharedInput import shared_array, fork_context
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Barrier(object):
+    """Class to make a fixed number of processes wait for each other"""
+
+    def __init__(self, n):
+        self.n = n
+        self.count = RawValue('i', 0)
+        self.generation = RawValue('i', 0)
+        self.condition = fork_context().Condition()
+
+    def wait(self):
+        with self.condition:
+            generation = self.generation.value
+            self.count.value += 1
+            if self.count.value == self.n:
+                self.count.value = 0
+                self.generation.value += 1
+                self.condition.notify_all()
+            else:
+                while generation == self.generation.value:
+                    self.condition.wait()
+
+class CropSync(object):
+    """Class to synchronize the processes which simulate subsets of the
+    crops. Crops only interact through the initial condition of a new
+    growing season, which is the average water content of the crops
+    which are not being grown. On the days on which any crop is planted,
+    each process writes the water content of its crops to shared memory
+    and, once all processes have done so, computes the average over all
+    crops. Planting days follow from the growing season tables, so the
+    processes agree on these days without communication during the run.
+    """
+
+    def __init__(self, nWorkers, nCrop, nComp, nLat, nLon):
+        self.th = shared_array((nCrop, nComp, nLat, nLon), np.float64)
+        self.plantingDays = shared_array((2, 367), bool)
+        self.barrier = Barrier(nWorkers)
+        self.crops = None
+
+    def initial(self, var):
+        """Function to collect the days of the year on which crops are
+        planted, for common (0) and leap (1) years. Planting dates from
+        1 March are moved to the next day in leap years, so that a
+        planting date of 366 falls outside the year.
+        """
+        table = var.crop_parameters_module.season_table
+        for leap in [False, True]:
+            days = np.unique(table[leap]['PlantingDay'])
+            self.plantingDays[int(leap), days[(days > 0) & (days <= 366)]] = True
+        self.barrier.wait()
+
+    def dynamic(self, var):
+        """Function to compute the initial condition of growing seasons
+        starting on the current day (as in InitialCondition.dynamic)
+        """
+        if not self.plantingDays[int(var._modelTime.isLeapYear), var._modelTime.doy]:
+            return
+
+        cond1 = np.logical_not(var.GrowingSeasonIndex) | var.GrowingSeasonDayOne
+        if var.cropActiveSet:
+            cond1 = cond1 & var.CropPresence
+        cond1 = np.broadcast_to(cond1[:,None,:,:], var.th.shape)
+        th = np.copy(var.th)
+        th[np.logical_not(cond1)] = np.nan
+        self.th[self.crops] = th
+        self.barrier.wait()
+
+        # NB the average is computed with the precision of the water content
+        # so that the result is the same as in a single process
+        th_ave = np.nanmean(self.th.astype(var.th.dtype, copy=False), axis=0)
+        self.barrier.wait()
+
+        th_ave = th_ave[None,:,:,:] * np.ones((var.nCrop))[:,None,None,None]
+        cond2 = np.broadcast_to(var.GrowingSeasonDayOne[:,None,:,:], var.th.shape)
+        var.th[cond2] = th_ave[cond2]
+        var.thChanged |= var.GrowingSeasonDayOne
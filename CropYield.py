@@ -6,6 +6,8 @@
 import numpy as np
 import VirtualOS as vos
 
+from GrowthStage import MATURITY_REACHED
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -29,7 +31,7 @@ class AQCropYield(CropYield):
             
         cond1 = self.var.GrowingSeasonIndex
         self.var.Y[cond1] = ((self.var.B / 100) * self.var.HIadj)[cond1]
-        cond11 = (cond1 & (((self.var.CalendarType == 1) & ((self.var.DAP - self.var.DelayedCDs) >= self.var.Maturity)) | ((self.var.CalendarType == 2) & ((self.var.GDDcum - self.var.DelayedGDDs) >= self.var.Maturity))))
+        cond11 = (cond1 & ((self.var.PhenoEvents & MATURITY_REACHED) != 0))
         self.var.CropMature[cond11] = True
         self.var.Y[np.logical_not(self.var.GrowingSeasonIndex)] = 0
 
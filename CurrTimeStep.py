@@ -8,6 +8,7 @@
 
 import time
 import datetime
+import numpy as np
 
 import logging
 logger = logging.getLogger(__name__)
@@ -30,6 +31,28 @@ class ModelTime(object):
         if showNumberOfTimeSteps == True: logger.info("number of time steps: "+str(self._nrOfTimeSteps))
         self._monthIdx = 0 # monthly indexes since the simulation starts
         self._annuaIdx = 0 #  yearly indexes since the simulation starts
+        self.computeCalendar()
+
+    def computeCalendar(self):
+        """Function to compute the calendar of the run, i.e. the date
+        attributes of every time step, so that they can be looked up
+        rather than derived from the current date on each access. The
+        arrays are indexed by time step (starting at 0) and can also be
+        used by modules which precompute inputs for blocks of time steps.
+        """
+        dates = np.arange(np.datetime64(self._startTime, 'D'), np.datetime64(self._endTime, 'D') + 1)
+        tomorrow = dates + 1
+        self._calendarYear = dates.astype('datetime64[Y]').astype(int) + 1970
+        self._calendarMonth = dates.astype('datetime64[M]').astype(int) % 12 + 1
+        self._calendarDay = (dates - dates.astype('datetime64[M]')).astype(int) + 1
+        self._calendarDoy = (dates - dates.astype('datetime64[Y]')).astype(int) + 1
+        self._calendarIsLeapYear = ((self._calendarYear % 4 == 0) & ((self._calendarYear % 100 != 0) | (self._calendarYear % 400 == 0)))
+        self._calendarEndMonth = (tomorrow == tomorrow.astype('datetime64[M]'))
+        self._calendarEndYear = (tomorrow == tomorrow.astype('datetime64[Y]'))
+
+        # Time values of netCDF output files (days since 1901-01-01, standard
+        # calendar)
+        self._calendarNcTime = (dates - np.datetime64('1901-01-01', 'D')).astype(float)
 
     #FIXME: use __init__
     # def getStartEndTimeStepsForSpinUp(self,strStartTime,noSpinUp,maxSpinUps):
@@ -48,10 +71,12 @@ class ModelTime(object):
     def setStartTime(self, date):
         self._startTime = date
         self._nrOfTimeSteps = 1 + (self.endTime - self.startTime).days
+        self.computeCalendar()
 
     def setEndTime(self, date):
         self._endTime = date
         self._nrOfTimeSteps = 1 + (self.endTime - self.startTime).days
+        self.computeCalendar()
 
     # @property
     # def spinUpStatus(self):
@@ -71,23 +96,27 @@ class ModelTime(object):
 
     @property    
     def day(self):
-        return self._currTime.day
+        return int(self._calendarDay[self._timeStepIdx])
 
     @property    
     def doy(self):
-        return self._currTime.timetuple().tm_yday
+        return int(self._calendarDoy[self._timeStepIdx])
 
     @property
     def startTimeDOY(self):
-        return self._startTime.timetuple().tm_yday
+        return int(self._calendarDoy[0])
     
     @property    
     def month(self):
-        return self._currTime.month
+        return int(self._calendarMonth[self._timeStepIdx])
     
     @property    
     def year(self):
-        return self._currTime.year
+        return int(self._calendarYear[self._timeStepIdx])
+
+    @property
+    def ncTime(self):
+        return self._calendarNcTime[self._timeStepIdx]
 
     @property    
     def timeStepPCR(self):
@@ -111,10 +140,44 @@ class ModelTime(object):
     
     @property
     def isLeapYear(self):
-        return self.year % 4 == 0 and (self.year % 100 != 0 or self.year % 400 == 0)
+        return bool(self._calendarIsLeapYear[self._timeStepIdx])
+
+    # Calendar of the run (one value per time step)
+    @property
+    def calendarYear(self):
+        return self._calendarYear
+
+    @property
+    def calendarMonth(self):
+        return self._calendarMonth
+
+    @property
+    def calendarDay(self):
+        return self._calendarDay
+
+    @property
+    def calendarDoy(self):
+        return self._calendarDoy
+
+    @property
+    def calendarIsLeapYear(self):
+        return self._calendarIsLeapYear
+
+    @property
+    def calendarEndMonth(self):
+        return self._calendarEndMonth
+
+    @property
+    def calendarEndYear(self):
+        return self._calendarEndYear
+
+    @property
+    def calendarNcTime(self):
+        return self._calendarNcTime
     
     def update(self,timeStepPCR):
         self._timeStepPCR = timeStepPCR
+        self._timeStepIdx = timeStepPCR - 1
         self._currTime = self._startTime + datetime.timedelta(days=1 * (timeStepPCR - 1))
         
         #~ self._fulldate = str(self.currTime.strftime('%Y-%m-%d'))     # This does not work for the date before 1900
@@ -145,16 +208,10 @@ class ModelTime(object):
         return self.doy== 1
     
     def isLastDayOfMonth(self):
-        tomorrow = self.currTime + datetime.timedelta(days=1)
-        
-        #tomorrow is the first day of the month
-        return tomorrow.day == 1
+        return bool(self._calendarEndMonth[self._timeStepIdx])
     
     def isLastDayOfYear(self):
-        tomorrow = self.currTime + datetime.timedelta(days=1)
-        
-        #tomorrow is the first day of the year
-        return tomorrow.timetuple().tm_yday == 1
+        return bool(self._calendarEndYear[self._timeStepIdx])
 
     def isLastTimeStep(self):
         return self._currTime == self._endTime
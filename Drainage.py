@@ -3,11 +3,205 @@
 
 # AquaCrop crop growth model
 
+import math
 import numpy as np
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
 import logging
 logger = logging.getLogger(__name__)
 
+def drainage_rate(th, th_s, th_fc, th_fc_adj, tau, exp_sat):
+    """Drainage ability of a single compartment (scalar version of 
+    Drainage.compute_dthdt). exp_sat is exp(th_s - th_fc).
+    """
+    if th <= th_fc_adj:
+        return 0.
+    if th >= th_s:
+        dthdt = tau * (th_s - th_fc)
+    else:
+        dthdt = tau * (th_s - th_fc) * ((math.exp(th - th_fc) - 1) / (exp_sat - 1))
+    if (th - dthdt) < th_fc_adj:
+        dthdt = th - th_fc_adj
+    return dthdt
+
+def drainage_kernel(th, th_s, th_fc, th_fc_adj, tau, ksat, exp_sat, dz, dzsum, FluxOut, DeepPerc):
+    """Redistribute stored soil water one soil column at a time. 
+    Equivalent to the array version in Drainage.dynamic, but each 
+    column only evaluates the branches which apply to it. th, FluxOut 
+    and DeepPerc are updated in place. exp_sat is exp(th_s - th_fc), 
+    computed with numpy so that the column kernel and the array version 
+    agree as closely as possible.
+    """
+    nCrop, nComp, nLat, nLon = th.shape
+    for n in prange(nCrop * nLat * nLon):
+        i = n // (nLat * nLon)
+        j = (n // nLon) % nLat
+        k = n % nLon
+        drainsum = 0.
+        for comp in range(nComp):
+            ths = th_s[i,comp,j,k]
+            thfc = th_fc[i,comp,j,k]
+            thfcadj = th_fc_adj[i,comp,j,k]
+            tauc = tau[i,comp,j,k]
+            ksatc = ksat[i,comp,j,k]
+            expc = exp_sat[i,comp,j,k]
+            thold = th[i,comp,j,k]
+
+            # Drainage ability of compartment
+            dthdt = drainage_rate(thold, ths, thfc, thfcadj, tauc, expc)
+            excess = 0.
+            prethick = dzsum[comp] - dz[comp]
+            drainmax = dthdt * 1000 * prethick
+            if drainsum <= drainmax:
+
+                # Drain compartment
+                th[i,comp,j,k] = thold - dthdt
+                drainsum += dthdt * dz[comp] * 1000
+                if drainsum > ksatc:
+                    excess += drainsum - ksatc
+                    drainsum = ksatc
+            else:
+
+                # Value of theta (thX) needed to provide a drainage ability
+                # equal to cumulative drainage
+                dthdt = 0.
+                if prethick != 0:
+                    dthdt = drainsum / (1000 * prethick)
+                if dthdt <= 0:
+                    thX = thfcadj
+                elif tauc > 0:
+                    A = 1 + ((dthdt * (expc - 1)) / (tauc * (ths - thfc)))
+                    thX = max(thfcadj + math.log(A), thfcadj)
+                else:
+                    thX = ths + 0.01
+
+                if thX <= ths:
+
+                    # Increase compartment water content with cumulative drainage
+                    thnew = thold + (drainsum / (1000 * dz[comp]))
+                    if thnew > thX:
+                        drainsum = (thnew - thX) * 1000 * dz[comp]
+                        dthdt = drainage_rate(thX, ths, thfc, thfcadj, tauc, expc)
+                        drainsum += dthdt * 1000 * dz[comp]
+                        if drainsum > ksatc:
+                            excess += drainsum - ksatc
+                            drainsum = ksatc
+                        thnew = thX - dthdt
+                    elif thnew > thfcadj:
+                        dthdt = drainage_rate(thnew, ths, thfc, thfcadj, tauc, expc)
+                        thnew = thnew - dthdt
+                        drainsum = dthdt * 1000 * dz[comp]
+                        if drainsum > ksatc:
+                            excess += drainsum - ksatc
+                            drainsum = ksatc
+                    else:
+                        drainsum = 0.
+                    th[i,comp,j,k] = thnew
+
+                elif thX > ths:
+
+                    # Increase water content with cumulative drainage from above
+                    thnew = thold + (drainsum / (1000 * dz[comp]))
+                    if thnew <= ths:
+                        if thnew > thfcadj:
+                            dthdt = drainage_rate(thnew, ths, thfc, thfcadj, tauc, expc)
+                            thnew -= dthdt
+                            drainsum = dthdt * 1000 * dz[comp]
+                            if drainsum > ksatc:
+                                excess += drainsum - ksatc
+                                drainsum = ksatc
+                        else:
+                            drainsum = 0.
+                    elif thnew > ths:
+
+                        # Excess drainage above saturation
+                        excess = (thnew - ths) * 1000 * dz[comp]
+                        dthdt = drainage_rate(thnew, ths, thfc, thfcadj, tauc, expc)
+                        thnew = ths - dthdt
+                        draincomp = dthdt * 1000 * dz[comp]
+                        drainmax = min(dthdt * 1000 * prethick, excess)
+                        excess -= drainmax
+                        drainsum = draincomp + drainmax
+                        if drainsum > ksatc:
+                            excess += drainsum - ksatc
+                            drainsum = ksatc
+                    th[i,comp,j,k] = thnew
+
+            # Store output flux from compartment
+            FluxOut[i,comp,j,k] = drainsum
+
+            # Redistribute excess in compartments above
+            precomp = comp + 1
+            while (excess > 0) and (precomp != 0):
+                precomp -= 1
+                if precomp < comp:
+                    FluxOut[i,precomp,j,k] -= excess
+                th[i,precomp,j,k] += excess / (1000 * dz[precomp])
+                if th[i,precomp,j,k] > th_s[i,precomp,j,k]:
+                    excess = (th[i,precomp,j,k] - th_s[i,precomp,j,k]) * 1000 * dz[precomp]
+                    th[i,precomp,j,k] = th_s[i,precomp,j,k]
+                else:
+                    excess = 0.
+
+        DeepPerc[i,j,k] = drainsum
+
+def redistribute_excess(excess, comp, th, th_s, dz, FluxOut):
+    """Store excess water (mm) leaving compartment comp in compartment
+    comp and the compartments above it. Compartments are filled to 
+    saturation from the bottom up until all excess is stored; this is 
+    done for the whole profile at once using the pore space cumulated 
+    upwards from compartment comp. th and the outflow from compartments 
+    above comp (FluxOut) are updated in place. Arrays have dimension 
+    (crop,comp,lat,lon), or (cell,comp) for a subset of cells.
+
+    Returns:
+      excess water which cannot be stored in the profile (mm)
+    """
+    th = th[:,:comp+1,...]
+    th_s = th_s[:,:comp+1,...]
+    dz = dz[:comp+1].reshape((1, comp + 1) + (1,) * (th.ndim - 2))
+    
+    # Available pore space in each compartment (mm) - this is negative if
+    # the compartment is above saturation - and pore space in compartment
+    # ii and all compartments between ii and comp
+    space = (th_s - th) * 1000 * dz
+    cumspace = np.cumsum(space[:,::-1,...], axis=1)[:,::-1,...]
+
+    # Excess entering each compartment from below, and whether excess is
+    # left after filling the compartment to saturation
+    inflow = excess[:,None,...] - (cumspace - space)
+    passed = (excess[:,None,...] - cumspace) > 0
+
+    # Compartments reached by excess water: all compartments between the
+    # compartment and comp must have passed excess water upwards
+    reached = np.ones_like(passed)
+    reached[:,:-1,...] = np.logical_and.accumulate(passed[:,:0:-1,...], axis=1)[:,::-1,...]
+    reached &= (excess > 0)[:,None,...]
+    filled = reached & passed
+    stored = reached & np.logical_not(passed)
+
+    # Update outflow from compartments above comp
+    FluxOut[:,:comp,...][reached[:,:-1,...]] -= inflow[:,:-1,...][reached[:,:-1,...]]
+
+    # Update water content
+    th[stored] += (inflow / (1000 * dz))[stored]
+    th[filled] = th_s[filled]
+    
+    # Excess left after the top compartment is filled to saturation
+    excess = np.zeros_like(excess)
+    excess[filled[:,0,...]] = (inflow[:,0,...] - space[:,0,...])[filled[:,0,...]]
+    return excess
+
+if HAS_NUMBA:
+    drainage_rate = njit(cache=True)(drainage_rate)
+    drainage_kernel = njit(parallel=True, cache=True)(drainage_kernel)
+
 class Drainage(object):
     """Class to infiltrate incoming water"""
     
@@ -18,27 +212,50 @@ class Drainage(object):
         self.var.FluxOut = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
         self.var.DeepPerc = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
 
-    def compute_dthdt(self, th, th_s, th_fc, th_fc_adj, tau):
+        # Use the compiled kernel if numba is available
+        self.use_numba = HAS_NUMBA and (self.var._configuration.globalOptions['UseNumba'] == "1")
+
+        # Term of the drainage ability which only depends on soil properties
+        self.exp_sat = np.exp(self.var.th_s_comp - self.var.th_fc_comp)
+
+    def compute_dthdt(self, th, th_s, th_fc, th_fc_adj, tau, exp_sat):
         dthdt = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         cond1 = th <= th_fc_adj
         dthdt[cond1] = 0
         cond2 = np.logical_not(cond1) & (th >= th_s)
         dthdt[cond2] = (tau * (th_s - th_fc))[cond2]
         cond3 = np.logical_not(cond1 | cond2)
-        dthdt[cond3] = (tau * (th_s - th_fc) * ((np.exp(th - th_fc) - 1) / (np.exp(th_s - th_fc) - 1)))[cond3]
+        dthdt[cond3] = (tau * (th_s - th_fc) * ((np.exp(th - th_fc) - 1) / (exp_sat - 1)))[cond3]
         cond4 = ((cond2 | cond3) & ((th - dthdt) < th_fc_adj))
         dthdt[cond4] = (th - th_fc_adj)[cond4]
         return dthdt
         
     def dynamic(self):
         """Function to redistribute stored soil water"""
+        # Drainage may change the water content of any cell
+        self.var.thChanged[:] = True
+
+        if self.use_numba:
+            self.var.DeepPerc = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
+            drainage_kernel(
+                self.var.th, self.var.th_s_comp, self.var.th_fc_comp,
+                self.var.th_fc_adj, self.var.tau_comp, self.var.ksat_comp,
+                self.exp_sat, self.var.dz, self.var.dzsum, self.var.FluxOut, self.var.DeepPerc)
+            return
+        
+        # Water contents are updated in place: compartment ii only reads its
+        # own value from the start of the time step (kept in thold), and
+        # redistribution of excess only writes to compartments above ii
         # dims = self.var.th.shape
-        thnew = np.copy(self.var.th)
+        thnew = self.var.th
         drainsum = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         for comp in range(self.var.nComp):
 
+            # Water content of compartment ii at the start of the time step
+            thold = np.copy(thnew[:,comp,...])
+
             # Calculate drainage ability of compartment ii
-            dthdt = self.compute_dthdt(self.var.th[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...])
+            dthdt = self.compute_dthdt(thold, self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...], self.exp_sat[:,comp,...])
 
             # Drainage from compartment ii (mm) (Line 41 in AOS_Drainage.m)
             draincomp = dthdt * self.var.dz[comp] * 1000
@@ -52,7 +269,7 @@ class Drainage(object):
 
             # Drain compartment
             cond5 = drainability
-            thnew[:,comp,...][cond5] = (self.var.th[:,comp,...] - dthdt)[cond5]
+            thnew[:,comp,...][cond5] = (thold - dthdt)[cond5]
 
             # Update cumulative drainage (mm), restrict to saturated hydraulic
             # conductivity and adjust excess drainage flow
@@ -69,7 +286,7 @@ class Drainage(object):
             cond61 = (cond6 & (dthdt <= 0))
             thX[cond61] = self.var.th_fc_adj[:,comp,...][cond61]
             cond62 = (cond6 & np.logical_not(cond61) & (self.var.tau_comp[:,comp,...] > 0))
-            A = (1 + ((dthdt * (np.exp(self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...]) - 1)) / (self.var.tau_comp[:,comp,...] * (self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...]))))
+            A = (1 + ((dthdt * (self.exp_sat[:,comp,...] - 1)) / (self.var.tau_comp[:,comp,...] * (self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...]))))
             thX[cond62] = (self.var.th_fc_adj[:,comp,...] + np.log(A))[cond62]
             thX[cond62] = np.clip(thX, self.var.th_fc_adj[:,comp,...], None)[cond62]
             cond63 = (cond6 & np.logical_not(cond61 | cond62))
@@ -79,7 +296,7 @@ class Drainage(object):
 
             # Increase compartment ii water content with cumulative drainage
             cond64 = (cond6 & (thX <= self.var.th_s_comp[:,comp,...]))
-            thnew[:,comp,...][cond64] = (self.var.th[:,comp,...] + (drainsum / (1000 * self.var.dz[comp])))[cond64]
+            thnew[:,comp,...][cond64] = (thold + (drainsum / (1000 * self.var.dz[comp])))[cond64]
 
             # Cumulative drainage is the drainage difference between theta_x and
             # new theta plus drainage ability at theta_x
@@ -87,7 +304,7 @@ class Drainage(object):
             drainsum[cond641] = ((thnew[:,comp,...] - thX) * 1000 * self.var.dz[comp])[cond641]
 
             # Calculate drainage ability for thX
-            dthdt = self.compute_dthdt(thX, self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...])
+            dthdt = self.compute_dthdt(thX, self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...], self.exp_sat[:,comp,...])
 
             # Update cumulative drainage (mm), restrict to saturated hydraulic
             # conductivity and adjust excess drainage flow
@@ -101,7 +318,7 @@ class Drainage(object):
 
             # Calculate drainage ability for updated water content
             cond642 = (cond64 & np.logical_not(cond641) & (thnew[:,comp,...] > self.var.th_fc_adj[:,comp,...]))
-            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...])
+            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...], self.exp_sat[:,comp,...])
 
             # Update water content
             thnew[:,comp,...][cond642] = (thnew[:,comp,...] - dthdt)[cond642]
@@ -120,7 +337,7 @@ class Drainage(object):
             # Increase water content in compartment ii with cumulative
             # drainage from above
             cond65 = (cond6 & np.logical_not(cond64) & (thX > self.var.th_s_comp[:,comp,...]))
-            thnew[:,comp,...][cond65] = (self.var.th[:,comp,...] + (drainsum / (1000 * self.var.dz[comp])))[cond65]
+            thnew[:,comp,...][cond65] = (thold + (drainsum / (1000 * self.var.dz[comp])))[cond65]
 
             # Check new water content against hydraulic properties of soil layer
             # Lines 166-198
@@ -128,7 +345,7 @@ class Drainage(object):
 
             # Calculate new drainage ability
             cond6511 = (cond651 & (thnew[:,comp,...] > self.var.th_fc_adj[:,comp,...]))
-            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...])
+            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...], self.exp_sat[:,comp,...])
 
             # Update water content
             thnew[:,comp,...][cond6511] -= (dthdt)[cond6511]
@@ -148,7 +365,7 @@ class Drainage(object):
             excess[cond652] = ((thnew[:,comp,...] - self.var.th_s_comp[:,comp,...]) * 1000 * self.var.dz[comp])[cond652]
 
             # Calculate drainage ability for updated water content
-            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...])
+            dthdt = self.compute_dthdt(thnew[:,comp,...], self.var.th_s_comp[:,comp,...], self.var.th_fc_comp[:,comp,...], self.var.th_fc_adj[:,comp,...], self.var.tau_comp[:,comp,...], self.exp_sat[:,comp,...])
 
             # Update water content
             thnew[:,comp,...][cond652] = (self.var.th_s_comp[:,comp,...] - dthdt)[cond652]
@@ -167,33 +384,11 @@ class Drainage(object):
             drainsum[cond6525] = self.var.ksat_comp[:,comp,...][cond6525]
 
             # Store output flux from compartment ii
-            self.var.FluxOut[:,comp,...] = np.copy(drainsum)
+            self.var.FluxOut[:,comp,...] = drainsum
 
             # Redistribute excess in compartment above
-            precomp = comp + 1
-            while (np.any(excess > 0)) & (precomp != 0):
-
-                # Include condition here so that it is updated
-                cond7 = (excess > 0)
-
-                # Update compartment counter
-                precomp -= 1
-
-                # Update flux from compartment
-                if (precomp < comp):
-                    self.var.FluxOut[:,precomp,...][cond7] -= excess[cond7]
-
-                # Increase water content to store excess
-                thnew[:,precomp,...][cond7] += (excess / (1000 * self.var.dz[precomp]))[cond7]
-
-                # Limit water content to saturation and adjust excess counter
-                cond71 = (cond7 & (thnew[:,precomp,...] > self.var.th_s_comp[:,precomp,...]))
-                excess[cond71] = ((thnew[:,precomp,...] - self.var.th_s_comp[:,precomp,...]) * 1000 * self.var.dz[precomp])[cond71]
-                thnew[:,precomp,...][cond71] = self.var.th_s_comp[:,precomp,...][cond71]
-
-                cond72 = (cond7 & np.logical_not(cond71))
-                excess[cond72] = 0
+            if np.any(excess > 0):
+                redistribute_excess(excess, comp, thnew, self.var.th_s_comp, self.var.dz, self.var.FluxOut)
 
-        self.var.DeepPerc = np.copy(drainsum)
-        self.var.th = np.copy(thnew)
+        self.var.DeepPerc = drainsum
 
@@ -80,6 +80,7 @@ class FAO56Evapotranspiration(Evapotranspiration):
         ToExtract = np.broadcast_to(self.var.ETact[:,None,...], self.var.th.shape) * f
         ThToExtract = ((ToExtract / 1000) / self.var.dz_xy)
         self.var.th -= ThToExtract
+        self.var.thChanged |= np.any(ThToExtract != 0, axis=1)
 
         # Accumulate ETpot and ETact
         self.var.ETpotCum += self.var.ETpot
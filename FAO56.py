@@ -12,6 +12,8 @@ import pcraster as pcr
 import VirtualOS as vos
 
 from Model import Model
+from ActiveSet import *
+from BandExecutor import *
 from BiomassAccumulation import *
 from CanopyCover import *
 from CapillaryRise import *
@@ -31,6 +33,7 @@ from Inflow import *
 from InitialCondition import *
 from IrrigationMgmtParameters import *
 from Irrigation import *
+from MemoryPlanner import *
 from Meteo import *
 from PreIrrigation import *
 from RainfallPartition import *
@@ -58,6 +61,7 @@ class FAO56(Model):
         self.field_mgmt_parameters_module = FieldMgmtParameters(self)
         self.irrigation_mgmt_parameters_module = IrrigationMgmtParameters(self)
         self.soil_parameters_module = SoilAndTopoParameters(self)
+        self.memory_planner_module = FAO56MemoryPlanner(self)
         
         self.initial_condition_module = InitialCondition(self)
         self.check_groundwater_table_module = CheckGroundwaterTable(self)
@@ -88,6 +92,7 @@ class FAO56(Model):
         self.groundwater_module.initial()
         self.carbon_dioxide_module.initial()
 
+        self.memory_planner_module.initial()
         self.crop_parameters_module.initial()
         self.field_mgmt_parameters_module.initial()
         self.irrigation_mgmt_parameters_module.initial()
@@ -116,6 +121,15 @@ class FAO56(Model):
         # self.temperature_stress_module.initial()
         # self.harvest_index_module.initial()
         self.crop_yield_module.initial()
+        self.memory_planner_module.check_state()
+
+        # compute the soil water modules over the crops which are present
+        self.active_set = ActiveSet(self)
+        self.active_set.initial()
+
+        # compute modules in latitude bands on a pool of threads
+        self.band_executor = BandExecutor(self)
+        self.band_executor.initial()
         
     def dynamic(self):
         """Function to update model state for current time step"""
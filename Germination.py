@@ -20,6 +20,15 @@ class Germination(object):
         self.var.AgeDays     = np.copy(arr_zeros)
         self.var.AgeDays_NS  = np.copy(arr_zeros)
 
+        # Here we force zGerm to have a maximum value equal to the depth of the
+        # deepest soil compartment
+        zgerm = np.copy(self.var.zGerm)
+        zgerm[zgerm > np.sum(self.var.dz, axis=0)] = np.sum(self.var.dz, axis=0)
+
+        # Determine fraction of compartment covered by top soil layer
+        # affecting germination (zGerm does not change during the run)
+        self.factor = self.var.soil_parameters_module.compartment_fraction(zgerm, self.var.CompFracGerm)
+
     def reset_initial_conditions(self):
         self.var.DelayedGDDs[self.var.GrowingSeasonDayOne] = 0
         self.var.DelayedCDs[self.var.GrowingSeasonDayOne] = 0
@@ -32,23 +41,7 @@ class Germination(object):
         if np.any(self.var.GrowingSeasonDayOne):
             self.reset_initial_conditions()
             
-        # Here we force zGerm to have a maximum value equal to the depth of the
-        # deepest soil compartment
-        zgerm = np.copy(self.var.zGerm)
-        zgerm[zgerm > np.sum(self.var.dz, axis=0)] = np.sum(self.var.dz, axis=0)
-
-        # Find compartments covered by top soil layer affecting germination
-        comp_sto = (np.round(self.var.dzsum_xy * 1000) <= np.round(np.broadcast_to(zgerm[:,None,:,:], self.var.th.shape) * 1000))  # round to nearest mm
-
-        # Calculate water content in top soil layer
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
-        Wr_comp   = np.copy(arr_zeros)
-        WrFC_comp = np.copy(arr_zeros)
-        WrWP_comp = np.copy(arr_zeros)
-
-        # Determine fraction of compartment covered by top soil layer
-        factor = 1. - np.round(((self.var.dzsum_xy - zgerm) / self.var.dz_xy), 3)
-        factor = np.clip(factor, 0, 1) * comp_sto
+        factor = self.factor
 
         # Increment water storages (mm)
         Wr_comp = np.round((factor * 1000 * self.var.th * self.var.dz_xy))
@@ -8,20 +8,118 @@ import numpy as np
 import logging
 logger = logging.getLogger(__name__)
 
+# Phenological events, stored as bits of the event code (PhenoEvents). The
+# events are defined on the crop development time adjusted for delayed
+# germination (calendar days or growing degree days, depending on the
+# calendar type), and are set once the event has occurred:
+EMERGENCE_REACHED = 1           # tAdj >= Emergence
+CANOPY10PCT_PASSED = 2          # tAdj > Canopy10Pct
+MAXCANOPY_PASSED = 4            # tAdj > MaxCanopy
+CANOPYDEVEND_REACHED = 8        # tAdj >= CanopyDevEnd
+CANOPYDEVEND_PASSED = 16        # tAdj > CanopyDevEnd
+HISTART_PASSED = 32             # tAdj > HIstart
+SENESCENCE_REACHED = 64         # tAdj >= Senescence
+SENESCENCE_PASSED = 128         # tAdj > Senescence
+MATURITY_REACHED = 256          # tAdj >= Maturity
+MATURITY_PASSED = 512           # tAdj > Maturity
+MATURITY_DAY_PASSED = 1024      # round(tAdj) > Maturity
+
 class GrowthStage(object):
     def __init__(self, GrowthStage_variable):
         self.var = GrowthStage_variable
 
 class AQGrowthStage(GrowthStage):
+    """Class to determine the growth stage of the crop. Because the
+    phenological events of a season are known at planting, in the units
+    of the crop calendar, a season event table is built on the first day
+    of the growing season. Each day, only the (crop, cell) pairs which
+    have reached their next event, or whose development time can still
+    be shifted by delayed germination, are checked against the table.
+    Other modules test the event code (PhenoEvents) instead of comparing
+    the development time with each event.
+    """
+
+    # Crop parameters which define the phenological events
+    phenology = ['Emergence','Canopy10Pct','MaxCanopy','CanopyDevEnd','HIstart','Senescence','Maturity']
+
+    # Event bit, row of the event table, comparison and offset of the
+    # development time from which the event has to be checked. round(tAdj)
+    # can exceed Maturity from Maturity - 0.5 onwards.
+    events = [
+        (EMERGENCE_REACHED, 0, np.greater_equal, 0.),
+        (CANOPY10PCT_PASSED, 1, np.greater, 0.),
+        (MAXCANOPY_PASSED, 2, np.greater, 0.),
+        (CANOPYDEVEND_REACHED, 3, np.greater_equal, 0.),
+        (CANOPYDEVEND_PASSED, 3, np.greater, 0.),
+        (HISTART_PASSED, 4, np.greater, 0.),
+        (SENESCENCE_REACHED, 5, np.greater_equal, 0.),
+        (SENESCENCE_PASSED, 5, np.greater, 0.),
+        (MATURITY_REACHED, 6, np.greater_equal, 0.),
+        (MATURITY_PASSED, 6, np.greater, 0.),
+        (MATURITY_DAY_PASSED, 6, None, -0.5)]
 
     def initial(self):
         arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         self.var.GrowthStage = np.copy(arr_zeros)
 
+        # Season event table (development time of each event, in the units
+        # of the crop calendar), code of the events which have occurred
+        # and development time from which the next event has to be
+        # checked. Seasons which are already running at the start of the
+        # simulation are checked on the first day.
+        self.var.PhenoEventTime = np.zeros((len(self.phenology), self.var.nCrop, self.var.nLat, self.var.nLon))
+        self.var.PhenoEvents = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon), dtype=np.int16)
+        self.var.NextPhenoEvent = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), -np.inf)
+        self.build_event_table(np.ones((self.var.nCrop, self.var.nLat, self.var.nLon), dtype=bool))
+
+    def build_event_table(self, cond):
+        """Function to build the season event table for the (crop,
+        cell) pairs in cond
+        """
+        for row, param in enumerate(self.phenology):
+            self.var.PhenoEventTime[row][cond] = vars(self.var)[param][cond]
+        self.var.PhenoEvents[cond] = 0
+        self.var.NextPhenoEvent[cond] = -np.inf
+
     def reset_initial_conditions(self):
         self.var.GrowthStage[self.var.GrowingSeasonDayOne] = 0
+        self.build_event_table(self.var.GrowingSeasonDayOne)
+
+    def update_events(self, tAdj):
+        """Function to update the event code of the (crop, cell) pairs
+        which have reached their next event. Until germination, the
+        development time is shifted back each day germination is
+        delayed, so the events of these pairs are checked on each call.
+        """
+        germinated = (self.var.Germination & np.logical_not(self.var.GrowingSeasonDayOne))
+        cond = (self.var.GrowingSeasonIndex & (np.logical_not(germinated) | (tAdj >= self.var.NextPhenoEvent)))
+        idx = np.flatnonzero(cond)
+        if idx.size == 0:
+            return
+        t = tAdj.ravel()[idx]
+        event_time = self.var.PhenoEventTime.reshape(len(self.phenology), -1)[:,idx]
+        code = np.zeros(t.shape, dtype=np.int16)
+        next_event = np.full(t.shape, np.inf)
+        for bit, row, compare, offset in self.events:
+            if compare is None:
+                passed = (np.round(t) > event_time[row])
+            else:
+                passed = compare(t, event_time[row])
+            code |= (passed * np.int16(bit))
+            next_event = np.minimum(next_event, np.where(passed, np.inf, event_time[row] + offset))
+        np.put(self.var.PhenoEvents, idx, code)
+        np.put(self.var.NextPhenoEvent, idx, next_event)
+
+        # Growth stage of the pairs whose events have been checked
+        stage = np.full(t.shape, 4.)
+        stage[(code & SENESCENCE_PASSED) == 0] = 3
+        stage[(code & MAXCANOPY_PASSED) == 0] = 2
+        stage[(code & CANOPY10PCT_PASSED) == 0] = 1
+        np.put(self.var.GrowthStage, idx, stage)
         
     def dynamic(self):
+        if np.any(self.var.GrowingSeasonDayOne):
+            self.reset_initial_conditions()
 
         if self.var.CalendarType == 1:
             tAdj = self.var.DAP - self.var.DelayedCDs
@@ -29,15 +127,7 @@ class AQGrowthStage(GrowthStage):
             tAdj = self.var.GDDcum - self.var.DelayedGDDs
 
         # Update growth stage
-        cond1 = (self.var.GrowingSeasonIndex & (tAdj <= self.var.Canopy10Pct))
-        cond2 = (self.var.GrowingSeasonIndex & np.logical_not(cond1) & (tAdj <= self.var.MaxCanopy))
-        cond3 = (self.var.GrowingSeasonIndex & np.logical_not(cond1 | cond2) & (tAdj <= self.var.Senescence))
-        cond4 = (self.var.GrowingSeasonIndex & np.logical_not(cond1 | cond2 | cond3) & (tAdj > self.var.Senescence))
-
-        self.var.GrowthStage[cond1] = 1
-        self.var.GrowthStage[cond2] = 2
-        self.var.GrowthStage[cond3] = 3
-        self.var.GrowthStage[cond4] = 4
+        self.update_events(tAdj)
         self.var.GrowthStage[np.logical_not(self.var.GrowingSeasonIndex)] = 0
 
 class FAO56GrowthStage(GrowthStage):
@@ -5,6 +5,8 @@
 
 import numpy as np
 
+from GrowthStage import HISTART_PASSED
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -28,11 +30,7 @@ class HIrefCurrentDay(object):
         effects) harvest index on current day
         """
         # Check if in yield formation period
-        if self.var.CalendarType == 1:
-            tAdj = self.var.DAP - self.var.DelayedCDs
-        elif self.var.CalendarType == 2:
-            tAdj = self.var.GDDcum - self.var.DelayedGDDs
-        self.var.YieldForm = (self.var.GrowingSeasonIndex & (tAdj > self.var.HIstart))
+        self.var.YieldForm = (self.var.GrowingSeasonIndex & ((self.var.PhenoEvents & HISTART_PASSED) != 0))
         
         # Get time for harvest index calculation
         self.var.HIt = self.var.DAP - self.var.DelayedCDs - self.var.HIstartCD - 1
@@ -42,58 +42,60 @@ class HarvestIndex(object):
         """Function to calculate adjustment to harvest index for 
         failure of pollination due to water or temperature stress
         """
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
+        cond0 = self.var.FloweringWindow
+        if not np.any(cond0):
+            return
+        HIt = self.var.HIt[cond0]
+        FloweringCD = self.var.FloweringCD[cond0]
+        arr_zeros = np.zeros_like(HIt)
         FracFlow = np.copy(arr_zeros)
-        t1 = np.copy(arr_zeros)
-        t2 = np.copy(arr_zeros)
         F1 = np.copy(arr_zeros)
         F2 = np.copy(arr_zeros)
-        F = np.copy(arr_zeros)
-
-        cond0 = (self.var.GrowingSeasonIndex & self.var.YieldForm & (self.var.CropType == 3) & (self.var.HIt > 0) & (self.var.HIt <= self.var.FloweringCD))
 
         # Fractional flowering on previous day
-        # cond1 = (HIt > 0)
-        t1[cond0] = self.var.HIt[cond0] - 1
-        cond11 = (cond0 & (t1 > 0))
-        t1pct = 100 * np.divide(t1, self.var.FloweringCD, out=np.copy(arr_zeros), where=self.var.FloweringCD!=0)
-        t1pct = np.clip(t1pct, 0, 100)
-        F1[cond11] = (0.00558 * np.exp(0.63 * np.log(t1pct, out=np.copy(arr_zeros), where=t1pct>0)) - (0.000969 * t1pct) - 0.00383)[cond11]
+        t1 = HIt - 1
+        cond11 = (t1 > 0)
+        t1pct = 100 * np.divide(t1, FloweringCD, out=np.copy(arr_zeros), where=FloweringCD!=0)
+        t1pct = np.clip(t1pct, 0, 100)[cond11]
+        F1[cond11] = (0.00558 * np.exp(0.63 * np.log(t1pct, out=np.zeros_like(t1pct), where=t1pct>0)) - (0.000969 * t1pct) - 0.00383)
         F1 = np.clip(F1, 0, None)
 
         # Fractional flowering on current day
-        t2[cond0] = self.var.HIt[cond0]
-        cond12 = (cond0 & (t2 > 0))
-        t2pct = 100 * np.divide(t2, self.var.FloweringCD, out=np.copy(arr_zeros), where=self.var.FloweringCD!=0)
-        t2pct = np.clip(t2pct, 0, 100)
-        F2[cond12] = (0.00558 * np.exp(0.63 * np.log(t2pct, out=np.copy(arr_zeros), where=t2pct>0)) - (0.000969 * t2pct) - 0.00383)[cond12]
+        t2 = HIt
+        cond12 = (t2 > 0)
+        t2pct = 100 * np.divide(t2, FloweringCD, out=np.copy(arr_zeros), where=FloweringCD!=0)
+        t2pct = np.clip(t2pct, 0, 100)[cond12]
+        F2[cond12] = (0.00558 * np.exp(0.63 * np.log(t2pct, out=np.zeros_like(t2pct), where=t2pct>0)) - (0.000969 * t2pct) - 0.00383)
         F2 = np.clip(F2, 0, None)
 
         # Weight values
-        cond13 = (cond0 & (np.abs(F1 - F2) >= 0.0000001))
-        F[cond13] = (100 * np.divide(((F1 + F2) / 2), self.var.FloweringCD, out=np.copy(arr_zeros), where=self.var.FloweringCD!=0))[cond13]
+        cond13 = (np.abs(F1 - F2) >= 0.0000001)
+        F = (100 * np.divide(((F1 + F2) / 2), FloweringCD, out=np.copy(arr_zeros), where=FloweringCD!=0))
         FracFlow[cond13] = F[cond13]
 
         # Calculate pollination adjustment for current day
-        dFpol = np.copy(arr_zeros)##np.zeros((self.nCrop, self.nLat, self.nLon))
-        cond2 = (cond0 & (self.var.CC >= self.var.CCmin))
-        Ks = np.minimum(self.var.Ksw_Pol, self.var.Kst_PolC, self.var.Kst_PolH)
-        dFpol[cond2] = (Ks * FracFlow * (1 + (self.var.exc / 100)))[cond2]
+        dFpol = np.copy(arr_zeros)
+        cond2 = (self.var.CC[cond0] >= self.var.CCmin[cond0])
+        Ks = np.minimum(np.minimum(self.var.Ksw_Pol, self.var.Kst_PolC), self.var.Kst_PolH)[cond0]
+        dFpol[cond2] = (Ks * FracFlow * (1 + (self.var.exc[cond0] / 100)))[cond2]
 
-        # Calculate pollination adjustment to dateppp
-        self.var.Fpol += dFpol
-        self.var.Fpol = np.clip(self.var.Fpol, None, 1)
+        # Calculate pollination adjustment to date
+        self.var.Fpol[cond0] = np.clip(self.var.Fpol[cond0] + dFpol, None, 1)
 
     def HI_adj_pre_anthesis(self):
         """Function to calculate adjustment to harvest index for 
         pre-anthesis water stress
         """
-        cond0 = (self.var.GrowingSeasonIndex & self.var.YieldForm & (self.var.HIt >= 0) & ((self.var.CropType == 2) | (self.var.CropType == 3)) & np.logical_not(self.var.PreAdj))
+        cond0 = (self.var.YieldFormWindow & ((self.var.CropType == 2) | (self.var.CropType == 3)) & np.logical_not(self.var.PreAdj))
+        if not np.any(cond0):
+            return
         self.var.PreAdj[cond0] = True
 
         # Calculate adjustment
-        Br = np.divide(self.var.B, self.var.B_NS, out=np.zeros_like(self.var.B_NS), where=self.var.B_NS!=0)
-        Br_range = np.log(self.var.dHI_pre, out=np.zeros_like(self.var.dHI_pre), where=self.var.dHI_pre>0) / 5.62
+        B_NS = self.var.B_NS[cond0]
+        dHI_pre = self.var.dHI_pre[cond0]
+        Br = np.divide(self.var.B[cond0], B_NS, out=np.zeros_like(B_NS), where=B_NS!=0)
+        Br_range = np.log(dHI_pre, out=np.zeros_like(dHI_pre), where=dHI_pre>0) / 5.62
         Br_upp = 1
         Br_low = 1 - Br_range
         Br_top = Br_upp - (Br_range / 3)
@@ -107,52 +109,72 @@ class HarvestIndex(object):
         ratio_upp = np.divide(ratio_upp_divd, ratio_upp_divs, out=np.zeros_like(ratio_upp_divs), where=ratio_upp_divs!=0)
 
         # Calculate adjustment factor
-        cond1 = (cond0 & ((Br >= Br_low) & (Br < Br_top)))
-        self.var.Fpre[cond1] = (1 + (((1 + np.sin((1.5 - ratio_low) * np.pi)) / 2) * (self.var.dHI_pre / 100)))[cond1]
-        cond2 = (cond0 & np.logical_not(cond1) & ((Br > Br_top) & (Br <= Br_upp)))
-        self.var.Fpre[cond2] = (1 + (((1 + np.sin((0.5 + ratio_upp) * np.pi)) / 2) * (self.var.dHI_pre / 100)))[cond2]
-        cond3 = (cond0 & np.logical_not(cond1 | cond2))
-        self.var.Fpre[cond3] = 1
+        Fpre = np.ones_like(Br)
+        cond1 = ((Br >= Br_low) & (Br < Br_top))
+        Fpre[cond1] = (1 + (((1 + np.sin((1.5 - ratio_low[cond1]) * np.pi)) / 2) * (dHI_pre[cond1] / 100)))
+        cond2 = (np.logical_not(cond1) & ((Br > Br_top) & (Br <= Br_upp)))
+        Fpre[cond2] = (1 + (((1 + np.sin((0.5 + ratio_upp[cond2]) * np.pi)) / 2) * (dHI_pre[cond2] / 100)))
 
         # No green canopy left at start of flowering so no harvestable crop
         # will develop
-        cond3 = (cond0 & (self.var.CC <= 0.01))
-        self.var.Fpre[cond3] = 0
+        cond3 = (self.var.CC[cond0] <= 0.01)
+        Fpre[cond3] = 0
+        self.var.Fpre[cond0] = Fpre
 
     def HI_adj_post_anthesis(self):
         """Function to calculate adjustment to harvest index for 
         post-anthesis water stress
         """
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        cond0 = (self.var.GrowingSeasonIndex & self.var.YieldForm & (self.var.HIt > 0) & ((self.var.CropType == 2) | (self.var.CropType == 3)))
+        cond0 = (self.var.YieldFormWindow & (self.var.HIt > 0) & ((self.var.CropType == 2) | (self.var.CropType == 3)))
+        if not np.any(cond0):
+            return
+        DAP = (self.var.DAP - self.var.DelayedCDs)[cond0]
+        HIstartCD = self.var.HIstartCD[cond0]
+        Fpre = self.var.Fpre[cond0]
+        CC = self.var.CC[cond0]
+        arr_zeros = np.zeros_like(DAP)
 
         # 1 Adjustment for leaf expansion
-        tmax1 = self.var.CanopyDevEndCD - self.var.HIstartCD
-        self.var.DAP -= self.var.DelayedCDs
-        cond1 = (cond0 & (self.var.DAP <= (self.var.CanopyDevEndCD + 1)) & (tmax1 > 0) & (self.var.Fpre > 0.99) & (self.var.CC > 0.001) & (self.var.a_HI > 0))
-        dCor = (1 + np.divide((1 - self.var.Ksw_Exp), self.var.a_HI, out=np.copy(arr_zeros), where=self.var.a_HI!=0))
-        self.var.sCor1[cond1] += np.divide(dCor, tmax1, out=np.copy(arr_zeros), where=tmax1!=0)[cond1]
-        DayCor = (self.var.DAP - 1 - self.var.HIstartCD)
-        self.var.fpost_upp[cond1] = (np.divide(tmax1, DayCor, out=np.copy(arr_zeros), where=DayCor!=0) * self.var.sCor1)[cond1]
+        tmax1 = self.var.CanopyDevEndCD[cond0] - HIstartCD
+        a_HI = self.var.a_HI[cond0]
+        cond1 = ((DAP <= (self.var.CanopyDevEndCD[cond0] + 1)) & (tmax1 > 0) & (Fpre > 0.99) & (CC > 0.001) & (a_HI > 0))
+        sCor1 = self.var.sCor1[cond0]
+        fpost_upp = self.var.fpost_upp[cond0]
+        dCor = (1 + np.divide((1 - self.var.Ksw_Exp[cond0]), a_HI, out=np.copy(arr_zeros), where=a_HI!=0))
+        sCor1[cond1] += np.divide(dCor, tmax1, out=np.copy(arr_zeros), where=tmax1!=0)[cond1]
+        DayCor = (DAP - 1 - HIstartCD)
+        fpost_upp[cond1] = (np.divide(tmax1, DayCor, out=np.copy(arr_zeros), where=DayCor!=0) * sCor1)[cond1]
 
         # 2 Adjustment for stomatal closure
-        tmax2 = np.copy(self.var.YldFormCD)
-        cond2 = (cond0 & (self.var.DAP <= (self.var.HIendCD + 1)) & (tmax2 > 0) & (self.var.Fpre > 0.99) & (self.var.CC > 0.001) & (self.var.b_HI > 0))
-        dCor = ((np.exp(0.1 * np.log(self.var.Ksw_Sto, out=np.zeros_like(self.var.Ksw_Sto), where=self.var.Ksw_Sto!=0))) * (1 - np.divide((1 - self.var.Ksw_Sto), self.var.b_HI, out=np.copy(arr_zeros), where=self.var.b_HI!=0)))
-        self.var.sCor2[cond2] += np.divide(dCor, tmax2, out=np.copy(arr_zeros), where=tmax2!=0)[cond2]
-        DayCor = (self.var.DAP - 1 - self.var.HIstartCD)
-        self.var.fpost_dwn[cond2] = (np.divide(tmax2, DayCor, out=np.copy(arr_zeros), where=DayCor!=0) * self.var.sCor2)[cond2]
+        tmax2 = self.var.YldFormCD[cond0]
+        b_HI = self.var.b_HI[cond0]
+        cond2 = ((DAP <= (self.var.HIendCD[cond0] + 1)) & (tmax2 > 0) & (Fpre > 0.99) & (CC > 0.001) & (b_HI > 0))
+        sCor2 = self.var.sCor2[cond0]
+        fpost_dwn = self.var.fpost_dwn[cond0]
+        Ksw_Sto = self.var.Ksw_Sto[cond0][cond2]
+        b_HI2 = b_HI[cond2]
+        tmax22 = tmax2[cond2]
+        dCor = ((np.exp(0.1 * np.log(Ksw_Sto, out=np.zeros_like(Ksw_Sto), where=Ksw_Sto!=0))) * (1 - np.divide((1 - Ksw_Sto), b_HI2, out=np.zeros_like(b_HI2), where=b_HI2!=0)))
+        sCor2[cond2] += np.divide(dCor, tmax22, out=np.zeros_like(tmax22), where=tmax22!=0)
+        fpost_dwn[cond2] = (np.divide(tmax2, DayCor, out=np.copy(arr_zeros), where=DayCor!=0) * sCor2)[cond2]
 
         # Determine total multiplier
-        cond3 = (cond0 & (tmax1 == 0) & (tmax2 == 0))
-        self.var.Fpost[cond3] = 1
-        cond4 = (cond0 & np.logical_not(cond3))
+        Fpost = self.var.Fpost[cond0]
+        cond3 = ((tmax1 == 0) & (tmax2 == 0))
+        Fpost[cond3] = 1
+        cond4 = np.logical_not(cond3)
         cond41 = (cond4 & (tmax2 == 0))
-        self.var.Fpost[cond41] = self.var.fpost_upp[cond41]
+        Fpost[cond41] = fpost_upp[cond41]
         cond42 = (cond4 & (tmax1 <= tmax2) & np.logical_not(cond41))
-        self.var.Fpost[cond42] = (self.var.fpost_dwn * np.divide(((tmax1 * self.var.fpost_upp) + (tmax2 - tmax1)), tmax2, out=np.copy(arr_zeros), where=tmax2!=0))[cond42]
+        Fpost[cond42] = (fpost_dwn * np.divide(((tmax1 * fpost_upp) + (tmax2 - tmax1)), tmax2, out=np.copy(arr_zeros), where=tmax2!=0))[cond42]
         cond43 = (cond4 & np.logical_not(cond41 | cond42))
-        self.var.Fpost[cond43] = (self.var.fpost_upp * np.divide(((tmax2 * self.var.fpost_dwn) + (tmax1 - tmax2)), tmax2, out=np.copy(arr_zeros), where=tmax2!=0))[cond43]
+        Fpost[cond43] = (fpost_upp * np.divide(((tmax2 * fpost_dwn) + (tmax1 - tmax2)), tmax2, out=np.copy(arr_zeros), where=tmax2!=0))[cond43]
+
+        self.var.sCor1[cond0] = sCor1
+        self.var.sCor2[cond0] = sCor2
+        self.var.fpost_upp[cond0] = fpost_upp
+        self.var.fpost_dwn[cond0] = fpost_dwn
+        self.var.Fpost[cond0] = Fpost
         
     def dynamic(self):        
         """Function to simulate build up of harvest index"""
@@ -167,7 +189,7 @@ class HarvestIndex(object):
         # #######################
         
         HIadj = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        cond1 = (self.var.GrowingSeasonIndex & self.var.YieldForm & (self.var.HIt >= 0))
+        cond1 = self.var.YieldFormWindow
 
         # Root/tuber or fruit/grain crops
         cond11 = (cond1 & ((self.var.CropType == 2) | (self.var.CropType == 3)))
@@ -178,7 +200,7 @@ class HarvestIndex(object):
         # Adjustment only for fruit/grain crops
         HImax = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))  # TODO: is this in the right place?
         cond112 = (cond11 & (self.var.CropType == 3))
-        Ks = np.minimum(self.var.Ksw_Pol, self.var.Kst_PolC, self.var.Kst_PolH)
+        Ks = np.minimum(np.minimum(self.var.Ksw_Pol, self.var.Kst_PolC), self.var.Kst_PolH)
         self.HI_adj_pollination()
         HImax[cond112] = (self.var.Fpol * self.var.HI0)[cond112]
         cond113 = (cond11 & np.logical_not(cond112))
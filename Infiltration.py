@@ -5,6 +5,8 @@
 
 import numpy as np
 
+from Drainage import redistribute_excess
+
 import logging
 logger = logging.getLogger(__name__)
 
@@ -35,7 +37,6 @@ class Infiltration(object):
         ToStore = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         RunoffIni = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         InflTot = self.var.Infl + self.var.SurfaceStorage
-        thnew = np.copy(self.var.th)
 
         # Update infiltration rate for irrigation
         self.var.Infl += self.var.Irr * (self.var.AppEff / 100)
@@ -84,8 +85,24 @@ class Infiltration(object):
         # Initialize counters
         comp = 0
         Runoff = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
+        DeepPerc = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         cond3_ini = (ToStore > 0)
 
+        # Only cells with water to store are processed: soil properties and
+        # water contents of these cells are gathered into arrays with
+        # dimension (cell,comp), and scattered back after infiltration
+        I,J,K = np.nonzero(cond3_ini)
+        if I.size > 0:
+            th = self.var.th[I,:,J,K]
+            th_s = self.var.th_s_comp[I,:,J,K]
+            th_fc = self.var.th_fc_comp[I,:,J,K]
+            th_fc_adj = self.var.th_fc_adj[I,:,J,K]
+            tau = self.var.tau_comp[I,:,J,K]
+            ksat = self.var.ksat_comp[I,:,J,K]
+            FluxOut = self.var.FluxOut[I,:,J,K]
+            ToStore = ToStore[I,J,K]
+            RunoffCells = np.zeros((I.size))
+            
         while (np.any(ToStore > 0) & (comp < self.var.nComp)):
 
             # Update condition
@@ -93,55 +110,55 @@ class Infiltration(object):
 
             # Calculate saturated drainage ability, drainage factor and
             # required drainage ability
-            dthdtS = self.var.tau_comp[:,comp,...] * (self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...])
-            factor = self.var.ksat_comp[:,comp,...] / (dthdtS * 1000 * self.var.dz[comp])
+            dthdtS = tau[:,comp] * (th_s[:,comp] - th_fc[:,comp])
+            factor = ksat[:,comp] / (dthdtS * 1000 * self.var.dz[comp])
             dthdt0 = ToStore / (1000 * self.var.dz[comp])
 
             # Initialize water content for current layer
-            theta0 = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
+            theta0 = np.zeros((I.size))
 
             # Check drainage ability
             cond31 = (cond3 & (dthdt0 < dthdtS))
 
             # Calculate water content needed to meet drainage dthdt0
             cond311 = (cond31 & (dthdt0 <= 0))
-            theta0[cond311] = self.var.th_fc_adj[:,comp,...][cond311]
+            theta0[cond311] = th_fc_adj[:,comp][cond311]
             cond312 = (cond31 & np.logical_not(cond311))
-            A = (1 + ((dthdt0 * (np.exp(self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...]) - 1)) / (self.var.tau_comp[:,comp,...] * (self.var.th_s_comp[:,comp,...] - self.var.th_fc_comp[:,comp,...]))))
-            theta0[cond312] = (self.var.th_fc_comp[:,comp,...] + np.log(A))[cond312]
+            A = (1 + ((dthdt0 * (np.exp(th_s[:,comp] - th_fc[:,comp]) - 1)) / (tau[:,comp] * (th_s[:,comp] - th_fc[:,comp]))))
+            theta0[cond312] = (th_fc[:,comp] + np.log(A))[cond312]
 
             # Limit thX to between saturation and field capacity
-            cond313 = (cond31 & (theta0 > self.var.th_s_comp[:,comp,...]))
-            theta0[cond313] = self.var.th_s_comp[:,comp,...][cond313]
-            cond314 = (cond31 & np.logical_not(cond313) & (theta0 < self.var.th_fc_adj[:,comp,...]))
-            theta0[cond314] = self.var.th_fc_adj[:,comp,...][cond314]
+            cond313 = (cond31 & (theta0 > th_s[:,comp]))
+            theta0[cond313] = th_s[:,comp][cond313]
+            cond314 = (cond31 & np.logical_not(cond313) & (theta0 < th_fc_adj[:,comp]))
+            theta0[cond314] = th_fc_adj[:,comp][cond314]
             dthdt0[cond314] = 0
 
             # Limit water content and drainage to saturation
             cond32 = (cond3 & np.logical_not(cond31))
-            theta0[cond32] = self.var.th_s_comp[:,comp,...][cond32]
+            theta0[cond32] = th_s[:,comp][cond32]
             dthdt0[cond32] = dthdtS[cond32]
 
             # Calculate maximum water flow through compartment and total
             # drainage
             drainmax = factor * dthdt0 * 1000 * self.var.dz[comp]
-            drainage = drainmax + self.var.FluxOut[:,comp,...]
+            drainage = drainmax + FluxOut[:,comp]
 
             # Limit drainage to saturated hydraulic conductivity
-            cond33 = (cond3 & (drainage > self.var.ksat_comp[:,comp,...]))
-            drainmax[cond33] = (self.var.ksat_comp[:,comp,...] - self.var.FluxOut[:,comp,...])[cond33]
+            cond33 = (cond3 & (drainage > ksat[:,comp]))
+            drainmax[cond33] = (ksat[:,comp] - FluxOut[:,comp])[cond33]
 
             # Line 117 of AOS_Infiltration.m
             # Calculate difference between threshold and current water contents
-            diff = theta0 - self.var.th[:,comp,...]
+            diff = theta0 - th[:,comp]
 
             cond34 = (cond3 & (diff > 0))
-            thnew[:,comp,...][cond34] += (ToStore / (1000 * self.var.dz[comp]))[cond34]
+            th[:,comp][cond34] += (ToStore / (1000 * self.var.dz[comp]))[cond34]
 
             # Remaining water that can infiltrate to compartments below
-            cond341 = (cond34 & (thnew[:,comp,...] > theta0))
-            ToStore[cond341] = ((thnew[:,comp,...] - theta0) * 1000 * self.var.dz[comp])[cond341]
-            thnew[:,comp,...][cond341] = theta0[cond341]
+            cond341 = (cond34 & (th[:,comp] > theta0))
+            ToStore[cond341] = ((th[:,comp] - theta0) * 1000 * self.var.dz[comp])[cond341]
+            th[:,comp][cond341] = theta0[cond341]
 
             # Otherwise all infiltrating water has been stored
             cond342 = (cond34 & np.logical_not(cond341))
@@ -149,7 +166,7 @@ class Infiltration(object):
 
             # Update outflow from current compartment (drainage + infiltration
             # flows)
-            self.var.FluxOut[:,comp,...][cond3] += ToStore[cond3]
+            FluxOut[:,comp][cond3] += ToStore[cond3]
 
             # Calculate backup of water into compartments above, and update
             # water to store
@@ -157,43 +174,28 @@ class Infiltration(object):
             ToStore -= excess
 
             # Redistribute excess to compartments above
-            precomp = comp + 1
-            while (np.any(cond3 & (excess > 0)) & (precomp != 0)):
-
-                # Update condition
-                cond35 = (cond3 & (excess > 0))
-
-                # Keep storing in compartments above until soil surface is
-                # reached
-                precomp -= 1
+            cond35 = (cond3 & (excess > 0))
+            if np.any(cond35):
+                excess[np.logical_not(cond35)] = 0
+                FluxOut[:,comp] -= excess
+                excess = redistribute_excess(excess, comp, th, th_s, self.var.dz, FluxOut)
 
-                # Update outflow from compartment
-                self.var.FluxOut[:,precomp,...][cond35] = (self.var.FluxOut[:,precomp,...] - excess)[cond35]
-
-                # Update water content and limit to saturation
-                thnew[:,precomp,...][cond35] += (excess / (1000 * self.var.dz[precomp]))[cond35]
-                cond351 = (cond35 & (thnew[:,precomp,...] > self.var.th_s_comp[:,precomp,...]))
-                excess[cond351] = ((thnew[:,precomp,...] - self.var.th_s_comp[:,precomp,...]) * 1000 * self.var.dz[precomp])[cond351]
-                thnew[:,precomp,...][cond351] = self.var.th_s_comp[:,precomp,...][cond351]
-                cond352 = (cond35 & np.logical_not(cond351))
-                excess[cond352] = 0
-
-            # Any leftover water not stored becomes Runoff
-            cond36 = (cond3 & (excess > 0))
-            Runoff[cond36] += excess[cond36]
+                # Any leftover water not stored becomes Runoff
+                RunoffCells += excess
 
             # update comp
             comp += 1
 
-        # Infiltration left to store after bottom compartment becomes deep
-        # percolation (mm)
-        DeepPerc = np.copy(ToStore)
+        if I.size > 0:
+            self.var.th[I,:,J,K] = th
+            self.var.thChanged[I,J,K] = True
+            self.var.FluxOut[I,:,J,K] = FluxOut
+            Runoff[I,J,K] = RunoffCells
+            
+            # Infiltration left to store after bottom compartment becomes deep
+            # percolation (mm)
+            DeepPerc[I,J,K] = ToStore
 
-        # Otherwise if ToStore equals zero there is no infiltration
-        cond4 = np.logical_not(cond3_ini)
-        DeepPerc[cond4] = 0
-        Runoff[cond4] = 0
-        
         # #######################################################################
 
         # Update total runoff
@@ -212,8 +214,7 @@ class Infiltration(object):
         cond52 = (cond5 & np.logical_not(cond51))
         Runoff[cond52] = RunoffIni[cond52]
 
-        # Update water content, deep percolation, surface runoff, infiltration
-        self.var.th = np.copy(thnew)
+        # Update deep percolation, surface runoff, infiltration
         self.var.DeepPerc += DeepPerc
         self.var.Infl -= Runoff
         self.var.Runoff += Runoff        
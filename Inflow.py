@@ -42,6 +42,7 @@ class Inflow(object):
         # Update water content
         dth[cond11] = (self.var.th_s_comp - self.var.th)[cond11]
         self.var.th[cond11] = self.var.th_s_comp[cond11]
+        self.var.thChanged |= np.any(cond11, axis=1)
 
         # Update groundwater inflow
         GwIn_comp = dth * 1000 * self.var.dz_xy
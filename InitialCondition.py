@@ -12,6 +12,10 @@ import datetime as datetime
 import calendar as calendar
 import scipy.interpolate as interpolate
 
+# synchronization with the processes simulating the other crops, if the
+# crops are split between processes (see crop_runner.py)
+cropsync = None
+
 class InitialCondition(object):
     """Class to represent the initial condition of an AquaCrop run. 
     Although not yet implemented, this class should include a method 
@@ -65,6 +69,9 @@ class InitialCondition(object):
         th = np.broadcast_to(th, (self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
         self.var.th = np.copy(th)        
 
+        if cropsync is not None:
+            cropsync.initial(self.var)
+
     # def getState(self):
     #     result = {}
     #     state_vars_soil = [
@@ -91,9 +98,14 @@ class InitialCondition(object):
         # Condition to identify crops which are not being grown or crops which
         # have only just finished being grown. The water content of crops
         # meeting this condition is used to compute the area-weighted initial
-        # condition
-        if np.any(self.var.GrowingSeasonDayOne):
+        # condition. Crops which are not present are left out if their water
+        # content is not simulated (see ActiveSet.py)
+        if cropsync is not None:
+            cropsync.dynamic(self.var)
+        elif np.any(self.var.GrowingSeasonDayOne):
             cond1 = np.logical_not(self.var.GrowingSeasonIndex) | self.var.GrowingSeasonDayOne
+            if self.var.cropActiveSet:
+                cond1 = cond1 & self.var.CropPresence
             cond1 = np.broadcast_to(cond1[:,None,:,:], self.var.th.shape)
             th = np.copy(self.var.th)
             th[np.logical_not(cond1)] = np.nan
@@ -101,3 +113,4 @@ class InitialCondition(object):
             th_ave = th_ave[None,:,:,:] * np.ones((self.var.nCrop))[:,None,None,None]
             cond2 = np.broadcast_to(self.var.GrowingSeasonDayOne[:,None,:,:], self.var.th.shape)
             self.var.th[cond2] = th_ave[cond2]
+            self.var.thChanged |= self.var.GrowingSeasonDayOne
@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import time
+import numpy as np
+
+import VirtualOS as vos
+import variable_list as varDicts
+from Messages import AQError
+
+import logging
+logger = logging.getLogger(__name__)
+
+class MemoryPlanner(object):
+    """Class to estimate the memory footprint and the computational
+    cost of a model run before the first time step. If a memory budget
+    is given in the configuration file (globalOptions:memoryBudget, in
+    MB), runs which cannot fit in the budget are refused, and the
+    season-long crop calendar arrays are computed in latitude bands
+    small enough to fit in the memory that remains. The run time is only
+    estimated if this is requested (globalOptions:estimateRunTime), as it
+    is measured by timing numpy on this machine.
+    """
+
+    # Approximate number of arrays with dimensions (crop, lat, lon) and
+    # (crop, comp, lat, lon) which persist between time steps (parameters,
+    # model state and values which modules keep between calls). These
+    # are checked against the arrays held by the model once it has been
+    # initialized (see check_state): if a change to the model adds state,
+    # the warning logged by check_state gives the new numbers
+    n_state_3d = 0
+    n_state_4d = 0
+
+    # Approximate number of arrays of the same dimensions which are alive
+    # at the same time within the most demanding module (the arrays
+    # assigned to local variables in SoilEvaporation.dynamic and
+    # Transpiration.dynamic, with those of the functions they call)
+    n_work_3d = 0
+    n_work_4d = 0
+
+    # Approximate number of elementwise operations per day on arrays with
+    # dimensions (crop, lat, lon) and (crop, comp, lat, lon), only used to
+    # estimate the run time
+    n_ops_3d = 0
+    n_ops_4d = 0
+
+    # Number of (day, crop, lat, lon) arrays alive at the same time when
+    # computing the crop calendar
+    n_calendar_4d = 0
+
+    # Upper bound of the length of the crop calendar arrays (days) - the
+    # harvest date can fall in the year following the planting year
+    max_calendar_days = 366 * 2
+
+    nbytes = np.dtype(np.float64).itemsize
+
+    def __init__(self, MemoryPlanner_variable):
+        self.var = MemoryPlanner_variable
+
+    def initial(self):
+
+        # Memory budget (MB)
+        self.var.memoryBudget = None
+        budget = self.var._configuration.globalOptions['memoryBudget']
+        if budget != "None":
+            self.var.memoryBudget = float(budget) * 1024 ** 2
+
+        # The soil parameters are read after the crop parameters, so we get
+        # the number of compartments directly from the netCDF dimension
+        soilAndTopoFileNC = self.var._configuration.soilOptions['soilAndTopoNC']
+        self.nComp = vos.netcdfDim2NumPy(soilAndTopoFileNC, 'compartment').size
+        self.nCell = self.var.nCrop * self.var.nLat * self.var.nLon
+
+        self.estimate_memory()
+        self.time_per_day = None
+        if self.var._configuration.globalOptions['estimateRunTime'] == "1":
+            self.estimate_cost()
+        self.report()
+
+        # Refuse the run if it does not fit in the budget even when the crop
+        # calendar is computed one latitude row at a time
+        if self.var.memoryBudget is not None:
+            minimum = self.fixed_memory + self.calendar_memory(self.max_calendar_days, 1)
+            if minimum > self.var.memoryBudget:
+                raise AQError(
+                    'Estimated memory requirement (%.0f MB) exceeds the memory budget (%.0f MB). Reduce the number of crops, the size of the clone map or the number of reported variables' % (minimum / 1024 ** 2, self.var.memoryBudget / 1024 ** 2))
+
+    def reporting_memory(self):
+        """Function to estimate the memory used by reporting, which
+        keeps an accumulator for each aggregated output variable and
+        converts output fields to single precision before writing
+        """
+        shape = {'crop' : self.var.nCrop, 'depth' : self.nComp, 'lat' : self.var.nLat, 'lon' : self.var.nLon, 'time' : 1}
+        options = self.var._configuration.reportingOptions if 'reportingOptions' in self.var._configuration.allSections else {}
+        accumulators = 0
+        output = 0
+        for opt in ['outDailyTotNC','outMonthAvgNC','outMonthEndNC','outMonthTotNC','outMonthMaxNC','outYearAvgNC','outYearEndNC','outYearTotNC','outYearMaxNC']:
+            if opt not in options or options[opt] == "None":
+                continue
+            for var in set(options[opt].split(",")):
+                if var not in varDicts.netcdf_dimensions:
+                    continue
+                n = np.prod([shape[dim] for dim in varDicts.netcdf_dimensions[var]])
+                output = max(output, n * 4)
+                if opt != 'outDailyTotNC':
+                    accumulators += n * self.nbytes
+                else:
+                    self.output_per_day += n * 4
+        return accumulators + output
+
+    def calendar_memory(self, ndays, nrows):
+        """Function to estimate the memory used to compute the crop
+        calendar for ndays days over nrows latitude rows
+        """
+        return ndays * self.var.nCrop * nrows * self.var.nLon * self.n_calendar_4d * self.nbytes
+
+    def estimate_memory(self):
+        size_3d = self.nCell * self.nbytes
+        size_4d = size_3d * self.nComp
+        self.output_per_day = 0
+        self.state_memory = (self.n_state_3d * size_3d) + (self.n_state_4d * size_4d)
+        self.work_memory = (self.n_work_3d * size_3d) + (self.n_work_4d * size_4d)
+        self.report_memory = self.reporting_memory()
+        self.fixed_memory = self.state_memory + self.work_memory + self.report_memory
+
+    def estimate_cost(self):
+        """Function to estimate the run time per day, by timing a
+        typical elementwise numpy expression on this machine
+        """
+        n = 2 ** 20
+        a = np.random.uniform(0.1, 0.5, n)
+        b = np.random.uniform(0.1, 0.5, n)
+        elapsed = []
+        for i in range(3):
+            start = time.time()
+            c = np.clip(np.exp(a - b) * a, 0, 1)
+            elapsed.append(time.time() - start)
+        time_per_op = min(elapsed) / (3 * n)
+        ops = self.nCell * (self.n_ops_3d + self.n_ops_4d * self.nComp)
+        self.time_per_day = ops * time_per_op
+        self.time_total = self.time_per_day * self.var._modelTime.nrOfTimeSteps
+
+    def report(self):
+        mb = 1024. ** 2
+        logger.info('Estimated memory requirement: %.0f MB (model state %.0f MB, work arrays %.0f MB, reporting %.0f MB, crop calendar up to %.0f MB)',
+                    (self.fixed_memory + self.calendar_memory(self.max_calendar_days, self.var.nLat)) / mb,
+                    self.state_memory / mb,
+                    self.work_memory / mb,
+                    self.report_memory / mb,
+                    self.calendar_memory(self.max_calendar_days, self.var.nLat) / mb)
+        logger.info('Estimated daily output: %.1f MB', self.output_per_day / mb)
+        if self.time_per_day is not None:
+            logger.info('Estimated run time: %.2f s per day, %.1f h in total', self.time_per_day, self.time_total / 3600.)
+
+    def count_state(self):
+        """Function to count the arrays held by the model and its modules,
+        in units of arrays with dimensions (crop, lat, lon) and (crop,
+        comp, lat, lon) in double precision. Arrays which share memory
+        are counted once, and broadcast arrays are not counted.
+
+        Returns:
+          tuple (number of 3D arrays, number of 4D arrays)
+        """
+        objects = [self.var] + [value for name, value in vars(self.var).items() if name.endswith('_module')]
+        size_3d = float(self.var.nCrop * self.var.nLat * self.var.nLon * self.nbytes)
+        size_4d = size_3d * self.nComp
+        counted = set()
+        n_3d = 0
+        n_4d = 0
+        for obj in objects:
+            for value in vars(obj).values():
+                if not isinstance(value, np.ndarray) or value.ndim < 2:
+                    continue
+                if value.shape[-2:] != (self.var.nLat, self.var.nLon) or 0 in value.strides:
+                    continue
+                base = value
+                while isinstance(base.base, np.ndarray):
+                    base = base.base
+                if id(base) in counted:
+                    continue
+                counted.add(id(base))
+                if value.ndim == 4 and value.shape[1] == self.nComp:
+                    n_4d += base.nbytes / size_4d
+                else:
+                    n_3d += base.nbytes / size_3d
+        return n_3d, n_4d
+
+    def check_state(self):
+        """Function to check the number of state arrays assumed by the
+        memory estimate against the arrays held by the initialized model
+        """
+        n_3d, n_4d = self.count_state()
+        if (n_3d > self.n_state_3d) or (n_4d > self.n_state_4d):
+            logger.warning('The model holds %.0f (crop, lat, lon) and %.0f (crop, comp, lat, lon) arrays, but the memory estimate assumes %i and %i: update n_state_3d and n_state_4d of %s',
+                           n_3d, n_4d, self.n_state_3d, self.n_state_4d, type(self).__name__)
+
+    def latitude_bands(self, ndays):
+        """Function to split the latitude dimension into bands so that
+        crop calendar arrays with ndays days fit in the memory budget
+
+        Args:
+          ndays : length of the crop calendar arrays (days)
+
+        Returns:
+          list of slice objects along the latitude dimension
+        """
+        # NB the FAO56 model keeps no crop calendar arrays
+        nrows = self.var.nLat
+        if self.var.memoryBudget is not None and self.calendar_memory(ndays, 1) > 0:
+            available = self.var.memoryBudget - self.fixed_memory
+            nrows = int(available // self.calendar_memory(ndays, 1))
+            nrows = min(max(nrows, 1), self.var.nLat)
+            if nrows < self.var.nLat:
+                logger.info('Computing crop calendar in bands of %i latitude rows to stay within the memory budget', nrows)
+        return [slice(row, min(row + nrows, self.var.nLat)) for row in range(0, self.var.nLat, nrows)]
+
+class AQMemoryPlanner(MemoryPlanner):
+    n_state_3d = 285
+    n_state_4d = 29
+    n_work_3d = 40
+    n_work_4d = 12
+    n_ops_3d = 1500
+    n_ops_4d = 900
+    n_calendar_4d = 10
+
+class FAO56MemoryPlanner(MemoryPlanner):
+    n_state_3d = 95
+    n_state_4d = 13
+    n_work_3d = 20
+    n_work_4d = 8
+    n_ops_3d = 400
+    n_ops_4d = 150
+    n_calendar_4d = 0
@@ -0,0 +1,42 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+class PhenologyWindows(object):
+    """Class to determine which (crop, cell) pairs are inside the
+    phenological windows in which temperature stress on pollination and
+    adjustments to the harvest index apply on the current day. Modules
+    only evaluate their stress functions for the pairs inside the
+    relevant window. This must be called after the reference harvest
+    index (which sets YieldForm and HIt) is updated.
+    """
+
+    def __init__(self, PhenologyWindows_variable):
+        self.var = PhenologyWindows_variable
+
+    def initial(self):
+        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon), dtype=bool)
+        self.var.YieldFormWindow = np.copy(arr_zeros)
+        self.var.FloweringWindow = np.copy(arr_zeros)
+        self.var.PolHeatWindow = np.copy(arr_zeros)
+        self.var.PolColdWindow = np.copy(arr_zeros)
+
+    def dynamic(self):
+
+        # Yield formation: build-up of harvest index and adjustments for
+        # pre- and post-anthesis water stress
+        self.var.YieldFormWindow = (self.var.GrowingSeasonIndex & self.var.YieldForm & (self.var.HIt >= 0))
+
+        # Flowering of fruit/grain crops: adjustment of harvest index for
+        # failure of pollination
+        self.var.FloweringWindow = (self.var.YieldFormWindow & (self.var.CropType == 3) & (self.var.HIt > 0) & (self.var.HIt <= self.var.FloweringCD))
+
+        # Heat and cold stress on pollination, for crops which are sensitive
+        self.var.PolHeatWindow = (self.var.FloweringWindow & (self.var.PolHeatStress == 1))
+        self.var.PolColdWindow = (self.var.FloweringWindow & (self.var.PolColdStress == 1))
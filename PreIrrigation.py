@@ -21,10 +21,9 @@ class PreIrrigation(object):
         self.var.IrrNet = np.copy(arr_zeros)
         
     def dynamic(self):
-        # Expand dz and dzsum to crop, lat, lon
+        # Expand dz to crop, lat, lon
         arr_ones = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))[:,None,:,:]
         dz = (self.var.dz[None,:,None,None] * arr_ones)
-        dzsum = (self.var.dzsum[None,:,None,None] * arr_ones)
 
         # Calculate pre-irrigation requirement
         rootdepth = np.maximum(self.var.Zmin, self.var.Zroot)
@@ -35,7 +34,7 @@ class PreIrrigation(object):
         # Conditions for applying pre-irrigation
         cond0 = ((self.var.IrrMethod == 4) & (self.var.DAP == 1))
         cond1 = (np.broadcast_to(cond0[:,None,:,:], self.var.th.shape)
-                 & ((dzsum - dz) < np.broadcast_to(rootdepth[:,None,:,:], self.var.th.shape))
+                 & (self.var.soil_parameters_module.compartment_fraction(rootdepth) > 0)
                  & (self.var.th < thCrit))
 
         # Update pre-irrigation and root zone water content (mm)
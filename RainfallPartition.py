@@ -18,19 +18,11 @@ class RainfallPartition(object):
         arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))        
         self.var.Runoff = np.copy(arr_zeros)
         self.var.Infl = np.copy(arr_zeros)
-        
-    def dynamic(self):
-        """Function to partition rainfall into surface runoff and 
-        infiltration using the curve number approach.
-        """
-        # Add crop dimension to precipitation
-        P = self.var.precipitation[None,:,:] * np.ones((self.var.nCrop))[:,None,None]
-        zcn = self.var.zCN[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None]
 
-        cond1 = ((self.var.Bunds == 0) | (self.var.zBund < 0.001))
-
-        # Adjust curve number
-        cond11 = (cond1 & (self.var.AdjCN == 1))
+        # The weight of each compartment in the relative wetness of the
+        # topsoil, used to adjust the curve number, only depends on soil
+        # properties
+        zcn = self.var.zCN[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None]
 
         # Check which compartment cover depth of top soil used to adjust
         # curve number
@@ -48,18 +40,37 @@ class RainfallPartition(object):
         xx = np.concatenate((np.zeros((self.var.nCrop, 1, self.var.nLat, self.var.nLon)), wx[:,:-1,...]), axis=1)
         wrel = np.clip((wx - xx), 0, 1)
 
-        # Calculate relative wetness of topsoil
-        thnew = np.maximum(self.var.th_wp_comp, self.var.th)
-
         # Multiply by comp_sto to ensure that compartments not used for
         # curve number adjustment are set to zero
-        wet_top_comp = wrel * ((self.var.th - self.var.th_wp_comp) / (self.var.th_fc_comp - self.var.th_wp_comp)) * comp_sto
-        wet_top = np.sum(wet_top_comp, axis=1)  # sum along compartment dimension
-        wet_top = np.clip(wet_top, 0, 1)
+        self.var.wet_top_weight = wrel * comp_sto / (self.var.th_fc_comp - self.var.th_wp_comp)
+        
+    def dynamic(self):
+        """Function to partition rainfall into surface runoff and 
+        infiltration using the curve number approach.
+        """
+        # Without precipitation there is no runoff or infiltration
+        if not np.any(self.var.precipitation > 0):
+            self.var.Runoff[:] = 0
+            self.var.Infl[:] = 0
+            return
+        
+        # Add crop dimension to precipitation
+        P = self.var.precipitation[None,:,:] * np.ones((self.var.nCrop))[:,None,None]
+
+        cond1 = ((self.var.Bunds == 0) | (self.var.zBund < 0.001))
 
-        # Make adjustment to curve number
+        # Adjust curve number (only needed where there is precipitation)
+        cond11 = (cond1 & (self.var.AdjCN == 1) & (P > 0))
         CN = np.copy(self.var.CN)
-        CN[cond11] = np.round(self.var.CNbot + (self.var.CNtop - self.var.CNbot) * wet_top)[cond11]
+        I,J,K = np.nonzero(cond11)
+        if I.size > 0:
+            
+            # Calculate relative wetness of topsoil
+            wet_top = np.sum(self.var.wet_top_weight[I,:,J,K] * (self.var.th[I,:,J,K] - self.var.th_wp_comp[I,:,J,K]), axis=1)
+            wet_top = np.clip(wet_top, 0, 1)
+
+            # Make adjustment to curve number
+            CN[I,J,K] = np.round(self.var.CNbot[I,J,K] + (self.var.CNtop[I,J,K] - self.var.CNbot[I,J,K]) * wet_top)
 
         # Partition rainfall into runoff and infiltration
         S = (25400. / CN) - 254
@@ -203,6 +203,7 @@ class Reporting(object):
                                       self._modelTime.month,\
                                       self._modelTime.day,\
                                       0)
+        timeValue = self._modelTime.ncTime
 
         logger.info("reporting for time %s", self._modelTime.currTime)
 
@@ -215,7 +216,8 @@ class Reporting(object):
                                            short_name,
                                            dims,
                                            self.__getattribute__(var),
-                                           timeStamp)
+                                           timeStamp,
+                                           timeValue = timeValue)
 
         if self.outMonthAvgNC[0] != "None":
             for var in self.outMonthAvgNC:
@@ -229,7 +231,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_monthAvg'),
-                                               timeStamp)
+                                               timeStamp,
+                                               timeValue = timeValue)
                     
 
         if self.outMonthEndNC[0] != "None":
@@ -242,7 +245,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_monthEnd'),
-                                               timeStamp)
+                                               timeStamp,
+                                               timeValue = timeValue)
                     
         if self.outMonthTotNC[0] != "None":
             for var in self.outMonthTotNC:
@@ -255,7 +259,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_monthAvg'),
-                                               timeStamp)                    
+                                               timeStamp,
+                                               timeValue = timeValue)                    
 
         if self.outMonthMaxNC[0] != "None":
             for var in self.outMonthMaxNC:
@@ -268,7 +273,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_monthMax'),
-                                               timeStamp)                    
+                                               timeStamp,
+                                               timeValue = timeValue)                    
                 
         if self.outYearAvgNC[0] != "None":
             for var in self.outYearAvgNC:
@@ -282,7 +288,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_yearAvg'),
-                                               timeStamp)
+                                               timeStamp,
+                                               timeValue = timeValue)
                     
 
         if self.outYearEndNC[0] != "None":
@@ -295,7 +302,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_yearEnd'),
-                                               timeStamp)
+                                               timeStamp,
+                                               timeValue = timeValue)
                     
         if self.outYearTotNC[0] != "None":
             for var in self.outYearTotNC:
@@ -308,7 +316,8 @@ class Reporting(object):
                                                short_name,
                                                dims,
                                                self.__getattribute__(var+'_yearAvg'),
-                                               timeStamp)                    
+                                               timeStamp,
+                                               timeValue = timeValue)                    
 
         if self.outYearMaxNC[0] != "None":
             for var in self.outYearMaxNC:
@@ -323,5 +332,6 @@ class Reporting(object):
                                                dims,
                                                # self.__getattribute__(var),
                                                self.__getattribute__(var+'_yearMax'),
-                                               timeStamp)                    
+                                               timeStamp,
+                                               timeValue = timeValue)                    
             
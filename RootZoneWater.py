@@ -8,6 +8,12 @@ import numpy as np
 import logging
 logger = logging.getLogger(__name__)
 
+def value_changed(x, prev):
+    """Function to identify cells in which x differs from its previous
+    value, treating cells in which both are NaN as unchanged
+    """
+    return np.logical_not((x == prev) | (np.isnan(x) & np.isnan(prev)))
+
 class RootZoneWater(object):
     def __init__(self, RootZoneWater_variable):
         self.var = RootZoneWater_variable
@@ -24,43 +30,88 @@ class RootZoneWater(object):
         self.var.Dr = np.copy(arr_zeros)
         self.var.Wr = np.copy(arr_zeros)
 
-    def fraction_of_compartment_in_root_zone(self):
-        # Calculate root zone water content and available water
-        rootdepth = np.maximum(self.var.Zmin, self.var.Zroot)
-        rootdepth = np.round(rootdepth * 100) / 100
-        rootdepth_comp = np.broadcast_to(rootdepth[:,None,:,:], self.var.th.shape)
-        comp_sto = (np.round((self.var.dzsum_xy - self.var.dz_xy) * 1000) < np.round(rootdepth_comp * 1000))
-
+        # Root zone storages are cached between calls. Storages at
+        # saturation, field capacity, wilting point and air dry depend only
+        # on the root depth, so they are updated in cells where the (rounded)
+        # root depth changes; the actual storage is updated in cells where
+        # the water content changes. Modules which change the water content
+        # mark the cells they change in thChanged. Initial values of inf
+        # and True ensure that all cells are computed on the first call.
+        arr_nan = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), np.nan)
+        self.var.RootDepth = np.copy(arr_nan)
+        self.var.RootFact = np.zeros_like(self.var.th)
+        self.var.thChanged = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon), dtype=bool)
+        self.RootDepthPrev = np.full_like(arr_nan, np.inf)
+        self.WrAct = np.zeros_like(arr_nan)
+        self.WrS = np.zeros_like(arr_nan)
+        self.WrFC = np.zeros_like(arr_nan)
+        self.WrWP = np.zeros_like(arr_nan)
+        self.WrDry = np.zeros_like(arr_nan)
+
+    def fraction_of_compartment_in_root_zone(self, I, J, K):
+        """Function to calculate the fraction of each compartment covered
+        by the root zone in cells (I, J, K)
+        """
         # Fraction of compartment covered by root zone (zero in compartments
         # NOT covered by the root zone)
-        factor = 1 - ((self.var.dzsum_xy - rootdepth_comp) / self.var.dz_xy)
-        factor = np.clip(factor, 0, 1)
-        factor[np.logical_not(comp_sto)] = 0
+        self.var.RootFact[I,:,J,K] = self.var.soil_parameters_module.compartment_fraction(self.var.RootDepth[I,J,K])
 
-        self.var.RootDepth = rootdepth
-        self.var.RootFact = factor
-        # return rootdepth, factor
+    def root_zone_storage(self, th, I, J, K):
+        """Function to calculate the water storage (mm) in the root zone of
+        cells (I, J, K) given the water content th in each compartment
+        """
+        Wr_comp = self.var.RootFact[I,:,J,K] * 1000 * th * self.var.dz_xy[I,:,J,K]
+
+        # Sum over compartments in order, as np.sum does for the full array
+        Wr = np.copy(Wr_comp[:,0])
+        for comp in range(1, Wr_comp.shape[1]):
+            Wr += Wr_comp[:,comp]
+        return Wr
+
+    def static_storage_changed(self):
+        """Function to identify cells in which storages which do not depend
+        on the water content must be recomputed
+        """
+        return value_changed(self.var.RootDepth, self.RootDepthPrev)
+
+    def update_static_storage(self, I, J, K):
+        self.WrS[I,J,K] = self.root_zone_storage(self.var.th_s_comp[I,:,J,K], I, J, K)
+        self.WrFC[I,J,K] = self.root_zone_storage(self.var.th_fc_comp[I,:,J,K], I, J, K)
+        self.WrWP[I,J,K] = self.root_zone_storage(self.var.th_wp_comp[I,:,J,K], I, J, K)
+        self.WrDry[I,J,K] = self.root_zone_storage(self.var.th_dry_comp[I,:,J,K], I, J, K)
 
     def dynamic(self):
         """Function to calculate actual and total available water in the 
         root zone at current time step
         """
-        self.fraction_of_compartment_in_root_zone()
-
-        # Water storages in root zone (mm) - initially compute value in each
-        # compartment, then sum to get overall root zone storages
-        Wr_comp = self.var.RootFact * 1000 * self.var.th * self.var.dz_xy
-        WrS_comp = self.var.RootFact * 1000 * self.var.th_s_comp * self.var.dz_xy
-        WrFC_comp = self.var.RootFact * 1000 * self.var.th_fc_comp * self.var.dz_xy
-        WrWP_comp = self.var.RootFact * 1000 * self.var.th_wp_comp * self.var.dz_xy
-        WrDry_comp = self.var.RootFact * 1000 * self.var.th_dry_comp * self.var.dz_xy
-        
-        Wr = np.sum(Wr_comp, axis=1)
+        # Calculate root zone water content and available water
+        rootdepth = np.maximum(self.var.Zmin, self.var.Zroot)
+        rootdepth = np.round(rootdepth * 100) / 100
+        self.var.RootDepth = rootdepth
+
+        # Water storages in root zone (mm) - storages which depend only on
+        # the root depth are recomputed where the root depth has changed
+        static_changed = self.static_storage_changed()
+        if np.any(static_changed):
+            I,J,K = np.nonzero(static_changed)
+            self.fraction_of_compartment_in_root_zone(I,J,K)
+            self.update_static_storage(I,J,K)
+            self.RootDepthPrev = np.copy(rootdepth)
+
+        # Actual storage is recomputed where the root depth or the water
+        # content has changed since the previous call
+        th_changed = static_changed | self.var.thChanged
+        if np.any(th_changed):
+            I,J,K = np.nonzero(th_changed)
+            self.WrAct[I,J,K] = self.root_zone_storage(self.var.th[I,:,J,K], I, J, K)
+            self.var.thChanged[:] = False
+
+        Wr = np.copy(self.WrAct)
         Wr[Wr < 0] = 0
-        WrS = np.sum(WrS_comp, axis=1)
-        WrFC = np.sum(WrFC_comp, axis=1)
-        WrWP = np.sum(WrWP_comp, axis=1)
-        WrDry = np.sum(WrDry_comp, axis=1)
+        WrS = self.WrS
+        WrFC = self.WrFC
+        WrWP = self.WrWP
+        WrDry = self.WrDry
 
         # Convert depths to m3/m3
         self.var.thRZ_Act = np.divide(Wr, self.var.RootDepth * 1000, out=np.zeros_like(Wr), where=self.var.RootDepth!=0)
@@ -83,11 +134,24 @@ class AQRootZoneWater(RootZoneWater):
     def initial(self):
         super(AQRootZoneWater, self).initial()
         self.var.thRZ_Aer = np.zeros_like(self.var.thRZ_Act)
+        self.AerPrev = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), np.inf)
+        self.WrAer = np.zeros_like(self.AerPrev)
+
+    def static_storage_changed(self):
+        # Aeration stress threshold is a crop parameter, which may change
+        # between seasons
+        changed = super(AQRootZoneWater, self).static_storage_changed()
+        return changed | value_changed(self.var.Aer, self.AerPrev)
+
+    def update_static_storage(self, I, J, K):
+        super(AQRootZoneWater, self).update_static_storage(I, J, K)
+        th_aer = self.var.th_s_comp[I,:,J,K] - (self.var.Aer[I,J,K][:,None] / 100)
+        self.WrAer[I,J,K] = self.root_zone_storage(th_aer, I, J, K)
+        self.AerPrev = np.copy(self.var.Aer)
 
     def dynamic(self):
         super(AQRootZoneWater, self).dynamic()
-        WrAer_comp = self.var.RootFact * 1000 * (self.var.th_s_comp - (self.var.Aer / 100)) * self.var.dz_xy
-        WrAer = np.sum(WrAer_comp, axis=1)
+        WrAer = self.WrAer
         self.var.thRZ_Aer = np.divide(WrAer, self.var.RootDepth * 1000, out=np.zeros_like(WrAer), where=self.var.RootDepth!=0)
         
         
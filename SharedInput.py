@@ -0,0 +1,275 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import datetime
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray, RawValue
+
+import numpy as np
+import netCDF4 as nc
+
+import VirtualOS as vos
+from CurrTimeStep import ModelTime
+
+import logging
+logger = logging.getLogger(__name__)
+
+def fork_context():
+    """Function to get the multiprocessing context which starts processes
+    by forking. Worker processes only inherit the shared memory, and the
+    module variables which refer to it (e.g. VirtualOS.sharedcache), if
+    they are forked: with spawn or forkserver they would silently read
+    their input from file instead.
+
+    Returns:
+      multiprocessing context (the multiprocessing module in Python 2,
+      which always forks)
+    """
+    try:
+        return multiprocessing.get_context('fork')
+    except AttributeError:
+        return multiprocessing
+
+def shared_array(shape, dtype):
+    """Function to allocate an array in shared memory. Worker
+    processes forked after the allocation map the same memory.
+
+    Args:
+      shape : shape of the array
+      dtype : numpy data type
+
+    Returns:
+      numpy array backed by shared memory
+    """
+    nbytes = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+    raw = RawArray('b', nbytes)
+    return np.frombuffer(raw, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+class SharedInput(object):
+    """Class to read static parameters and daily forcing once per node
+    for several worker processes running on part of the clone map (e.g.
+    tiles). Parameters are read by the main process into shared memory
+    before the workers are started. Daily forcing is read by a loader
+    process into a ring buffer of shared memory slots, each of which
+    holds one day of every forcing variable.
+
+    Protocol: the loader fills the slot of a day once all readers have
+    released the day which previously occupied the slot, then sets the
+    number of readers of the slot. A reader waits until its slot holds
+    the requested day, and releases the day when it asks for a later one
+    (or at the end of the run), so each worker must read the forcing of
+    every day in order. Workers map the shared arrays as read
+    only views, and copy the window they simulate.
+    """
+
+    def __init__(self, configuration, nReaders):
+        self.configuration = configuration
+        self.nReaders = nReaders
+        self.nSlots = max(int(configuration.globalOptions['sharedInputSlots']), 1)
+        self.cloneMap = configuration.cloneMap
+
+        self.modelTime = ModelTime()
+        self.modelTime.getStartEndTimeSteps(configuration.globalOptions['startTime'],
+                                            configuration.globalOptions['endTime'],
+                                            showNumberOfTimeSteps=False)
+        self.nDays = self.modelTime.nrOfTimeSteps
+
+        self.parameters = {}
+        self.forcing = {}
+        self.window = None
+        self.loader = None
+
+    def parameter_files(self):
+        files = [self.configuration.globalOptions['initialConditionNC'],
+                 self.configuration.soilOptions['soilAndTopoNC'],
+                 self.configuration.cropOptions['cropParameterNC'],
+                 self.configuration.cropOptions['cropPresenceNC'],
+                 self.configuration.irrMgmtOptions['irrMgmtParameterNC'],
+                 self.configuration.fieldMgmtOptions['fieldMgmtParameterNC']]
+        return sorted(set([f for f in files if f != "None"]))
+
+    def forcing_files(self):
+        """Function to get the forcing files which can be shared, which
+        are the meteorological files indexed by date
+        """
+        files = []
+        options = self.configuration.meteoOptions
+        for item, method in [('precipitationNC','time_index_method_for_precipitation_netcdf'),
+                             ('temperatureNC','time_index_method_for_temperature_netcdf'),
+                             ('refETPotFileNC','time_index_method_for_ref_pot_et_netcdf')]:
+            if options[item] == "None":
+                continue
+            if method in options.keys() and options[method] != "None":
+                continue
+            files.append(options[item])
+        return sorted(set(files))
+
+    def spatial_variables(self, ncFile, time):
+        """Function to list the variables of a netCDF file with spatial
+        dimensions, with (time = True) or without a time dimension
+        """
+        f = nc.Dataset(ncFile)
+        names = []
+        for name, var in f.variables.items():
+            if len(var.dimensions) < 2 or var.dimensions[-2:] not in [('lat','lon'),('latitude','longitude')]:
+                continue
+            if ('time' in var.dimensions) == time:
+                names.append((str(name), tuple([dim for dim in var.dimensions if dim != 'time'])))
+        f.close()
+        return names
+
+    def load_parameters(self):
+        """Function to read the static parameters into shared memory"""
+        for ncFile in self.parameter_files():
+            for varName, dims in self.spatial_variables(ncFile, False):
+                d = vos.netcdf2PCRobjCloneWithoutTime(ncFile, varName, cloneMapFileName=self.cloneMap)
+                entry = {'masked' : isinstance(d, np.ma.MaskedArray), 'dims' : dims}
+                entry['data'] = shared_array(d.shape, d.dtype)
+                entry['data'][:] = np.ma.getdata(d)
+                entry['mask'] = shared_array(d.shape, bool)
+                entry['mask'][:] = np.ma.getmaskarray(d)
+                self.parameters[(ncFile, varName)] = entry
+        logger.info('Read %i parameters into shared memory (%.0f MB)', len(self.parameters),
+                    sum([e['data'].nbytes + e['mask'].nbytes for e in self.parameters.values()]) / 1024. ** 2)
+
+        # don't share open files with the worker processes
+        for f in vos.filecache.values():
+            f.close()
+        vos.filecache.clear()
+
+    def allocate_forcing(self):
+        """Function to allocate the ring buffer for the daily forcing"""
+        self.modelTime.update(1)
+        for ncFile in self.forcing_files():
+            for varName, dims in self.spatial_variables(ncFile, True):
+                d = vos.netcdf2PCRobjClone(ncFile, varName, str(self.modelTime.fulldate), cloneMapFileName=self.cloneMap)
+                entry = {'masked' : isinstance(d, np.ma.MaskedArray), 'dims' : dims, 'key' : (ncFile, varName)}
+                entry['data'] = shared_array((self.nSlots,) + d.shape, d.dtype)
+                entry['mask'] = shared_array((self.nSlots,) + d.shape, bool)
+                self.forcing[(ncFile, varName)] = entry
+
+            # netcdf2PCRobjClone reads evapotranspiration from the variable
+            # referencePotET if the file has no variable evapotranspiration
+            if (ncFile, 'referencePotET') in self.forcing and (ncFile, 'evapotranspiration') not in self.forcing:
+                self.forcing[(ncFile, 'evapotranspiration')] = self.forcing[(ncFile, 'referencePotET')]
+
+        for f in vos.filecache.values():
+            f.close()
+        vos.filecache.clear()
+
+        self.slotDay = RawArray('l', [-1] * self.nSlots)
+        self.slotReaders = RawArray('i', [0] * self.nSlots)
+        self.loaderFailed = RawValue('i', 0)
+        self.condition = fork_context().Condition()
+
+    def start(self):
+        self.load_parameters()
+        self.allocate_forcing()
+        self.loader = fork_context().Process(target=self.load_forcing)
+        self.loader.daemon = True
+        self.loader.start()
+
+    def stop(self):
+        if self.loader is not None:
+            self.loader.join(1)
+            if self.loader.is_alive():
+                self.loader.terminate()
+            self.loader = None
+
+    def load_forcing(self):
+        """Function to read the daily forcing (in the loader process)"""
+        try:
+            # variables read under two names are only read once
+            entries = [entry for key, entry in self.forcing.items() if entry['key'] == key]
+            for day in range(self.nDays):
+                slot = day % self.nSlots
+                with self.condition:
+                    while self.slotReaders[slot] > 0:
+                        self.condition.wait()
+
+                self.modelTime.update(day + 1)
+                for entry in entries:
+                    ncFile, varName = entry['key']
+                    d = vos.netcdf2PCRobjClone(ncFile, varName, str(self.modelTime.fulldate), cloneMapFileName=self.cloneMap)
+                    entry['data'][slot] = np.ma.getdata(d)
+                    entry['mask'][slot] = np.ma.getmaskarray(d)
+
+                with self.condition:
+                    self.slotDay[slot] = day
+                    self.slotReaders[slot] = self.nReaders
+                    self.condition.notify_all()
+        except:
+            with self.condition:
+                self.loaderFailed.value = 1
+                self.condition.notify_all()
+            raise
+
+    def set_window(self, rows, cols):
+        """Function to set the window of the clone map simulated by a
+        worker process, which from then on reads its input from shared
+        memory
+
+        Args:
+          rows : (start, end) latitude rows of the window
+          cols : (start, end) longitude columns of the window
+        """
+        self.window = (slice(rows[0], rows[1]), slice(cols[0], cols[1]))
+        self.day = None
+        self.lastDay = -1
+        for entry in list(self.parameters.values()) + list(self.forcing.values()):
+            entry['data'].flags.writeable = False
+            entry['mask'].flags.writeable = False
+
+    def copy_window(self, entry, slot = Ellipsis):
+        # NB the full clone map is read into shared memory, so the crops
+        # simulated by the worker are selected here
+        index = (Ellipsis,) + self.window
+        data = np.array(vos.select_crops(entry['data'][slot][index], entry['dims']))
+        if entry['masked']:
+            return np.ma.masked_array(data, mask=np.array(vos.select_crops(entry['mask'][slot][index], entry['dims'])))
+        return data
+
+    def get_parameter(self, ncFile, varName):
+        """Function to get the window of a static parameter, or None if
+        the parameter is not held in shared memory
+        """
+        if self.window is None or (ncFile, varName) not in self.parameters:
+            return None
+        return self.copy_window(self.parameters[(ncFile, varName)])
+
+    def get_forcing(self, ncFile, varName, dateInput):
+        """Function to get the window of a forcing variable on a given
+        date, or None if it is not held in shared memory
+        """
+        if self.window is None or (ncFile, varName) not in self.forcing:
+            return None
+        date = dateInput
+        if not isinstance(date, str):
+            date = '%04i-%02i-%02i' % (date.year, date.month, date.day)
+        date = datetime.datetime.strptime(date[:10], '%Y-%m-%d').date()
+        day = (date - self.modelTime.startTime).days
+        if day < self.lastDay or day >= self.nDays:
+            return None
+
+        slot = day % self.nSlots
+        if day != self.day:
+            self.release()
+            with self.condition:
+                while self.slotDay[slot] != day:
+                    if self.loaderFailed.value:
+                        raise RuntimeError('The shared forcing loader failed')
+                    self.condition.wait()
+            self.day = day
+            self.lastDay = day
+        return self.copy_window(self.forcing[(ncFile, varName)], slot)
+
+    def release(self):
+        """Function to release the day held by a worker process"""
+        if self.window is None or self.day is None:
+            return
+        with self.condition:
+            self.slotReaders[self.day % self.nSlots] -= 1
+            self.condition.notify_all()
+        self.day = None
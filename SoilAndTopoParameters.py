@@ -37,6 +37,7 @@ class SoilAndTopoParameters(object):
         # self.var.soilAndTopoFileNC = self.var._configuration.soilOptions['soilAndTopoNC']
         # self.read()
         self.compute_capillary_rise_parameters()
+        self.compute_compartment_fraction_tables()
 
     def read(self):		
         self.readTopo()
@@ -190,5 +191,49 @@ class SoilAndTopoParameters(object):
         self.var.aCR_comp = self.var.aCR[:,self.var.layerIndex,...]
         self.var.bCR_comp = self.var.bCR[:,self.var.layerIndex,...]
 
+    def compute_compartment_fraction_tables(self):
+        """Function to tabulate the fraction of each compartment covered
+        by a soil layer extending from the surface to a given depth. Depths
+        are rounded to the nearest mm, so the tables have one row for each
+        mm between the surface and the bottom of the soil profile.
+        """
+        nmm = int(np.round(self.var.dzsum[-1] * 1000))
+        depth = (np.arange(nmm + 1) / 1000.)[:,None]
+        dz = self.var.dz[None,:]
+        dzsum = self.var.dzsum[None,:]
+
+        # Fraction of compartment covered by the layer (used for the root
+        # zone and the evaporation layer)
+        comp_sto = (np.round((dzsum - dz) * 1000) < np.round(depth * 1000))
+        factor = 1 - ((dzsum - depth) / dz)
+        self.var.CompFrac = np.clip(factor, 0, 1) * comp_sto
+
+        # Compartment in which the bottom of the layer is located
+        self.var.CompIdx = np.clip(np.sum(comp_sto, axis=1) - 1, 0, None)
+
+        # Germination only considers compartments which are entirely
+        # within the top soil layer
+        comp_sto = (np.round(dzsum * 1000) <= np.round(depth * 1000))
+        factor = 1. - np.round(((dzsum - depth) / dz), 3)
+        self.var.CompFracGerm = np.clip(factor, 0, 1) * comp_sto
+
+    def compartment_fraction(self, depth, table=None):
+        """Function to look up the fraction of each compartment covered
+        by a soil layer extending from the surface to depth (m)
+
+        Args:
+          depth : array of layer depths with dimensions (crop, lat, lon)
+                  or (cell)
+          table : compartment fraction table (default CompFrac)
+
+        Returns:
+          array with dimensions (crop, comp, lat, lon) or (cell, comp)
+        """
+        if table is None:
+            table = self.var.CompFrac
+        idx = np.nan_to_num(np.round(depth * 1000))
+        idx = np.clip(idx, 0, table.shape[0] - 1).astype(np.int64)
+        return np.ascontiguousarray(np.moveaxis(table[idx], -1, 1))
+
     def dynamic(self):
         pass
@@ -39,31 +39,111 @@ class SoilEvaporation(object):
         self.var.Wevap_Wp = np.copy(arr_zeros)
         self.var.Wevap_Dry = np.copy(arr_zeros)
 
+        # Fraction of compartments covered by the minimum evaporation layer,
+        # from which water is extracted (compartments partly covered by the
+        # layer have a non-zero fraction)
+        self.EvapZminFact = self.var.soil_parameters_module.compartment_fraction(self.var.EvapZmin)
+        self.EvapZminComp = np.sum((self.EvapZminFact > 0), axis=1)
+
+        # Storages at saturation, field capacity, wilting point and air dry
+        # in and above each compartment, from which the storage in an
+        # evaporation layer of any thickness is interpolated
+        self.Wsat = self.compartment_storage(self.var.th_s_comp, self.var.dz_xy)
+        self.Wfc = self.compartment_storage(self.var.th_fc_comp, self.var.dz_xy)
+        self.Wwp = self.compartment_storage(self.var.th_wp_comp, self.var.dz_xy)
+        self.Wdry = self.compartment_storage(self.var.th_dry_comp, self.var.dz_xy)
+        self.EvapZPrev = np.full_like(arr_zeros, np.inf)
+
+        # Number of sub-daily time steps for stage 2 evaporation and, if
+        # adaptive time steps are used, tolerance (mm/day)
+        self.EvapTimeSteps = int(self.var._configuration.soilOptions['EvapTimeSteps'])
+        self.EvapTolerance = None
+        if self.var._configuration.soilOptions['EvapTolerance'] != "None":
+            self.EvapTolerance = float(self.var._configuration.soilOptions['EvapTolerance'])
+
     def reset_initial_conditions(self):
         pass
 
+    def compartment_storage(self, th, dz):
+        """Function to calculate the water storage (mm) in each compartment
+        and the cumulative storage above each compartment
+
+        Args:
+          th : water content with dimensions (crop, comp, lat, lon) or
+               (cell, comp)
+          dz : compartment thickness (m) which broadcasts against th
+
+        Returns:
+          tuple of storage in compartment and storage above compartment,
+          with compartments along the last axis
+        """
+        W = np.ascontiguousarray(np.moveaxis(1000 * th * dz, 1, -1))
+        Wabove = np.zeros_like(W)
+        np.cumsum(W[...,:-1], axis=-1, out=Wabove[...,1:])
+        return W, Wabove
+
+    def depth_index(self, depth, row):
+        """Function to locate the compartment containing depth (m)
+
+        Args:
+          depth : array of depths
+          row   : array of the same dimensions as depth giving the index
+                  of the cell along the leading axes of the storage arrays
+
+        Returns:
+          tuple of cell index, index of the compartment containing depth
+          and fraction of the compartment covered
+        """
+        nmm = self.var.CompFrac.shape[0] - 1
+        mm = np.clip(np.nan_to_num(np.round(depth * 1000)), 0, nmm).astype(np.int64)
+        comp = self.var.CompIdx[mm]
+        factor = self.var.CompFrac[mm,comp]
+        return row, comp, factor
+
+    def storage_to_depth(self, storage, index):
+        """Function to calculate the water storage (mm) between the soil
+        surface and a given depth by interpolating the cumulative storage
+        between the top and bottom of the compartment containing depth
+
+        Args:
+          storage : tuple returned by compartment_storage
+          index   : tuple returned by depth_index
+
+        Returns:
+          array of water storage with the dimensions of depth
+        """
+        W, Wabove = storage
+        row, comp, factor = index
+        pos = row * W.shape[-1] + comp
+        return np.take(Wabove, pos) + factor * np.take(W, pos)
+
     def evap_layer_water_content(self):
         """Function to get water contents in the evaporation layer"""
         if np.any(self.var.GrowingSeasonDayOne):
             self.reset_initial_conditions()
-        
-        arr_ones = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))
-        dz = self.var.dz[None,:,None,None] * arr_ones[:,None,:,:]
-        dzsum = self.var.dzsum[None,:,None,None] * arr_ones[:,None,:,:]
-
-        # Find compartments covered by evaporation layer
-        evapz_comp = self.var.EvapZ[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None]
-        comp_sto = (np.round((dzsum - dz) * 1000) < np.round(evapz_comp * 1000))
-        factor = 1 - ((dzsum - evapz_comp) / dz)
-        factor = np.clip(factor, 0, 1) * comp_sto
-
-        # Water storages in evaporation layer (mm)
-        Wevap_Act = np.sum((factor * 1000 * self.var.th * dz), axis=1)
+
+        # Storages which do not depend on water content only need to be
+        # updated in cells in which the thickness of the evaporation layer
+        # has changed (or in which they were set by stage 2 evaporation);
+        # cells without data, in which EvapZ is NaN, are unchanged
+        unchanged = ((self.var.EvapZ == self.EvapZPrev) | (np.isnan(self.var.EvapZ) & np.isnan(self.EvapZPrev)))
+        changed = np.logical_not(unchanged)
+        if np.any(changed):
+            cell = np.arange(self.var.EvapZ.size).reshape(self.var.EvapZ.shape)
+            self.EvapZIndex = self.depth_index(self.var.EvapZ, cell)
+            index = tuple([x[changed] for x in self.EvapZIndex])
+            self.var.Wevap_Sat[changed] = self.storage_to_depth(self.Wsat, index)
+            self.var.Wevap_Fc[changed] = self.storage_to_depth(self.Wfc, index)
+            self.var.Wevap_Wp[changed] = self.storage_to_depth(self.Wwp, index)
+            self.var.Wevap_Dry[changed] = self.storage_to_depth(self.Wdry, index)
+            self.EvapZPrev = np.copy(self.var.EvapZ)
+
+        # Water storages in evaporation layer (mm) - compartments below
+        # the evaporation layer are not needed
+        ncomp = np.max(self.EvapZIndex[1]) + 1
+        Wact = self.compartment_storage(self.var.th[:,:ncomp,...], self.var.dz_xy[:,:ncomp,...])
+        Wevap_Act = self.storage_to_depth(Wact, self.EvapZIndex)
         self.var.Wevap_Act = np.clip(Wevap_Act, 0, None)
-        self.var.Wevap_Sat = np.sum((factor * 1000 * self.var.th_s_comp * dz), axis=1)
-        self.var.Wevap_Fc = np.sum((factor * 1000 * self.var.th_fc_comp * dz), axis=1)
-        self.var.Wevap_Wp = np.sum((factor * 1000 * self.var.th_wp_comp * dz), axis=1)
-        self.var.Wevap_Dry = np.sum((factor * 1000 * self.var.th_dry_comp * dz), axis=1)
 
     def prepare_stage_two_evaporation(self):
         self.evap_layer_water_content()
@@ -132,63 +212,276 @@ class SoilEvaporation(object):
         EsPotMul[cond112] = (EsPot * (1 - self.var.fMulch * (self.var.MulchPctOS / 100)))[cond112]
         return EsPotMul
 
-    def extract_water(self, ToExtract, ToExtractStg):
-        arr_ones = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))
-        arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
-        dz = self.var.dz[None,:,None,None] * arr_ones[:,None,:,:]
-        dzsum = self.var.dzsum[None,:,None,None] * arr_ones[:,None,:,:]
-
-        # Determine fraction of compartments covered by evaporation layer
-        evapzmin_comp = self.var.EvapZmin[:,None,:,:] * np.ones((self.var.nComp))[None,:,None,None]
-        comp_sto = (np.round((dzsum - dz) * 1000) < np.round(evapzmin_comp * 1000))
-        factor = 1 - ((dzsum - evapzmin_comp) / dz)
-        factor = np.clip(factor, 0, 1) * comp_sto
-
-        comp_sto = np.sum(comp_sto, axis=1)
+    def extract_water(self, th, th_dry, factor, comp_sto, EsAct, ToExtract, ToExtractStg):
+        """Function to extract water from the compartments covered by the
+        evaporation layer. Arrays have compartments along the second axis,
+        i.e. (crop, comp, lat, lon) or (cell, comp), and th, EsAct,
+        ToExtract and ToExtractStg are updated in place.
+        """
         comp = 0
         while np.any((comp < comp_sto) & (ToExtractStg > 0) & (ToExtract > 0)):
 
             cond101 = ((comp < comp_sto) & (ToExtractStg > 0) & (ToExtract > 0))
 
             # Water available in compartment for extraction (mm)
-            Wdry = 1000 * self.var.th_dry_comp[:,comp,...] * dz[:,comp,...]  
-            W = 1000 * self.var.th[:,comp,...] * dz[:,comp,...]
-            AvW = np.copy(arr_zeros)
+            dz = self.var.dz[comp]
+            Wdry = 1000 * th_dry[:,comp,...] * dz
+            W = 1000 * th[:,comp,...] * dz
+            AvW = np.zeros_like(ToExtract)
             AvW[cond101] = ((W - Wdry) * factor[:,comp,...])[cond101]
             AvW = np.clip(AvW, 0, None)
 
             # Determine amount by which to adjust variables
             cond1011 = (cond101 & (AvW >= ToExtractStg))
-            self.var.EsAct[cond1011] += ToExtractStg[cond1011]
+            EsAct[cond1011] += ToExtractStg[cond1011]
             W[cond1011] -= ToExtractStg[cond1011]
             ToExtract[cond1011] -= ToExtractStg[cond1011]
             ToExtractStg[cond1011] = 0
 
             cond1012 = (cond101 & np.logical_not(cond1011))
-            self.var.EsAct[cond1012] += AvW[cond1012]
+            EsAct[cond1012] += AvW[cond1012]
             W[cond1012] -= AvW[cond1012]
             ToExtract[cond1012] -= AvW[cond1012]
             ToExtractStg[cond1012] -= AvW[cond1012]
 
             # Update water content
-            self.var.th[:,comp,...][cond101] = (W / (1000 * dz[:,comp,...]))[cond101]
+            th[:,comp,...][cond101] = (W / (1000 * dz))[cond101]
             comp += 1
 
-    def relative_depletion(self):
-
-        # Get current water storage
-        self.evap_layer_water_content()
+    def compute_relative_depletion(self, Wevap_Act, Wevap_Sat, Wevap_Fc, Wevap_Dry, Wstage2, REW):
 
         # Get water storage (mm) at start of stage 2 evaporation
-        Wupper = (self.var.Wstage2 * (self.var.Wevap_Sat - (self.var.Wevap_Fc - self.var.REW)) + (self.var.Wevap_Fc - self.var.REW))
+        Wupper = (Wstage2 * (Wevap_Sat - (Wevap_Fc - REW)) + (Wevap_Fc - REW))
         # Get water storage (mm) when there is no evaporation
-        Wlower = np.copy(self.var.Wevap_Dry)
+        Wlower = np.copy(Wevap_Dry)
         # Get relative depletion of evaporation storage in stage 2
-        Wrel_divd = (self.var.Wevap_Act - Wlower)
+        Wrel_divd = (Wevap_Act - Wlower)
         Wrel_divs = (Wupper - Wlower)
         Wrel = np.divide(Wrel_divd, Wrel_divs, out=np.zeros_like(Wrel_divs), where=Wrel_divs!=0)
         return Wrel, Wlower, Wupper    
-            
+
+    def expand_evaporation_layer(self, EvapZ, Wact, Wsat, Wfc, Wdry, EvapZmin, EvapZmax, fWrelExp, Wstage2, REW, block=16):
+        """Function to expand the evaporation layer, 1 mm at a time, until
+        the relative depletion is no longer below the threshold for
+        expansion or the layer reaches its maximum thickness. Rather than
+        recomputing the storage after each mm, the next block of candidate
+        depths is tested for all expanding cells at once, so the number of
+        array operations is bounded by the maximum expansion divided by
+        the block size. All arrays have dimensions (cell) or (cell, comp),
+        and EvapZ is updated in place.
+        """
+        EvapZmin = EvapZmin[:,None]
+        EvapZmax = EvapZmax[:,None]
+        fWrelExp = fWrelExp[:,None]
+        Wstage2 = Wstage2[:,None]
+        REW = REW[:,None]
+        cells = np.arange(EvapZ.size)
+
+        while cells.size > 0:
+
+            # Candidate depths, obtained by repeatedly adding 1 mm
+            z = np.concatenate((EvapZ[cells][:,None], np.full((cells.size, block), 0.001)), axis=1)
+            z = np.cumsum(z, axis=1)[:,1:]
+
+            # Water storages (mm) in evaporation layer for candidate depths
+            index = self.depth_index(z, cells[:,None])
+            Wevap_Act = self.storage_to_depth(Wact, index)
+            Wevap_Act = np.clip(Wevap_Act, 0, None)
+            Wevap_Sat = self.storage_to_depth(Wsat, index)
+            Wevap_Fc = self.storage_to_depth(Wfc, index)
+            Wevap_Dry = self.storage_to_depth(Wdry, index)
+
+            Wrel, Wlower, Wupper = self.compute_relative_depletion(
+                Wevap_Act, Wevap_Sat, Wevap_Fc, Wevap_Dry, Wstage2[cells], REW[cells])
+            Wcheck = (fWrelExp[cells] * ((EvapZmax[cells] - z) / (EvapZmax[cells] - EvapZmin[cells])))
+            expand = ((Wrel < Wcheck) & (z < EvapZmax[cells]))
+
+            # Layer stops expanding at the first candidate depth at which
+            # the expansion criterion is no longer met
+            stop = np.logical_not(np.all(expand, axis=1))
+            first = np.argmin(expand, axis=1)
+            EvapZ[cells[stop]] = z[stop,first[stop]]
+            EvapZ[cells[~stop]] = z[~stop,-1]
+            cells = cells[~stop]
+
+    def layer_storages(self, Wact, Wsat, Wfc, Wwp, Wdry, EvapZ):
+        """Function to get water storages (mm) in the evaporation layer from
+        compartment storages with dimensions (cell, comp)"""
+        index = self.depth_index(EvapZ, np.arange(EvapZ.size))
+        Wevap_Act = np.clip(self.storage_to_depth(Wact, index), 0, None)
+        return np.array([
+            Wevap_Act,
+            self.storage_to_depth(Wsat, index),
+            self.storage_to_depth(Wfc, index),
+            self.storage_to_depth(Wwp, index),
+            self.storage_to_depth(Wdry, index)])
+
+    def stage_two_relative_depletion(self, th, EvapZ, Wsat, Wfc, Wwp, Wdry, EvapZmin, EvapZmax, fWrelExp, Wstage2, REW):
+        """Function to get the relative depletion of the evaporation layer,
+        after expanding the layer if necessary. All arrays have dimensions
+        (cell) or (cell, comp), and EvapZ is updated in place.
+
+        Returns:
+          tuple of relative depletion and array of storages in the
+          evaporation layer (actual, saturation, field capacity, wilting
+          point, air dry)
+        """
+        Wact = self.compartment_storage(th, self.var.dz)
+        Wevap = self.layer_storages(Wact, Wsat, Wfc, Wwp, Wdry, EvapZ)
+        Wrel, Wlower, Wupper = self.compute_relative_depletion(Wevap[0], Wevap[1], Wevap[2], Wevap[4], Wstage2, REW)
+
+        # Check if need to expand evaporative layer
+        cond111 = (EvapZmax > EvapZmin)
+        Wcheck = (fWrelExp * np.divide((EvapZmax - EvapZ), (EvapZmax - EvapZmin), out=np.zeros_like(EvapZ), where=cond111))
+        cond1111 = (cond111 & (Wrel < Wcheck) & (EvapZ < EvapZmax))
+        if np.any(cond1111):
+
+            # Expand evaporation layer
+            z = EvapZ[cond1111]
+            self.expand_evaporation_layer(
+                z,
+                [W[cond1111] for W in Wact],
+                [W[cond1111] for W in Wsat],
+                [W[cond1111] for W in Wfc],
+                [W[cond1111] for W in Wdry],
+                EvapZmin[cond1111], EvapZmax[cond1111], fWrelExp[cond1111],
+                Wstage2[cond1111], REW[cond1111])
+            EvapZ[cond1111] = z
+
+            # Recalculate current water storage for new EvapZ
+            Wevap = self.layer_storages(Wact, Wsat, Wfc, Wwp, Wdry, EvapZ)
+            Wrel, Wlower, Wupper = self.compute_relative_depletion(Wevap[0], Wevap[1], Wevap[2], Wevap[4], Wstage2, REW)
+
+        return Wrel, Wevap
+
+    def reduction_coefficient(self, Wrel, fevap):
+        """Function to get stage 2 evaporation reduction coefficient"""
+        Kr = ((np.exp(fevap * Wrel) - 1) / (np.exp(fevap) - 1))
+        Kr = np.clip(Kr, None, 1)
+        return Kr
+
+    def stage_two_evaporation(self, ToExtract):
+        """Function to extract water by stage 2 evaporation in cells in which
+        evaporative demand remains after stage 1 evaporation. The day is
+        split into EvapTimeSteps sub-daily time steps or, if a tolerance is
+        given (soilOptions:EvapTolerance), into adaptive time steps.
+        """
+        cond11 = (ToExtract > 0)
+        if not np.any(cond11):
+            return
+
+        # Work on the cells which need stage 2 evaporation only
+        I,J,K = np.nonzero(cond11)
+        th = self.var.th[I,:,J,K]
+        th_dry = self.var.th_dry_comp[I,:,J,K]
+        factor = self.EvapZminFact[I,:,J,K]
+        comp_sto = self.EvapZminComp[I,J,K]
+        static = [[W[I,J,K] for W in storage] for storage in (self.Wsat, self.Wfc, self.Wwp, self.Wdry)]
+        params = [x[I,J,K] for x in (self.var.EvapZmin, self.var.EvapZmax, self.var.fWrelExp, self.var.Wstage2, self.var.REW)]
+        fevap = self.var.fevap[I,J,K]
+        EvapZ = self.var.EvapZ[I,J,K]
+        EsAct = self.var.EsAct[I,J,K]
+        ToExtract = ToExtract[I,J,K]
+
+        if self.EvapTolerance is None:
+
+            # Fixed sub-daily time steps
+            Edt = ToExtract / self.EvapTimeSteps
+            for jj in range(self.EvapTimeSteps):
+
+                # Get relative depletion, expanding evaporation layer if
+                # necessary
+                Wrel, Wevap = self.stage_two_relative_depletion(th, EvapZ, *(static + params))
+
+                # Get stage 2 evaporation reduction coefficient and extract
+                # water
+                Kr = self.reduction_coefficient(Wrel, fevap)
+                ToExtractStg2 = (Kr * Edt)
+                self.extract_water(th, th_dry, factor, comp_sto, EsAct, ToExtract, ToExtractStg2)
+
+        else:
+            Wevap = self.adaptive_stage_two_evaporation(
+                th, th_dry, factor, comp_sto, static, params, fevap, EvapZ, EsAct, ToExtract)
+
+        self.var.th[I,:,J,K] = th
+        self.var.thChanged[I,J,K] = True
+        self.var.EvapZ[I,J,K] = EvapZ
+        self.var.EsAct[I,J,K] = EsAct
+
+        # Storages in evaporation layer at the start of the final time step
+        self.var.Wevap_Act[I,J,K] = Wevap[0]
+        self.var.Wevap_Sat[I,J,K] = Wevap[1]
+        self.var.Wevap_Fc[I,J,K] = Wevap[2]
+        self.var.Wevap_Wp[I,J,K] = Wevap[3]
+        self.var.Wevap_Dry[I,J,K] = Wevap[4]
+        self.EvapZPrev[I,J,K] = np.inf
+
+    def adaptive_stage_two_evaporation(self, th, th_dry, factor, comp_sto, static, params, fevap, EvapZ, EsAct, ToExtract):
+        """Function to extract water by stage 2 evaporation using adaptive
+        time steps. The error of each step is estimated from the change in
+        the evaporation reduction coefficient Kr over the step; steps
+        whose error exceeds the tolerance (mm/day) are repeated with a
+        shorter time step, and the next time step is lengthened where Kr
+        is nearly constant. Time steps are between 1/(4 * EvapTimeSteps)
+        and 1 day. Arrays have dimensions (cell) or (cell, comp) and th,
+        EvapZ, EsAct and ToExtract are updated in place.
+        """
+        tol = self.EvapTolerance
+        hmin = 1. / (4 * self.EvapTimeSteps)
+        Edaily = np.copy(ToExtract)
+        t = np.zeros_like(ToExtract)
+        h = np.full_like(ToExtract, 1. / self.EvapTimeSteps)
+
+        # Reduction coefficient and storages in evaporation layer at the
+        # start of the current step, and at the start of the latest
+        # accepted step
+        Wrel, Wstart = self.stage_two_relative_depletion(th, EvapZ, *(static + params))
+        Kr = self.reduction_coefficient(Wrel, fevap)
+        Wevap = np.copy(Wstart)
+
+        cells = np.arange(ToExtract.size)
+        while cells.size > 0:
+
+            hs = np.minimum(h[cells], 1 - t[cells])
+            th_c = th[cells]
+            EvapZ_c = EvapZ[cells]
+            EsAct_c = EsAct[cells]
+            ToExtract_c = ToExtract[cells]
+            static_c = [[W[cells] for W in storage] for storage in static]
+            params_c = [x[cells] for x in params]
+
+            # Take an explicit step with the reduction coefficient at the
+            # start of the step
+            ToExtractStg2 = (Kr[cells] * Edaily[cells] * hs)
+            self.extract_water(th_c, th_dry[cells], factor[cells], comp_sto[cells], EsAct_c, ToExtract_c, ToExtractStg2)
+
+            # Estimate the error from the reduction coefficient at the end
+            # of the step (including any expansion of the evaporation
+            # layer), which is also the start of the next step
+            Wrel, Wend = self.stage_two_relative_depletion(th_c, EvapZ_c, *(static_c + params_c))
+            Kr_end = self.reduction_coefficient(Wrel, fevap[cells])
+            err = 0.5 * np.abs(Kr_end - Kr[cells]) * Edaily[cells] * hs
+            accept = ((err <= (tol * hs)) | (hs <= hmin))
+
+            # Keep accepted steps
+            acc = cells[accept]
+            th[acc] = th_c[accept]
+            EvapZ[acc] = EvapZ_c[accept]
+            EsAct[acc] = EsAct_c[accept]
+            ToExtract[acc] = ToExtract_c[accept]
+            Wevap[:,acc] = Wstart[:,acc]
+            Wstart[:,acc] = Wend[:,accept]
+            Kr[acc] = Kr_end[accept]
+            t[acc] += hs[accept]
+
+            # Adjust time step (error per unit time is proportional to the
+            # time step)
+            ratio = np.divide((tol * hs), err, out=np.full_like(err, 4.), where=err>0)
+            h[cells] = np.clip((hs * np.clip(0.9 * ratio, 0.2, 2)), hmin, 1)
+            cells = cells[(t[cells] < (1 - 1e-9)) & (ToExtract[cells] > 0)]
+
+        return Wevap
+
     def dynamic(self):
         
         # Add crop dimension to self.var.vars
@@ -278,7 +571,8 @@ class SoilEvaporation(object):
 
         # Extract water
         cond10 = (ExtractPotStg1 > 0)
-        self.extract_water(ToExtract, ExtractPotStg1)
+        self.extract_water(self.var.th, self.var.th_dry_comp, self.EvapZminFact, self.EvapZminComp, self.var.EsAct, ToExtract, ExtractPotStg1)
+        self.var.thChanged |= cond10
         
         # Update surface evaporation layer water balance
         self.var.Wsurf[cond10] -= self.var.EsAct[cond10]
@@ -319,53 +613,7 @@ class SoilEvaporation(object):
         # print self.var.fWrelExp[0,0,0]
 
         # Extract water
-        EvapTimeSteps = 20
-        cond11 = (ToExtract > 0)        
-        if np.any(cond11):
-            Edt = ToExtract / EvapTimeSteps
-            # Loop sub-daily time steps
-            for jj in range(EvapTimeSteps):
-
-                # Get water storage (mm) at start of stage 2 evaporation
-                Wrel, Wlower, Wupper = self.relative_depletion()
-
-                # Check if need to expand evaporative layer
-                cond111 = (cond11 & (self.var.EvapZmax > self.var.EvapZmin))
-                Wcheck = (self.var.fWrelExp * ((self.var.EvapZmax - self.var.EvapZ) / (self.var.EvapZmax - self.var.EvapZmin)))
-                while np.any(cond111 & (Wrel < Wcheck) & (self.var.EvapZ < self.var.EvapZmax)):
-                    cond1111 = (cond111 & (Wrel < Wcheck) & (self.var.EvapZ < self.var.EvapZmax))
-
-                    # Expand evaporation layer by 1mm
-                    self.var.EvapZ[cond1111] += 0.001
-
-                    # Recalculate current water storage for new EvapZ
-                    Wrel, Wlower, Wupper = self.relative_depletion()
-                    Wcheck = (self.var.fWrelExp * ((self.var.EvapZmax - self.var.EvapZ) / (self.var.EvapZmax - self.var.EvapZmin)))
-
-                # Get stage 2 evaporation reduction coefficient
-                Kr = ((np.exp(self.var.fevap * Wrel) - 1) / (np.exp(self.var.fevap) - 1))
-                Kr = np.clip(Kr, None, 1)
-
-                # Get water to extract (NB Edt is zero in cells which do not
-                # need stage 2, so no need for index)
-                # print '********'
-                # print self.var.Wevap_Act[0,0,0]
-                # print self.var.Wevap_Sat[0,0,0]
-                # print self.var.Wevap_Fc[0,0,0]
-                # print self.var.Wevap_Dry[0,0,0]
-                # print self.var.Wstage2[0,0,0]
-                # print Wrel[0,0,0]
-                # print Kr[0,0,0]
-                # print Edt[0,0,0]
-                ToExtractStg2 = (Kr * Edt)
-                # print ToExtractStg2[0,0,0]
-                self.extract_water(ToExtract, ToExtractStg2)
-                # print self.var.th[0,0,0,0]
-                # thnew, EsAct, ToExtract, ToExtractStg2 = extract_water(
-                #     thnew, th_dry, dz, dzsum, EvapZmin, EsAct, ToExtract, ToExtractStg2)
-
-        # print self.var.th[0,0,0,0]
-        # return thnew, EsAct
+        self.stage_two_evaporation(ToExtract)
 
         # Store potential evaporation for irrigation calculations on next day
         self.var.Epot = np.copy(EsPot)
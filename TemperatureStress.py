@@ -33,54 +33,66 @@ class TemperatureStress(object):
         cond22 = (cond2 & (self.var.GDD <= self.var.GDD_lo))
         self.var.Kst_Bio[cond22] = 0
         cond23 = (cond2 & np.logical_not(cond21 | cond22))
-        GDDrel_divd = (self.var.GDD - self.var.GDD_lo)
-        GDDrel_divs = (self.var.GDD_up - self.var.GDD_lo)
+        GDD_lo = self.var.GDD_lo[cond23]
+        GDDrel_divd = (self.var.GDD[cond23] - GDD_lo)
+        GDDrel_divs = (self.var.GDD_up[cond23] - GDD_lo)
         GDDrel = np.divide(GDDrel_divd, GDDrel_divs, out=np.zeros_like(GDDrel_divs), where=GDDrel_divs!=0)
         Kst_Bio_divd = (KsBio_up * KsBio_lo)
         Kst_Bio_divs = (KsBio_lo + (KsBio_up - KsBio_lo) * np.exp(-fshapeb * GDDrel))
-        self.var.Kst_Bio[cond23] = np.divide(Kst_Bio_divd, Kst_Bio_divs, out=np.zeros_like(Kst_Bio_divs), where=Kst_Bio_divs!=0)[cond23]
-        self.var.Kst_Bio[cond23] = (self.var.Kst_Bio - KsBio_lo * (1 - GDDrel))[cond23]
+        Kst_Bio = np.divide(Kst_Bio_divd, Kst_Bio_divs, out=np.zeros_like(Kst_Bio_divs), where=Kst_Bio_divs!=0)
+        self.var.Kst_Bio[cond23] = (Kst_Bio - KsBio_lo * (1 - GDDrel))
 
     def temperature_stress_heat(self, KsPol_up, KsPol_lo):
         """Function to calculate effects of heat stress on 
-        pollination
+        pollination. The coefficient is only computed during flowering
+        of crops which are sensitive to heat stress, and is equal to one
+        otherwise.
         """
-        tmax = self.var.tmax[None,:,:] * np.ones((self.var.nCrop))[:,None,None]
-        cond3 = (self.var.PolHeatStress == 0)
-        self.var.Kst_PolH[cond3] = 1
-        cond4 = (self.var.PolHeatStress == 1)
-        cond41 = (cond4 & (tmax <= self.var.Tmax_lo))
-        self.var.Kst_PolH[cond41] = 1
-        cond42 = (cond4 & (tmax >= self.var.Tmax_up))
-        self.var.Kst_PolH[cond42] = 0
-        cond43 = (cond4 & np.logical_not(cond41 | cond42))
-        Trel_divd = (tmax - self.var.Tmax_lo)
-        Trel_divs = (self.var.Tmax_up - self.var.Tmax_lo)
+        self.var.Kst_PolH.fill(1)
+        cond4 = self.var.PolHeatWindow
+        if not np.any(cond4):
+            return
+        tmax = np.broadcast_to(self.var.tmax[None,:,:], cond4.shape)[cond4]
+        Tmax_lo = self.var.Tmax_lo[cond4]
+        Tmax_up = self.var.Tmax_up[cond4]
+        Kst_PolH = np.ones_like(tmax)
+        cond41 = (tmax <= Tmax_lo)
+        cond42 = np.logical_not(cond41) & (tmax >= Tmax_up)
+        Kst_PolH[cond42] = 0
+        cond43 = np.logical_not(cond41 | cond42)
+        Trel_divd = (tmax[cond43] - Tmax_lo[cond43])
+        Trel_divs = (Tmax_up[cond43] - Tmax_lo[cond43])
         Trel = np.divide(Trel_divd, Trel_divs, out=np.zeros_like(Trel_divs), where=Trel_divs!=0)
         Kst_PolH_divd = (KsPol_up * KsPol_lo)
-        Kst_PolH_divs = (KsPol_lo + (KsPol_up - KsPol_lo) * np.exp(-self.var.fshape_b * (1 - Trel)))
-        self.var.Kst_PolH[cond43] = np.divide(Kst_PolH_divd, Kst_PolH_divs, out=np.zeros_like(Kst_PolH_divs), where=Kst_PolH_divs!=0)[cond43]
-        # return Kst_PolH
-        
+        Kst_PolH_divs = (KsPol_lo + (KsPol_up - KsPol_lo) * np.exp(-self.var.fshape_b[cond4][cond43] * (1 - Trel)))
+        Kst_PolH[cond43] = np.divide(Kst_PolH_divd, Kst_PolH_divs, out=np.zeros_like(Kst_PolH_divs), where=Kst_PolH_divs!=0)
+        self.var.Kst_PolH[cond4] = Kst_PolH
 
     def temperature_stress_cold(self, KsPol_up, KsPol_lo):
         """Function to calculate effects of cold stress on 
-        pollination
+        pollination. The coefficient is only computed during flowering
+        of crops which are sensitive to cold stress, and is equal to one
+        otherwise.
         """
-        tmin = self.var.tmin[None,:,:] * np.ones((self.var.nCrop))[:,None,None]
-        cond5 = (self.var.PolColdStress == 0)
-        self.var.Kst_PolC[cond5] = 1
-        cond6 = (self.var.PolColdStress == 1)
-        cond61 = (cond6 & (tmin >= self.var.Tmin_up))
-        self.var.Kst_PolC[cond61] = 1
-        cond62 = (cond6 & (tmin <= self.var.Tmin_lo))
-        self.var.Kst_PolC[cond62] = 0
-        Trel_divd = (self.var.Tmin_up - tmin)
-        Trel_divs = (self.var.Tmin_up - self.var.Tmin_lo)
+        self.var.Kst_PolC.fill(1)
+        cond6 = self.var.PolColdWindow
+        if not np.any(cond6):
+            return
+        tmin = np.broadcast_to(self.var.tmin[None,:,:], cond6.shape)[cond6]
+        Tmin_lo = self.var.Tmin_lo[cond6]
+        Tmin_up = self.var.Tmin_up[cond6]
+        Kst_PolC = np.ones_like(tmin)
+        cond61 = (tmin >= Tmin_up)
+        cond62 = np.logical_not(cond61) & (tmin <= Tmin_lo)
+        Kst_PolC[cond62] = 0
+        cond63 = np.logical_not(cond61 | cond62)
+        Trel_divd = (Tmin_up[cond63] - tmin[cond63])
+        Trel_divs = (Tmin_up[cond63] - Tmin_lo[cond63])
         Trel = np.divide(Trel_divd, Trel_divs, out=np.zeros_like(Trel_divs), where=Trel_divs!=0)
         Kst_PolC_divd = (KsPol_up * KsPol_lo)
-        Kst_PolC_divs = (KsPol_lo + (KsPol_up - KsPol_lo) * np.exp(-self.var.fshape_b * (1 - Trel)))
-        self.var.Kst_PolC[cond62] = np.divide(Kst_PolC_divd, Kst_PolC_divs, out=np.zeros_like(Kst_PolC_divs), where=Kst_PolC_divs!=0)[cond62]
+        Kst_PolC_divs = (KsPol_lo + (KsPol_up - KsPol_lo) * np.exp(-self.var.fshape_b[cond6][cond63] * (1 - Trel)))
+        Kst_PolC[cond63] = np.divide(Kst_PolC_divd, Kst_PolC_divs, out=np.zeros_like(Kst_PolC_divs), where=Kst_PolC_divs!=0)
+        self.var.Kst_PolC[cond6] = Kst_PolC
         
     def dynamic(self):
         """Function to calculate temperature stress coefficients"""
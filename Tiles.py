@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+class Tiles(object):
+    """Class to split the land cells of the clone map into rectangular
+    tiles, which are simulated independently, and to locate the tiles
+    in the output files of the complete clone map.
+    """
+
+    def __init__(self, landmask, nTiles, tileShape, netcdf_y_orientation_follow_cf_convention = False):
+        if tileShape not in ['rows','blocks']:
+            raise ValueError('configuration option "tileShape" should equal rows or blocks')
+        self.landmask = landmask
+        self.nLat, self.nLon = landmask.shape
+        self.nTiles = nTiles
+        self.tileShape = tileShape
+        self.netcdf_y_orientation_follow_cf_convention = netcdf_y_orientation_follow_cf_convention
+
+    def split(self, weights, n):
+        """Function to split a sequence into at most n contiguous parts
+        with approximately equal total weight
+
+        Args:
+          weights : 1D array of weights
+          n       : number of parts
+
+        Returns:
+          list of (start, end) index tuples
+        """
+        total = np.cumsum(weights)
+        if total[-1] == 0:
+            total = np.arange(1, weights.size + 1)
+        targets = total[-1] * np.arange(1, n) / float(n)
+        edges = np.searchsorted(total, targets, side='left') + 1
+        edges = np.unique(np.concatenate(([0], edges, [weights.size])))
+        return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+    def make_tiles(self):
+        """Function to split the clone map into tiles. Tile boundaries
+        are chosen so that each tile has approximately the same number
+        of land cells; each tile is then trimmed to the bounding box of
+        its land cells, and tiles without land cells are dropped. The
+        cost of a tile is the number of cells in its bounding box, since
+        the model computes every cell of its clone map.
+        """
+        if self.tileShape == 'rows':
+            nRowTiles = min(self.nTiles, self.nLat)
+            nColTiles = 1
+        else:
+            nRowTiles = int(round(np.sqrt(self.nTiles * self.nLat / float(self.nLon))))
+            nRowTiles = min(max(nRowTiles, 1), self.nTiles, self.nLat)
+            nColTiles = min(max(self.nTiles // nRowTiles, 1), self.nLon)
+
+        tiles = []
+        for r0, r1 in self.split(self.landmask.sum(axis=1), nRowTiles):
+            for c0, c1 in self.split(self.landmask[r0:r1,:].sum(axis=0), nColTiles):
+                window = self.landmask[r0:r1,c0:c1]
+                rows = np.flatnonzero(window.any(axis=1))
+                cols = np.flatnonzero(window.any(axis=0))
+                if rows.size == 0:
+                    continue
+                tile = {'rows' : (r0 + rows[0], r0 + rows[-1] + 1),
+                        'cols' : (c0 + cols[0], c0 + cols[-1] + 1)}
+                tile['cost'] = (tile['rows'][1] - tile['rows'][0]) * (tile['cols'][1] - tile['cols'][0])
+                tile['nLand'] = int(window.sum())
+                tiles.append(tile)
+
+        # start the most expensive tiles first
+        tiles.sort(key=lambda tile: tile['cost'], reverse=True)
+        for i, tile in enumerate(tiles):
+            tile['number'] = i
+            logger.info('Tile %i: rows %i-%i, columns %i-%i, %i land cells',
+                        i, tile['rows'][0], tile['rows'][1], tile['cols'][0], tile['cols'][1], tile['nLand'])
+
+        logger.info('Clone map split into %i tiles (%i land cells, %i cells computed)',
+                    len(tiles), self.landmask.sum(), sum([tile['cost'] for tile in tiles]))
+        self.tiles = tiles
+
+    def tile_window(self, tile):
+        """Function to get the position of a tile in the output files"""
+        r0, r1 = tile['rows']
+        if self.netcdf_y_orientation_follow_cf_convention:
+            r0, r1 = self.nLat - r1, self.nLat - r0
+        return {'lat' : slice(r0, r1), 'lon' : slice(tile['cols'][0], tile['cols'][1])}
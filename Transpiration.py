@@ -5,14 +5,118 @@
 
 import numpy as np
 
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    prange = range
+
 import logging
 logger = logging.getLogger(__name__)
 
+def root_uptake_kernel(th, th_s, th_fc, th_wp, th_dry, pRel, exp_pRel, exp_w, p_up, SxComp, RootFact, GrowingSeasonIndex, DaySubmerged, LagAer, Aer, AerDaysComp, dz, ToExtract, TrAct):
+    """Extract water for transpiration from the root zone one soil 
+    column at a time, and update the aeration stress counters of each 
+    compartment. Equivalent to the array version in 
+    Transpiration.dynamic. th, AerDaysComp, ToExtract and TrAct are 
+    updated in place. pRel is the relative depletion of each 
+    compartment between the upper and lower stomatal stress thresholds, 
+    exp_pRel is exp(pRel * fshape_w2) and exp_w is exp(fshape_w2); the 
+    exponentials are computed with numpy so that the column kernel and 
+    the array version agree exactly.
+    """
+    nCrop, nComp, nLat, nLon = pRel.shape
+    for n in prange(nCrop * nLat * nLon):
+        i = n // (nLat * nLon)
+        j = (n // nLon) % nLat
+        k = n % nLon
+        if not GrowingSeasonIndex[i,j,k]:
+            continue
+        thAer = Aer[i,j,k] / 100
+        for comp in range(nComp):
+            if ToExtract[i,j,k] <= 0:
+                break
+            if not (RootFact[i,comp,j,k] > 0):
+                continue
+            thc = th[i,comp,j,k]
+            ths = th_s[i,comp,j,k]
+            thfc = th_fc[i,comp,j,k]
+            thwp = th_wp[i,comp,j,k]
+            prel = pRel[i,comp,j,k]
+
+            # Stomatal water stress in compartment
+            thCrit = thfc - ((thfc - thwp) * p_up[i,j,k])
+            if thc >= thCrit:
+                KsComp = 1.
+            elif thc > thwp:
+                KsComp = 1 - ((exp_pRel[i,comp,j,k] - 1) / (exp_w[i,j,k] - 1))
+                if KsComp < 0:
+                    KsComp = 0.
+                elif KsComp > 1:
+                    KsComp = 1.
+            else:
+                KsComp = 0.
+            if thc >= thCrit or thc > thwp:
+                if prel <= 0:
+                    KsComp = 1.
+                if prel >= 1:
+                    KsComp = 0.
+
+            # Aeration stress in compartment
+            if DaySubmerged[i,j,k] >= LagAer[i,j,k]:
+                AerComp = 0.
+            elif thc > (ths - thAer):
+                AerDaysComp[i,comp,j,k] += 1
+                fAer = 1.
+                if AerDaysComp[i,comp,j,k] >= LagAer[i,j,k]:
+                    AerDaysComp[i,comp,j,k] = LagAer[i,j,k]
+                    fAer = 0.
+                AerComp = (ths - thc) / (ths - (ths - thAer))
+                if AerComp < 0:
+                    AerComp = 0.
+                divs = fAer + AerDaysComp[i,comp,j,k] - 1
+                if divs != 0:
+                    AerComp = (fAer + (AerDaysComp[i,comp,j,k] - 1) * AerComp) / divs
+                else:
+                    AerComp = 0.
+            else:
+                AerComp = 1.
+                AerDaysComp[i,comp,j,k] = 0.
+
+            # Reduce compartment sink for greatest of stomatal and aeration
+            # stress (as in the array version, this also applies in net
+            # irrigation mode)
+            Sink = (min(KsComp, AerComp) * SxComp[i,comp,j,k]) * RootFact[i,comp,j,k]
+
+            # Limit extraction to demand, and to avoid compartment water
+            # content dropping below air dry
+            ThToExtract = ((ToExtract[i,j,k] / 1000) / dz[comp])
+            if Sink > ThToExtract:
+                Sink = ThToExtract
+            if (thc - Sink) < th_dry[i,comp,j,k]:
+                Sink = thc - th_dry[i,comp,j,k]
+            if Sink < 0:
+                Sink = 0.
+
+            # Update water content, amount of water to extract and actual
+            # transpiration
+            th[i,comp,j,k] = thc - Sink
+            ToExtract[i,j,k] -= Sink * 1000 * dz[comp]
+            TrAct[i,j,k] += Sink * 1000 * dz[comp]
+
+if HAS_NUMBA:
+    root_uptake_kernel = njit(parallel=True, cache=True, error_model='numpy')(root_uptake_kernel)
+
 class Transpiration(object):
     def __init__(self, Transpiration_variable):
         self.var = Transpiration_variable
 
     def initial(self):
+
+        # Use the compiled kernel if numba is available
+        self.use_numba = HAS_NUMBA and (self.var._configuration.globalOptions['UseNumba'] == "1")
+
         arr_zeros = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         arr_ones = np.zeros((self.var.nCrop, self.var.nLat, self.var.nLon))
         self.var.Ksa_Aer = np.copy(arr_zeros)
@@ -26,9 +130,20 @@ class Transpiration(object):
         self.var.TrRatio = np.copy(arr_ones)
         self.var.DaySubmerged = np.copy(arr_zeros)
 
+        # Maximum sink term and fraction of compartment covered by root
+        # zone, with the root depth and root correction factor for which
+        # they were last computed (inf ensures that all cells are computed
+        # on the first call)
+        arr_inf = np.full((self.var.nCrop, self.var.nLat, self.var.nLon), np.inf)
+        self.RootDepthPrev = np.copy(arr_inf)
+        self.rCorPrev = np.copy(arr_inf)
+        self.SxComp = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
+        self.RootFact = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
+        self.nCompRoot = 0
+
     def reset_initial_conditions(self):
         cond = self.var.GrowingSeasonDayOne
-        cond_comp = np.broadcast_to(cond, self.var.AerDaysComp.shape)
+        cond_comp = np.broadcast_to(cond[:,None,...], self.var.AerDaysComp.shape)
         self.var.AerDays[cond] = 0
         self.var.AerDaysComp[cond_comp] = 0        
         self.var.Tpot[cond] = 0
@@ -63,9 +178,9 @@ class Transpiration(object):
         self.var.DaySubmerged[cond10] += 1
 
         # Update anaerobic conditions counter for each compartment
-        cond10_comp = np.broadcast_to(cond10, self.var.AerDaysComp.shape)
+        cond10_comp = np.broadcast_to(cond10[:,None,...], self.var.AerDaysComp.shape)
         self.var.AerDaysComp[cond10_comp] += 1 
-        self.var.LagAer_comp = np.broadcast_to(self.var.LagAer, self.var.AerDaysComp.shape)
+        self.var.LagAer_comp = np.broadcast_to(self.var.LagAer[:,None,...], self.var.AerDaysComp.shape)
         self.var.AerDaysComp[cond10_comp] = np.clip(self.var.AerDaysComp, None, self.var.LagAer_comp)[cond10_comp]
 
         # Reduce actual transpiration that is possible to account for aeration
@@ -93,6 +208,96 @@ class Transpiration(object):
         TrPot[cond11] = self.var.TrPot0[cond11]
         self.var.TrAct0[cond11] = 0
         
+    def max_sink_term(self):
+        """Function to update the maximum sink term and the fraction of
+        each compartment covered by the root zone in cells where the
+        root depth (rounded to the nearest cm) or the root correction 
+        factor has changed since they were last computed. The sink term 
+        is computed as if all cells are in the growing season; outside 
+        the growing season it is not used.
+        """
+        rootdepth = np.maximum(self.var.Zmin, self.var.Zroot)
+        rootdepth = np.round(rootdepth * 100) / 100
+        # Cells without data, in which the values are NaN, are unchanged
+        same_depth = ((rootdepth == self.RootDepthPrev) | (np.isnan(rootdepth) & np.isnan(self.RootDepthPrev)))
+        same_rCor = ((self.var.rCor == self.rCorPrev) | (np.isnan(self.var.rCor) & np.isnan(self.rCorPrev)))
+        cond1 = np.logical_not(same_depth & same_rCor)
+        if not np.any(cond1):
+            return
+
+        I,J,K = np.nonzero(cond1)
+        rootdepth = rootdepth[I,J,K]
+        SxTop = self.var.SxTop[I,J,K]
+        SxBot = self.var.SxBot[I,J,K]
+        rCor = self.var.rCor[I,J,K]
+
+        # Fraction of compartment covered by root zone (zero in compartments
+        # NOT covered by the root zone, non-zero in compartments partly
+        # covered by the root zone)
+        RootFact = self.var.soil_parameters_module.compartment_fraction(rootdepth)
+        comp_sto = (RootFact > 0)
+
+        # Sink term declines linearly with depth
+        SxComp = np.zeros_like(RootFact)
+        SxCompBot = np.copy(SxTop)
+        for comp in range(self.var.nComp):
+            SxCompTop = np.copy(SxCompBot)
+            cond11 = (self.var.dzsum[comp] <= rootdepth)
+            SxCompBot[cond11] = (SxBot * rCor + ((SxTop - SxBot * rCor) * ((rootdepth - self.var.dzsum[comp]) / rootdepth)))[cond11]
+            cond12 = np.logical_not(cond11)
+            SxCompBot[cond12] = (SxBot * rCor)[cond12]
+            SxComp[:,comp] = ((SxCompTop + SxCompBot) / 2)
+
+        # Net irrigation mode
+        cond13 = (np.broadcast_to(self.var.IrrMethod, cond1.shape)[I,J,K] == 4)
+        SxComp[cond13,:] = ((SxTop + SxBot) / 2.)[cond13][:,None]
+        SxComp *= comp_sto
+
+        # Number of compartments in the root zone of the updated cells,
+        # before and after the update
+        nCompPrev = np.sum((self.RootFact[I,:,J,K] > 0), axis=1)
+        nComp = np.sum(comp_sto, axis=1)
+
+        self.SxComp[I,:,J,K] = SxComp
+        self.RootFact[I,:,J,K] = RootFact
+        self.RootDepthPrev[I,J,K] = rootdepth
+        self.rCorPrev[I,J,K] = rCor
+
+        # Number of compartments down to the deepest root zone - this only
+        # needs to be recomputed over the full grid if the root zone has
+        # become shallower in a cell in which it may have been the deepest
+        if np.any((nComp < nCompPrev) & (nCompPrev == self.nCompRoot)):
+            self.nCompRoot = int(np.max(np.sum(self.RootFact > 0, axis=1)))
+        else:
+            self.nCompRoot = max(self.nCompRoot, int(np.max(nComp)))
+        
+    def root_uptake(self, ToExtract, SxComp, RootFact, et0):
+        """Function to extract water from the root zone with the 
+        compiled kernel. Only compartments down to the deepest root 
+        zone are passed to the kernel.
+        """
+        nComp = self.nCompRoot
+        th = self.var.th[:,:nComp,...]
+        th_fc = self.var.th_fc_comp[:,:nComp,...]
+        th_wp = self.var.th_wp_comp[:,:nComp,...]
+
+        # Relative depletion between the stomatal stress thresholds
+        Wrel = ((th_fc - th) / (th_fc - th_wp))
+        pRel = ((Wrel - self.var.p_up2[:,None,...]) / (self.var.p_lo2 - self.var.p_up2)[:,None,...])
+
+        # Upper stomatal stress threshold adjusted for ET0
+        p_up_sto = np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))
+        cond1 = (self.var.ETadj == 1)
+        p_up_sto[cond1] = (self.var.p_up2 + (0.04 * (5. - et0)) * (np.log10(10. - 9. * self.var.p_up2)))[cond1]
+
+        root_uptake_kernel(
+            self.var.th, self.var.th_s_comp, self.var.th_fc_comp,
+            self.var.th_wp_comp, self.var.th_dry_comp, pRel,
+            np.exp(pRel * self.var.fshape_w2[:,None,...]), np.exp(self.var.fshape_w2),
+            p_up_sto, SxComp, RootFact, self.var.GrowingSeasonIndex,
+            self.var.DaySubmerged, self.var.LagAer, self.var.Aer,
+            self.var.AerDaysComp, self.var.dz, ToExtract, self.var.TrAct)
+        
     def dynamic(self):
         """Function to calculate crop transpiration on current day"""
 
@@ -156,49 +361,22 @@ class Transpiration(object):
         # Maximum sink term
         # #################
 
-        SxComp = np.zeros((self.var.nCrop, self.var.nComp, self.var.nLat, self.var.nLon))
-
-        rootdepth = np.maximum(self.var.Zmin, self.var.Zroot)
-        rootdepth = np.round(rootdepth * 100) / 100
-        rootdepth_comp = np.broadcast_to(rootdepth[:,None,:,:], self.var.th.shape)
-        # dz = self.var.dz[:,None,None,None] * np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))[None,:,:,:]
-        # dzsum = self.var.dzsum[:,None,None,None] * np.ones((self.var.nCrop, self.var.nLat, self.var.nLon))[None,:,:,:]
-        comp_sto = (np.round((self.var.dzsum_xy - self.var.dz_xy) * 1000) < np.round(rootdepth_comp * 1000))
-
-        # Fraction of compartment covered by root zone (zero in compartments
-        # NOT covered by the root zone)
-        RootFact = 1 - ((self.var.dzsum_xy - rootdepth_comp) / self.var.dz_xy)
-        RootFact = np.clip(RootFact, 0, 1) * comp_sto
-
-        # Net irrigation mode
-        cond12 = (self.var.GrowingSeasonIndex & (self.var.IrrMethod == 4))
-        cond12_comp = np.broadcast_to(cond12, SxComp.shape)
-        SxComp[cond12_comp] = np.broadcast_to(((self.var.SxTop + self.var.SxBot) / 2.), SxComp.shape)[cond12_comp]
-
-        # Otherwise sink term declines linearly with depth
-        cond13 = (self.var.GrowingSeasonIndex & np.logical_not(cond12))
-
-        if (np.any(cond13)):
-            comp = 0
-            comp_sto_sum = np.sum(comp_sto, axis=1)
-            SxCompBot = np.copy(self.var.SxTop)
-            while np.any(comp < comp_sto_sum):
-                SxCompTop = np.copy(SxCompBot)
-                cond131 = (cond13 & (self.var.dzsum_xy[:,comp,...] <= rootdepth))
-                SxCompBot[cond131] = (self.var.SxBot * self.var.rCor + ((self.var.SxTop - self.var.SxBot * self.var.rCor) * ((rootdepth - self.var.dzsum_xy[:,comp,...]) / rootdepth)))[cond131]
-                cond132 = (cond13 & np.logical_not(cond131))
-                SxCompBot[cond132] = (self.var.SxBot * self.var.rCor)[cond132]
-                SxComp[:,comp,...][cond13] = ((SxCompTop + SxCompBot) / 2)[cond13]
-                comp += 1
-
-        SxComp *= comp_sto
+        # Fraction of compartment covered by root zone and maximum sink term
+        # in each compartment, updated where the root depth has changed
+        self.max_sink_term()
+        SxComp = self.SxComp
+        RootFact = self.RootFact
 
         # Extract water
         self.var.TrAct.fill(0.)
         # print 'TrPot   %f' % TrPot[0,0,0]
         ToExtract = np.copy(TrPot)
         cond14_ini = (self.var.GrowingSeasonIndex & (ToExtract > 0))
-        if (np.any(cond14_ini)):
+        self.var.thChanged |= cond14_ini
+        if self.use_numba and np.any(cond14_ini):
+            self.root_uptake(ToExtract, SxComp, RootFact, et0)
+        elif (np.any(cond14_ini)):
+            comp_sto = (RootFact > 0)
             comp = 0
             comp_sto_sum = np.sum(comp_sto, axis=1)
             while np.any((comp < comp_sto_sum) & (ToExtract > 0)):
@@ -308,16 +486,24 @@ class Transpiration(object):
         cond15 = (self.var.GrowingSeasonIndex & (self.var.IrrMethod == 4) & (TrPot > 0))
         thCrit = self.var.thRZ_Wp + ((self.var.NetIrrSMT / 100) * (self.var.thRZ_Fc - self.var.thRZ_Wp))
         cond151 = (cond15 & (self.var.thRZ_Act < thCrit))
-        cond151_comp = np.broadcast_to(cond151, self.var.th.shape)
-
-        # Calculate thCrit in each compartment
-        thCrit_comp = (self.var.th_wp_comp + ((self.var.NetIrrSMT / 100) * (self.var.th_fc_comp - self.var.th_wp_comp)))
-
-        # Determine necessary change in water content in compartments to reach
-        # critical water content
-        dWC = RootFact * (thCrit_comp - self.var.th * 1000 * self.var.dz_xy)
-        self.var.th[cond151_comp] = (self.var.th + (dWC / (1000 * self.var.dz_xy)))[cond151_comp]
-        self.var.IrrNet[cond151] = np.sum(dWC, axis=1)[cond151]
+        if np.any(cond151):
+            I,J,K = np.nonzero(cond151)
+            th = self.var.th[I,:,J,K]
+            dz = self.var.dz_xy[I,:,J,K]
+            NetIrrSMT = np.broadcast_to(self.var.NetIrrSMT, cond151.shape)[I,J,K][:,None]
+
+            # Calculate thCrit in each compartment
+            thCrit_comp = (self.var.th_wp_comp[I,:,J,K] + ((NetIrrSMT / 100) * (self.var.th_fc_comp[I,:,J,K] - self.var.th_wp_comp[I,:,J,K])))
+
+            # Determine necessary change in water content in compartments to
+            # reach critical water content
+            dWC = RootFact[I,:,J,K] * (thCrit_comp - th * 1000 * dz)
+            self.var.th[I,:,J,K] = (th + (dWC / (1000 * dz)))
+            self.var.thChanged[I,J,K] = True
+            IrrNet = np.zeros(I.size)
+            for comp in range(self.var.nComp):
+                IrrNet += dWC[:,comp]
+            self.var.IrrNet[I,J,K] = IrrNet
         
         # Update net irrigation counter for the growing season
         self.var.IrrNetCum += self.var.IrrNet
@@ -27,6 +27,19 @@ logger = logging.getLogger(__name__)
 # file cache to minimize/reduce opening/closing files.  
 filecache = dict()
 
+# input held in shared memory by a parent process (see SharedInput.py)
+sharedcache = None
+
+# crops simulated by this process (see crop_runner.py), or None if all
+# crops are simulated
+cropindex = None
+
+def select_crops(data, dims):
+    # select the crops simulated by this process along the crop dimension
+    if cropindex is None or 'crop' not in dims:
+        return data
+    return data[(slice(None),) * list(dims).index('crop') + (cropindex,)]
+
 # Global variables:
 MV = 1e20
 smallNumber = 1E-39
@@ -180,6 +193,10 @@ def netcdf2PCRobjCloneWithoutTime(ncFile, varName,
     
     if absolutePath != None: ncFile = getFullPath(ncFile, absolutePath)
     
+    if sharedcache is not None:
+        outnp = sharedcache.get_parameter(ncFile, str(varName))
+        if outnp is not None: return outnp
+
     logger.debug('reading variable: '+str(varName)+' from the file: '+str(ncFile))
     
     # 
@@ -237,9 +254,13 @@ def netcdf2PCRobjCloneWithoutTime(ncFile, varName,
         # print yULClone,yULInput
         # print sameClone
 
-    cropData = f.variables[varName][:,:]       # still original data
+    # only read the window covered by the clone map if the clone is
+    # different, so that runs over part of the input grid (e.g. tiles) do
+    # not read the whole field
     factor = 1                                 # needed in regridData2FinerGrid
-    if sameClone == False:
+    if sameClone == True:
+        cropData = f.variables[varName][:,:]   # still original data
+    else:
         # crop to cloneMap:
         minX    = min(abs(f.variables['lon'][:] - (xULClone + 0.5*cellsizeInput)))
         xIdxSta = int(np.where(abs(f.variables['lon'][:] - (xULClone + 0.5*cellsizeInput)) == minX)[0])
@@ -247,7 +268,7 @@ def netcdf2PCRobjCloneWithoutTime(ncFile, varName,
         minY    = min(abs(f.variables['lat'][:] - (yULClone - 0.5*cellsizeInput)))
         yIdxSta = int(np.where(abs(f.variables['lat'][:] - (yULClone - 0.5*cellsizeInput)) == minY)[0])
         yIdxEnd = int(math.ceil(yIdxSta + rowsClone /(cellsizeInput/cellsizeClone)))
-        if len(cropData.shape) > 2:
+        if len(f.variables[varName].shape) > 2:
             cropData = f.variables[varName][...,yIdxSta:yIdxEnd,xIdxSta:xIdxEnd]
         else:
             cropData = f.variables[varName][yIdxSta:yIdxEnd,xIdxSta:xIdxEnd]
@@ -257,6 +278,7 @@ def netcdf2PCRobjCloneWithoutTime(ncFile, varName,
 
     # numpy array
     outnp = regridData2FinerGrid(factor,cropData,MV)
+    outnp = select_crops(outnp, f.variables[varName].dimensions)
 
     f = None
     cropData = None 
@@ -324,10 +346,11 @@ def netcdf2NumPyTimeSlice(ncFile,varName,startDate,endDate,
             if xULClone != xULInput: sameClone = False
             if yULClone != yULInput: sameClone = False
 
-        cropData = f.variables[varName][idx,:,:] # still original data
         factor = 1                               # needed in regridData2FinerGrid
 
-        if sameClone == False:
+        if sameClone == True:
+            cropData = f.variables[varName][idx,:,:] # still original data
+        else:
 
             logger.debug('Crop to the clone map with lower left corner (x,y): '+str(xULClone)+' , '+str(yULClone))
 
@@ -346,6 +369,7 @@ def netcdf2NumPyTimeSlice(ncFile,varName,startDate,endDate,
 
         # numpy array
         outnp = regridData2FinerGrid(factor,cropData,MV)
+        outnp = select_crops(outnp, f.variables[varName].dimensions)
         f = None
         cropData = None 
         return (outnp)
@@ -363,6 +387,10 @@ def netcdf2PCRobjClone(ncFile,varName,dateInput,\
     # Get netCDF file and variable name:    
     #~ print ncFile
     
+    if sharedcache is not None and useDoy == None:
+        outnp = sharedcache.get_forcing(ncFile, str(varName), dateInput)
+        if outnp is not None: return outnp
+
     logger.debug('reading variable: '+str(varName)+' from the file: '+str(ncFile))
     
     if ncFile in filecache.keys():
@@ -543,10 +571,11 @@ def netcdf2PCRobjClone(ncFile,varName,dateInput,\
         if xULClone != xULInput: sameClone = False
         if yULClone != yULInput: sameClone = False
 
-    cropData = f.variables[varName][int(idx),:,:]       # still original data
     factor = 1                          # needed in regridData2FinerGrid
 
-    if sameClone == False:
+    if sameClone == True:
+        cropData = f.variables[varName][int(idx),:,:]   # still original data
+    else:
         
         logger.debug('Crop to the clone map with lower left corner (x,y): '+str(xULClone)+' , '+str(yULClone))
 
@@ -560,7 +589,7 @@ def netcdf2PCRobjClone(ncFile,varName,dateInput,\
         yIdxSta = int(np.where(abs(f.variables['lat'][:] - (yULClone - 0.5*cellsizeInput)) == minY)[0])
         yIdxEnd = int(math.ceil(yIdxSta + rowsClone /(cellsizeInput/cellsizeClone)))
         # cropData = f.variables[varName][idx,yIdxSta:yIdxEnd,xIdxSta:xIdxEnd]
-        if len(cropData.shape) > 2:
+        if len(f.variables[varName].shape) > 3:
             cropData = f.variables[varName][idx,...,yIdxSta:yIdxEnd,xIdxSta:xIdxEnd]
         else:
             cropData = f.variables[varName][idx,yIdxSta:yIdxEnd,xIdxSta:xIdxEnd]
@@ -570,6 +599,7 @@ def netcdf2PCRobjClone(ncFile,varName,dateInput,\
 
     # numpy array
     outnp = regridData2FinerGrid(factor,cropData,MV)
+    outnp = select_crops(outnp, f.variables[varName].dimensions[1:])
     
     f = None
     cropData = None 
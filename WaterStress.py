@@ -19,36 +19,60 @@ class WaterStress(object):
         self.var.Ksw_Sen = np.copy(arr_zeros)
         self.var.Ksw_Pol = np.copy(arr_zeros)
         self.var.Ksw_StoLin = np.copy(arr_zeros)
-        
-    def dynamic(self, beta):
-        """Function to calculate water stress coefficients"""        
-        p_up = np.concatenate((self.var.p_up1[None,:], self.var.p_up2[None,:], self.var.p_up3[None,:], self.var.p_up4[None,:]), axis=0)
-        p_lo = np.concatenate((self.var.p_lo1[None,:], self.var.p_lo2[None,:], self.var.p_lo3[None,:], self.var.p_lo4[None,:]), axis=0)
-        fshape_w = np.concatenate((self.var.fshape_w1[None,:], self.var.fshape_w2[None,:], self.var.fshape_w3[None,:], self.var.fshape_w4[None,:]), axis=0)
 
+        # Stress thresholds and shape factors (leaf expansion, stomatal
+        # closure, senescence, pollination failure) do not change during
+        # the run, so the terms which depend only on these are computed once
+        self.p_up = np.concatenate((self.var.p_up1[None,:], self.var.p_up2[None,:], self.var.p_up3[None,:], self.var.p_up4[None,:]), axis=0)
+        self.p_lo = np.concatenate((self.var.p_lo1[None,:], self.var.p_lo2[None,:], self.var.p_lo3[None,:], self.var.p_lo4[None,:]), axis=0)
+        fshape_w = np.concatenate((self.var.fshape_w1[None,:], self.var.fshape_w2[None,:], self.var.fshape_w3[None,:]), axis=0)
+        self.fshape_w = fshape_w
+        self.fshape_w_denom = np.exp(fshape_w) - 1.
+        self.p_up_log = np.log10(10 - 9 * self.p_up[0:3,:])
+        self.p_lo_log = np.log10(10 - 9 * self.p_lo[0:3,:])
+
+        # Time step for which the Et0-adjusted thresholds were computed
+        self.timeStep = None
+
+    def adjust_thresholds(self):
+        """Function to adjust stress thresholds for Et0 on current day"""
         et0 = (self.var.referencePotET[None,:,:] * np.ones((self.var.nCrop))[:,None,None])
-        
-        dims = et0.shape
-        nr, nlat, nlon = dims[0], dims[1], dims[2]  # TODO: get rid of this
+        p_up = np.copy(self.p_up)
+        p_lo = np.copy(self.p_lo)
 
         # Adjust stress thresholds for Et0 on current day (don't do this for
         # pollination water stress coefficient)
         cond1 = (self.var.ETadj == 1)
         for stress in range(3):
-            p_up[stress,:][cond1] = (p_up[stress,:] + (0.04 * (5 - et0)) * (np.log10(10 - 9 * p_up[stress,:])))[cond1]
-            p_lo[stress,:][cond1] = (p_lo[stress,:] + (0.04 * (5 - et0)) * (np.log10(10 - 9 * p_lo[stress,:])))[cond1]
+            p_up[stress,:][cond1] = (p_up[stress,:] + (0.04 * (5 - et0)) * self.p_up_log[stress,:])[cond1]
+            p_lo[stress,:][cond1] = (p_lo[stress,:] + (0.04 * (5 - et0)) * self.p_lo_log[stress,:])[cond1]
+
+        # The senescence threshold may be adjusted further for early
+        # senescence, so keep the value before limiting
+        self.p_up_sen = np.copy(p_up[2,:])
+
+        # Limit adjusted values
+        self.p_up_adj = np.clip(p_up, 0, 1)
+        self.p_lo_adj = np.clip(p_lo, 0, 1)
+        self.timeStep = self.var._modelTime.timeStepPCR
+
+    def dynamic(self, beta):
+        """Function to calculate water stress coefficients"""
+        if self.timeStep != self.var._modelTime.timeStepPCR:
+            self.adjust_thresholds()
+
+        p_up = self.p_up_adj
+        p_lo = self.p_lo_adj
 
         # Adjust senescence threshold if early senescence triggered
         if beta:
             cond2 = (self.var.tEarlySen > 0)
-            p_up[2,:][cond2] = (p_up[2,:] * (1. - (self.var.beta / 100.)))[cond2]
-
-        # Limit adjusted values
-        p_up = np.clip(p_up, 0, 1)
-        p_lo = np.clip(p_lo, 0, 1)
+            if np.any(cond2):
+                p_up = np.copy(p_up)
+                p_up[2,:][cond2] = np.clip(self.p_up_sen * (1. - (self.var.beta / 100.)), 0, 1)[cond2]
 
         # Calculate relative depletion
-        Drel = np.zeros((4, nr, nlat, nlon))
+        Drel = np.zeros((4,) + self.var.Dr.shape)
         # No water stress
         cond1 = (self.var.Dr <= (p_up * self.var.TAW))
         Drel[cond1] = 0
@@ -64,9 +88,8 @@ class WaterStress(object):
         Drel[cond3] = 1         
 
         # Calculate root zone stress coefficients
-        idx = np.arange(0,3)
-        x1 = np.exp(Drel[idx,:] * fshape_w[idx,:]) - 1.
-        x2 = np.exp(fshape_w[idx,:]) - 1.
+        x1 = np.exp(Drel[0:3,:] * self.fshape_w) - 1.
+        x2 = self.fshape_w_denom
         Ks = (1. - np.divide(x1, x2, out=np.zeros_like(x2), where=x2!=0))
         # print 'Ksw_Sen in WaterStress %f' % Ks[2,0,0,0]
         # Water stress coefficients (leaf expansion, stomatal closure,
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import os
+import sys
+import shutil
+import logging
+import multiprocessing
+
+import numpy as np
+
+from Configuration import Configuration
+import VirtualOS as vos
+import InitialCondition
+from ncConverter import mergeNetCDF
+from SharedInput import SharedInput, fork_context
+from CropSync import CropSync
+import deterministic_runner
+
+logger = logging.getLogger(__name__)
+
+class CropRunner(object):
+    """Class to run AquaCrop or FAO56 with the crops split between worker
+    processes, each of which simulates a subset of the crops over the
+    complete clone map. This suits runs over small areas with many crops,
+    for which tiles (see tile_runner.py) would be too small. Once all
+    workers have finished their output is merged into the netCDF files
+    of the run.
+    """
+
+    # Number of time steps copied at once when merging output
+    merge_chunk_size = 366
+
+    def __init__(self, configuration, model, debug_mode = False):
+        self.configuration = configuration
+        self.model = model
+        self.debug_mode = debug_mode
+
+        self.nCrop = int(self.configuration.cropOptions['nCrop'])
+        nWorkers = self.configuration.globalOptions['nWorkers']
+        if nWorkers == "None":
+            self.nWorkers = multiprocessing.cpu_count()
+        else:
+            self.nWorkers = max(int(nWorkers), 1)
+        self.nWorkers = min(self.nWorkers, self.nCrop)
+
+        self.sharedInput = self.configuration.globalOptions['sharedInput'] == "1"
+
+        attr = vos.getMapAttributesALL(self.configuration.cloneMap)
+        self.nLat = int(attr['rows'])
+        self.nLon = int(attr['cols'])
+        self.nComp = vos.netcdfDim2NumPy(self.configuration.soilOptions['soilAndTopoNC'], 'compartment').size
+
+    def make_subsets(self):
+        """Function to split the crops into contiguous subsets"""
+        self.subsets = []
+        for i, crops in enumerate(np.array_split(np.arange(self.nCrop), self.nWorkers)):
+            subset = {'number' : i, 'crops' : (int(crops[0]), int(crops[-1]) + 1)}
+            subset['outputDir'] = vos.getFullPath("crops/crops_%03i/" % i, self.configuration.tmpDir)
+            if os.path.exists(subset['outputDir']):
+                shutil.rmtree(subset['outputDir'])
+            os.makedirs(subset['outputDir'])
+            logger.info('Worker %i: crops %i-%i', i, subset['crops'][0] + 1, subset['crops'][1])
+            self.subsets.append(subset)
+
+    def run(self):
+        self.make_subsets()
+
+        tasks = [(self.configuration.iniFileName, self.model, subset, self.debug_mode) for subset in self.subsets]
+
+        # shared memory is inherited by the workers when they are forked
+        InitialCondition.cropsync = CropSync(len(tasks), self.nCrop, self.nComp, self.nLat, self.nLon)
+        if self.sharedInput:
+            vos.sharedcache = SharedInput(self.configuration, len(tasks))
+            vos.sharedcache.start()
+
+        # don't share open files with the worker processes
+        for f in vos.filecache.values():
+            f.close()
+        vos.filecache.clear()
+
+        # all workers must run at the same time, as they wait for each other
+        # on planting days
+        logger.info('Running %i crops on %i worker processes', self.nCrop, len(tasks))
+        pool = fork_context().Pool(processes=len(tasks), maxtasksperchild=1)
+        try:
+            for number, outNCDir in pool.imap_unordered(run_crops, tasks, chunksize=1):
+                self.subsets[number]['outNCDir'] = outNCDir
+                logger.info('Worker %i finished', number)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            InitialCondition.cropsync = None
+            if vos.sharedcache is not None:
+                vos.sharedcache.stop()
+                vos.sharedcache = None
+
+        self.merge_output()
+
+    def merge_output(self):
+        """Function to merge the output of the workers into the netCDF
+        files of the run
+        """
+        for ncFileName in sorted(os.listdir(self.subsets[0]['outNCDir'])):
+            logger.info('Merging crop output into %s', ncFileName)
+            parts = [(os.path.join(subset['outNCDir'], ncFileName), {'crop' : slice(*subset['crops'])}) for subset in self.subsets]
+            mergeNetCDF(os.path.join(self.configuration.outNCDir, ncFileName),
+                        parts,
+                        {'crop' : self.nCrop},
+                        {'crop' : np.arange(1, self.nCrop + 1)},
+                        self.merge_chunk_size)
+
+        for subset in self.subsets:
+            shutil.rmtree(subset['outNCDir'])
+
+def run_crops(task):
+    """Function to run the model for a subset of the crops (in a worker
+    process)"""
+    iniFileName, model, subset, debug_mode = task
+
+    # the worker should only log to its own files
+    logging.getLogger().handlers = []
+
+    configuration = Configuration(iniFileName=iniFileName, debug_mode=debug_mode, no_modification=False)
+    configuration.globalOptions['outputDir'] = subset['outputDir']
+    configuration.globalOptions['log_level_console'] = "WARNING"
+    configuration.cropOptions['nCrop'] = str(subset['crops'][1] - subset['crops'][0])
+    configuration.set_configuration()
+
+    # the crop synchronization (and shared input) is inherited when the
+    # worker is forked - without it each worker would silently compute
+    # the initial condition from its own crops only
+    if InitialCondition.cropsync is None:
+        raise RuntimeError('The crop synchronization was not inherited by the worker process')
+    if configuration.globalOptions['sharedInput'] == "1" and vos.sharedcache is None:
+        raise RuntimeError('The shared input was not inherited by the worker process')
+
+    # crop parameters are read for the crops of this worker only
+    vos.cropindex = slice(*subset['crops'])
+    InitialCondition.cropsync.crops = vos.cropindex
+    if vos.sharedcache is not None:
+        attr = vos.getMapAttributesALL(configuration.cloneMap)
+        vos.sharedcache.set_window((0, int(attr['rows'])), (0, int(attr['cols'])))
+
+    deterministic_runner.run(configuration, model)
+
+    if vos.sharedcache is not None:
+        vos.sharedcache.release()
+    return subset['number'], configuration.outNCDir
+
+def main():
+
+    # get the full path of the configuration/ini file provided
+    # as system argument
+    iniFileName = os.path.abspath(sys.argv[1])
+    model = sys.argv[2].lower()
+
+    # TODO: debug option
+    debug_mode = False
+
+    # object to handle configuration/ini file
+    configuration = Configuration(iniFileName=iniFileName, debug_mode=debug_mode)
+
+    crop_runner = CropRunner(configuration, model, debug_mode)
+    crop_runner.run()
+
+if __name__ == '__main__':
+    sys.exit(main())
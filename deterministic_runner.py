@@ -58,6 +58,31 @@ class run_FAO56(DeterministicRunner):
         self.model.initial()
         self.reporting = Reporting(configuration, self.model, modelTime)
 
+def run(configuration, model, initial_state = None):
+    """Function to run AquaCrop or FAO56 (model) over the clone map
+    and time period given in the configuration"""
+
+    # timestep information
+    currTimeStep = ModelTime()
+
+    currTimeStep.getStartEndTimeSteps(configuration.globalOptions['startTime'], configuration.globalOptions['endTime'])
+    currTimeStep.update(1)      # this essentially allows us to call read_forcings in AquaCrop.__init__() method
+    
+    logger.info('Transient simulation run has started')
+    deterministic_runner = None
+    if (model == 'aquacrop'):
+        deterministic_runner = run_AquaCrop(configuration, currTimeStep, initial_state)
+    elif model == 'fao56':
+        deterministic_runner = run_FAO56(configuration, currTimeStep, initial_state)
+    # TODO: error handling
+    
+    dynamic_framework = DynamicFramework(deterministic_runner, currTimeStep.nrOfTimeSteps)
+    dynamic_framework.setQuiet(True)
+    try:
+        dynamic_framework.run()
+    finally:
+        deterministic_runner.model.band_executor.shutdown()
+
 def main():
 
     # TODO: print disclaimer
@@ -76,27 +101,11 @@ def main():
     # object to handle configuration/ini file
     configuration = Configuration(iniFileName=iniFileName, debug_mode=debug_mode)
 
-    # timestep information
-    currTimeStep = ModelTime()
-
     # NB spin-up currently not implemented (nor is it
     # implemented in AquaCrop-OS)
     initial_state = None
 
-    currTimeStep.getStartEndTimeSteps(configuration.globalOptions['startTime'], configuration.globalOptions['endTime'])
-    currTimeStep.update(1)      # this essentially allows us to call read_forcings in AquaCrop.__init__() method
-    
-    logger.info('Transient simulation run has started')
-    deterministic_runner = None
-    if (model == 'aquacrop'):
-        deterministic_runner = run_AquaCrop(configuration, currTimeStep, initial_state)
-    elif model == 'fao56':
-        deterministic_runner = run_FAO56(configuration, currTimeStep, initial_state)
-    # TODO: error handling
-    
-    dynamic_framework = DynamicFramework(deterministic_runner, currTimeStep.nrOfTimeSteps)
-    dynamic_framework.setQuiet(True)
-    dynamic_framework.run()
+    run(configuration, model, initial_state)
 
 if __name__ == '__main__':
     # disclaimer.print_disclaimer(with_logger = True)
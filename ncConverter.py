@@ -148,14 +148,18 @@ class np2netCDF():
         rootgrp.sync()
         rootgrp.close()
                 
-    def data2NetCDF(self, ncFileName, shortVarName, dims, varField, timeStamp, posCnt = None):
-        """Function to write data to netCDF"""
+    def data2NetCDF(self, ncFileName, shortVarName, dims, varField, timeStamp, posCnt = None, timeValue = None):
+        """Function to write data to netCDF. If given, timeValue is
+        the time of timeStamp in the units of the time variable, which
+        saves converting the date for each file.
+        """
 
         rootgrp = nc.Dataset(ncFileName,'a')
 
         date_time = rootgrp.variables['time']
         if posCnt == None: posCnt = len(date_time)
-        date_time[posCnt] = nc.date2num(timeStamp,date_time.units,date_time.calendar)
+        if timeValue is None: timeValue = nc.date2num(timeStamp,date_time.units,date_time.calendar)
+        date_time[posCnt] = timeValue
 
         # flip variable if necessary (to follow cf_convention)
         if self.netcdf_y_orientation_follow_cf_convention: varField = np.flipud(varField)
@@ -175,3 +179,62 @@ class np2netCDF():
         """Function to close netCDF file"""
         rootgrp = nc.Dataset(ncFileName,'w')
         rootgrp.close()
+
+def mergeNetCDF(ncFileName, parts, dimensions, coordinates, chunkSize = 366):
+    """Function to merge netCDF files, each of which holds part of the
+    same output variables (e.g. the output of a tile or of a subset of
+    crops), into one file
+
+    Args:
+      ncFileName  : name of the merged file
+      parts       : list of (file name, window) tuples, where window is a
+                    dictionary of slices giving the position of the part
+                    along the merged dimensions
+      dimensions  : dictionary of the sizes of the merged dimensions
+      coordinates : dictionary of the values of the merged dimensions
+      chunkSize   : number of time steps copied at once
+    """
+    src = nc.Dataset(parts[0][0])
+    dst = nc.Dataset(ncFileName, 'w', format=src.data_model)
+
+    # dimensions, variables and attributes of the first part
+    for name, dim in src.dimensions.items():
+        size = len(dim)
+        if dim.isunlimited(): size = None
+        if name in dimensions: size = dimensions[name]
+        dst.createDimension(name, size)
+
+    fields = []
+    for name, var in src.variables.items():
+        fill_value = None
+        if '_FillValue' in var.ncattrs(): fill_value = var.getncattr('_FillValue')
+        zlib = var.filters() is not None and var.filters().get('zlib', False)
+        out = dst.createVariable(name, var.dtype, var.dimensions, fill_value=fill_value, zlib=zlib)
+        for attr in var.ncattrs():
+            if attr != '_FillValue': out.setncattr(attr, var.getncattr(attr))
+        if name in coordinates:
+            out[:] = coordinates[name]
+        elif name in src.dimensions:
+            out[:] = var[:]
+        else:
+            fields.append(name)
+    for attr in src.ncattrs():
+        dst.setncattr(attr, src.getncattr(attr))
+    src.close()
+
+    # copy each part into its window
+    for partFileName, window in parts:
+        src = nc.Dataset(partFileName)
+        for name in fields:
+            var = src.variables[name]
+            nTime = 1
+            if 'time' in var.dimensions: nTime = len(src.dimensions['time'])
+            for t in range(0, nTime, chunkSize):
+                time = slice(t, min(t + chunkSize, nTime))
+                index = tuple([time if dim == 'time' else window.get(dim, slice(None)) for dim in var.dimensions])
+                partIndex = tuple([time if dim == 'time' else slice(None) for dim in var.dimensions])
+                dst.variables[name][index] = var[partIndex]
+        src.close()
+
+    dst.sync()
+    dst.close()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# model modules are imported from the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# with the TBB threading layer of numba, a process which has run parallel
+# kernels does not exit once it has forked (see test_shared_input.py)
+os.environ.setdefault('NUMBA_THREADING_LAYER', 'workqueue')
@@ -0,0 +1,2 @@
+# Implementations of model modules as they were before they were
+# optimised, against which the tests check the current modules
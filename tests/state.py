@@ -0,0 +1,106 @@
+import copy
+
+import numpy as np
+
+class Options(object):
+    """Configuration options read by the modules under test"""
+
+    def __init__(self, **globalOptions):
+        self.globalOptions = {'UseNumba' : "0", 'nBands' : "1", 'cropActiveSet' : "0"}
+        self.globalOptions.update(globalOptions)
+        self.soilOptions = {'EvapTimeSteps' : "20", 'EvapTolerance' : "None"}
+
+class State(object):
+    """Model variables shared by the modules under test"""
+    pass
+
+class SoilParameters(object):
+    """Compartment fraction lookup of SoilAndTopoParameters"""
+
+    def __init__(self, var):
+        self.var = var
+
+    def compartment_fraction(self, depth, table=None):
+        if table is None:
+            table = self.var.CompFrac
+        idx = np.nan_to_num(np.round(depth * 1000))
+        idx = np.clip(idx, 0, table.shape[0] - 1).astype(np.int64)
+        return np.ascontiguousarray(np.moveaxis(table[idx], -1, 1))
+
+def make_state(seed=0, nCrop=3, nLat=7, nLon=6, **options):
+    """Function to make a random soil profile, with water contents
+    between air dry and (slightly above) saturation, surface water and
+    a shallow groundwater table
+    """
+    r = np.random.RandomState(seed)
+    v = State()
+    v._configuration = Options(**options)
+    v.nCrop, v.nLat, v.nLon = nCrop, nLat, nLon
+    sh3 = (nCrop, nLat, nLon)
+
+    v.dz = np.array([0.1,0.1,0.1,0.15,0.15,0.2,0.2,0.25,0.25,0.25,0.25,0.3])
+    v.dzsum = np.cumsum(v.dz)
+    v.nComp = v.dz.size
+    v.dz_xy = v.dz[None,:,None,None] * np.ones(sh3)[:,None,...]
+    v.dzsum_xy = v.dzsum[None,:,None,None] * np.ones(sh3)[:,None,...]
+
+    v.nLayer = 2
+    v.zLayer = np.array([0.5, 1.8])
+    zMid = v.dzsum - v.dz / 2
+    zLayerTop = np.cumsum(v.zLayer) - v.zLayer
+    v.layerIndex = np.sum(zMid[:,None] > zLayerTop[None,:], axis=1) - 1
+
+    shL = (nCrop, v.nLayer, nLat, nLon)
+    v.th_wp = r.uniform(0.05, 0.2, shL)
+    v.th_fc = v.th_wp + r.uniform(0.1, 0.2, shL)
+    v.th_s = v.th_fc + r.uniform(0.08, 0.2, shL)
+    v.th_dry = v.th_wp / 2
+    v.ksat = r.uniform(5, 800, shL)
+    v.tau = np.clip(np.round(0.0866 * v.ksat ** 0.35 * 100) / 100, 0, 1)
+    v.aCR = r.uniform(-0.6, -0.3, shL)
+    v.bCR = r.uniform(-2, 1, shL)
+    for name in ['th_s','th_fc','th_wp','th_dry','ksat','tau','aCR','bCR']:
+        setattr(v, name + '_comp', getattr(v, name)[:,v.layerIndex,...])
+    v.th_fc_adj = np.copy(v.th_fc_comp)
+    v.fshape_cr = np.full(sh3, 16.)
+
+    # compartment fraction tables, as SoilAndTopoParameters
+    depth = (np.arange(int(np.round(v.dzsum[-1] * 1000)) + 1) / 1000.)[:,None]
+    comp_sto = (np.round((v.dzsum - v.dz) * 1000) < np.round(depth * 1000))
+    v.CompFrac = np.clip(1 - ((v.dzsum - depth) / v.dz), 0, 1) * comp_sto
+    v.CompIdx = np.clip(np.sum(comp_sto, axis=1) - 1, 0, None)
+    comp_sto = (np.round(v.dzsum * 1000) <= np.round(depth * 1000))
+    v.CompFracGerm = np.clip(1. - np.round(((v.dzsum - depth) / v.dz), 3), 0, 1) * comp_sto
+    v.soil_parameters_module = SoilParameters(v)
+
+    f = r.uniform(0, 1.05, v.th_s_comp.shape)
+    v.th = v.th_dry_comp + f * (v.th_s_comp - v.th_dry_comp)
+    v.thChanged = np.zeros(sh3, dtype=bool)
+
+    v.Bunds = (r.uniform(size=sh3) > 0.5).astype(float)
+    v.zBund = r.choice([0, 1], sh3)
+    v.BundWater = r.uniform(0, 20, sh3)
+    v.Irr = r.uniform(0, 30, sh3) * (r.uniform(size=sh3) > 0.8)
+    v.AppEff = np.full(sh3, 90.)
+    v.Infl = np.zeros(sh3)
+    v.FluxOut = np.zeros(v.th.shape)
+    v.DeepPerc = np.zeros(sh3)
+    v.Runoff = np.zeros(sh3)
+    v.GrowingSeasonDayOne = np.zeros(sh3, dtype=bool)
+    v.GrowingSeasonIndex = r.uniform(size=sh3) > 0.3
+    v.WaterTable = True
+    v.zGW = r.uniform(0.5, 4, sh3)
+    v.CropPresence = np.ones(sh3, dtype=bool)
+    v.cropActiveSet = False
+    return v
+
+def add_inflow(v, seed):
+    """Function to add random infiltration and drainage fluxes"""
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.Infl = r.uniform(0, 80, sh3) * (r.uniform(size=sh3) > 0.3)
+    v.SurfaceStorage = r.uniform(0, 10, sh3) * (r.uniform(size=sh3) > 0.7)
+    v.FluxOut = r.uniform(0, 5, v.th.shape) * (r.uniform(size=v.th.shape) > 0.8)
+
+def clone(v):
+    return copy.deepcopy(v)
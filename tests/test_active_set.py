@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+
+from ActiveSet import ActiveSet, ActiveSetModule
+from BandExecutor import BandExecutor
+from Drainage import Drainage
+from Infiltration import Infiltration
+from CapillaryRise import CapillaryRise
+from tests.state import make_state, add_inflow, clone
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+modules = [('drainage_module', Drainage),
+           ('infiltration_module', Infiltration),
+           ('capillary_rise_module', CapillaryRise)]
+
+outputs = ['th','FluxOut','DeepPerc','Runoff','Infl','SurfaceStorage','CrTot']
+
+def make_model(seed, UseNumba="0", nBands="1"):
+    """Function to make a model in which crops are present in some
+    (crop, cell) pairs, with soil properties which are the same for all
+    crops of a cell"""
+    v = make_state(seed, UseNumba=UseNumba, nBands=nBands)
+    for name in ['th_s','th_fc','th_wp','th_dry','ksat','tau','aCR','bCR']:
+        for suffix in ['', '_comp']:
+            value = getattr(v, name + suffix)
+            value[:] = value[0]
+    v.th_fc_adj = np.copy(v.th_fc_comp)
+    v.th = np.clip(v.th, v.th_dry_comp, None)
+    add_inflow(v, seed)
+    r = np.random.RandomState(100 + seed)
+    v.CropPresence = r.uniform(size=v.CropPresence.shape) > 0.6
+    for name, module in modules:
+        setattr(v, name, module(v))
+        getattr(v, name).initial()
+    return v
+
+def run(v, days):
+    for day in range(days):
+        r = np.random.RandomState(day)
+        sh3 = (v.nCrop, v.nLat, v.nLon)
+        v.Infl = r.uniform(0, 80, sh3) * (r.uniform(size=sh3) > 0.3)
+        for name, module in modules:
+            getattr(v, name).dynamic()
+
+@pytest.mark.parametrize('UseNumba', ["0", "1"])
+@pytest.mark.parametrize('seed', range(4))
+def test_active_set_same_as_all_pairs(seed, UseNumba):
+    if UseNumba == "1" and not HAS_NUMBA:
+        pytest.skip('numba is not installed')
+    a = make_model(seed, UseNumba)
+    b = clone(a)
+    b._configuration.globalOptions['cropActiveSet'] = "1"
+    b.active_set = ActiveSet(b)
+    b.active_set.initial()
+    assert b.cropActiveSet
+    assert isinstance(b.drainage_module, ActiveSetModule)
+    assert 'exp_sat' not in vars(b.drainage_module.module)
+    initial = clone(b)
+
+    run(a, 5)
+    run(b, 5)
+    present = b.CropPresence
+    for name in outputs:
+        x, y, z = getattr(a, name), getattr(b, name), getattr(initial, name)
+        if x.ndim == 4:
+            x, y, z = [np.moveaxis(value, 1, -1) for value in (x, y, z)]
+        # pairs in which crops are present are computed as over all pairs
+        np.testing.assert_array_equal(x[present], y[present], err_msg=name)
+        # other pairs are unchanged (except the inflow, which is an input)
+        if name != 'Infl':
+            np.testing.assert_array_equal(y[~present], z[~present], err_msg=name)
+
+def test_active_set_not_computed_in_bands():
+    a = make_model(0)
+    b = make_model(0, nBands="3")
+    b._configuration.globalOptions['cropActiveSet'] = "1"
+    b.active_set = ActiveSet(b)
+    b.active_set.initial()
+    b.band_executor = BandExecutor(b)
+    b.band_executor.initial()
+    assert b.band_executor.instances[0] == {}
+    b.band_executor.shutdown()
+
+    a._configuration.globalOptions['cropActiveSet'] = "1"
+    a.active_set = ActiveSet(a)
+    a.active_set.initial()
+    run(a, 3)
+    run(b, 3)
+    for name in outputs:
+        np.testing.assert_array_equal(getattr(a, name), getattr(b, name), err_msg=name)
+
+def test_active_set_disabled():
+    v = make_model(0)
+    v.active_set = ActiveSet(v)
+    v.active_set.initial()
+    assert not v.cropActiveSet
+    assert isinstance(v.drainage_module, Drainage)
+
+def test_initial_condition_without_absent_crops():
+    pytest.importorskip('pcraster')
+    pytest.importorskip('scipy')
+    import InitialCondition
+    v = make_state(0, nCrop=3, nLat=1, nLon=1)
+    v.GrowingSeasonIndex[:] = [[[True]], [[False]], [[False]]]
+    v.GrowingSeasonDayOne = np.copy(v.GrowingSeasonIndex)
+    v.CropPresence[:] = [[[True]], [[True]], [[False]]]
+    v.th[:] = np.array([1., 2., 10.])[:,None,None,None]
+    w = clone(v)
+    w.cropActiveSet = True
+    InitialCondition.InitialCondition(v).dynamic()
+    InitialCondition.InitialCondition(w).dynamic()
+    np.testing.assert_allclose(v.th[0], 13. / 3)
+    np.testing.assert_allclose(w.th[0], 1.5)
+    np.testing.assert_array_equal(w.th[1:], v.th[1:])
@@ -0,0 +1,242 @@
+import numpy as np
+import pytest
+
+from BandExecutor import BandExecutor
+from CheckGroundwaterTable import CheckGroundwaterTable
+from Drainage import Drainage
+from RainfallPartition import RainfallPartition
+from RootZoneWater import AQRootZoneWater
+from Infiltration import Infiltration
+from CapillaryRise import CapillaryRise
+from Germination import Germination
+from GrowthStage import AQGrowthStage
+from RootDevelopment import AQRootDevelopment
+from WaterStress import WaterStress
+from CanopyCover import CanopyCover
+from SoilEvaporation import SoilEvaporation
+from Transpiration import Transpiration
+from BiomassAccumulation import BiomassAccumulation
+from TemperatureStress import TemperatureStress
+from HarvestIndex import HarvestIndex
+from tests.state import make_state
+from tests.test_canopy_cover import add_canopy
+from tests.test_growth_stage import Seasons
+from tests.test_root_zone_water import add_crop
+from tests.test_soil_evaporation import add_evaporation, add_weather
+from tests.test_temperature_stress import add_temperature
+
+# All modules computed in bands, and the growth stage module, which is
+# computed over the clone map
+modules = [('check_groundwater_table_module', CheckGroundwaterTable),
+           ('drainage_module', Drainage),
+           ('rainfall_partition_module', RainfallPartition),
+           ('root_zone_water_module', AQRootZoneWater),
+           ('infiltration_module', Infiltration),
+           ('capillary_rise_module', CapillaryRise),
+           ('germination_module', Germination),
+           ('growth_stage_module', AQGrowthStage),
+           ('root_development_module', AQRootDevelopment),
+           ('water_stress_module', WaterStress),
+           ('canopy_cover_module', CanopyCover),
+           ('soil_evaporation_module', SoilEvaporation),
+           ('transpiration_module', Transpiration),
+           ('biomass_accumulation_module', BiomassAccumulation),
+           ('temperature_stress_module', TemperatureStress),
+           ('harvest_index_module', HarvestIndex)]
+
+# Daily sequence of AquaCrop, without the modules which are not computed
+# in bands and do not change the variables read by the modules above
+sequence = [('growth_stage_module', ()),
+            ('check_groundwater_table_module', ()),
+            ('drainage_module', ()),
+            ('rainfall_partition_module', ()),
+            ('root_zone_water_module', ()),
+            ('infiltration_module', ()),
+            ('capillary_rise_module', ()),
+            ('germination_module', ()),
+            ('growth_stage_module', ()),
+            ('root_development_module', ()),
+            ('root_zone_water_module', ()),
+            ('water_stress_module', (True,)),
+            ('canopy_cover_module', ()),
+            ('soil_evaporation_module', ()),
+            ('root_zone_water_module', ()),
+            ('water_stress_module', (True,)),
+            ('transpiration_module', ()),
+            ('biomass_accumulation_module', ()),
+            ('root_zone_water_module', ()),
+            ('water_stress_module', (True,)),
+            ('temperature_stress_module', ()),
+            ('harvest_index_module', ()),
+            ('root_zone_water_module', ())]
+
+outputs = ['th','th_fc_adj','DeepPerc','Runoff','Infl','SurfaceStorage','CrTot',
+           'Wr','Dr','TAW','thRZ_Act','thRZ_Aer','EsAct','EvapZ','Wsurf','Wstage2','Wevap_Sat',
+           'Germination','DelayedCDs','DelayedGDDs','AgeDays','AgeDays_NS','GrowthStage',
+           'Zroot','rCor','Ksw_Exp','Ksw_Sto','Ksw_Sen','Ksw_Pol','Ksw_StoLin',
+           'CC','CCadj','CC_NS','CCadj_NS','CCxAct','CCxW','tEarlySen','CropDead',
+           'TrAct','TrPot0','TrPot_NS','TrRatio','IrrNet','Ksa_Aer','AerDays',
+           'B','B_NS','Kst_Bio','Kst_PolH','Kst_PolC','HI','HIadj','Fpre','Fpol','Fpost']
+
+def add_phenology(v, seed):
+    """Function to add the crop parameters read by the germination, root
+    development, water stress, biomass and harvest index modules"""
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.CN = np.full(sh3, 72.)
+    v.CNbot = np.full(sh3, 60.)
+    v.CNtop = np.full(sh3, 85.)
+    v.AdjCN = r.choice([0, 1], sh3)
+    v.zCN = np.full(sh3, 0.3)
+    v.zGerm = np.full(sh3, 0.3)
+    v.GermThr = r.uniform(0.2, 0.8, sh3)
+    v.MaxCanopyCD = np.full(sh3, 20.)
+    v.Zmin = np.full(sh3, 0.3)
+    v.Aer = np.full(sh3, 5.)
+    v.MaxRooting = v.Emergence + 10
+    v.PctZmin = np.full(sh3, 70.)
+    v.Zmax = r.uniform(0.5, 1.5, sh3)
+    v.fshape_r = np.full(sh3, 1.5)
+    v.fshape_ex = np.full(sh3, -6.)
+    v.zRes = np.where(r.uniform(size=sh3) > 0.8, 0.6, -999.)
+    for stress, (p_up, p_lo, fshape_w) in enumerate([(0.2, 0.6, 3.), (0.5, 1., 3.), (0.7, 1., 3.), (0.9, 1., None)]):
+        setattr(v, 'p_up%i' % (stress + 1), np.full(sh3, p_up))
+        setattr(v, 'p_lo%i' % (stress + 1), np.full(sh3, p_lo))
+        if fshape_w is not None:
+            setattr(v, 'fshape_w%i' % (stress + 1), np.full(sh3, fshape_w))
+    v.beta = np.full(sh3, 12.)
+    v.CropType = r.choice([1, 2, 3], sh3)
+    v.Determinant = r.choice([0, 1], sh3)
+    v.PctLagPhase = np.full(sh3, 50.)
+    v.WP = np.full(sh3, 33.7)
+    v.WPy = np.full(sh3, 100.)
+    v.fCO2 = np.ones(sh3)
+    v.HI0 = np.full(sh3, 0.48)
+    v.dHI0 = np.full(sh3, 15.)
+    v.dHI_pre = np.full(sh3, 5.)
+    v.CCmin = np.full(sh3, 0.1)
+    v.exc = np.full(sh3, 50.)
+    v.a_HI = np.full(sh3, 7.)
+    v.b_HI = np.full(sh3, 3.)
+    v.HIstartCD = np.full(sh3, 10.)
+    v.FloweringCD = np.full(sh3, 6.)
+    v.YldFormCD = np.full(sh3, 15.)
+    v.CanopyDevEndCD = np.full(sh3, 18.)
+    v.HIendCD = v.HIstartCD + v.YldFormCD
+
+def add_crop_day(v, day):
+    """Function to add the daily weather and the variables of the crop
+    calendar read by the biomass and harvest index modules"""
+    add_weather(v, day)
+    r = np.random.RandomState(200 + day)
+    v.zGW = v.zGW2d - 0.1 * (day // 4)
+    v.tmin = r.uniform(-2, 12, (v.nLat, v.nLon))
+    v.tmax = r.uniform(25, 45, (v.nLat, v.nLon))
+    HIt = v.DAP - v.DelayedCDs - v.HIstartCD
+    v.HIt = np.clip(HIt, 0, None)
+    v.YieldFormWindow = v.GrowingSeasonIndex & (HIt > 0) & (HIt <= v.YldFormCD)
+    v.FloweringWindow = v.YieldFormWindow & (HIt <= v.FloweringCD) & (v.CropType == 3)
+    v.PolHeatWindow = v.FloweringWindow & (v.PolHeatStress == 1)
+    v.PolColdWindow = v.FloweringWindow & (v.PolColdStress == 1)
+    v.HIref = np.where(v.YieldFormWindow, 0.48 * np.clip(HIt / v.YldFormCD, 0, 1), 0.)
+
+def make_model(nBands, seed=0, CalendarType=1):
+    v = make_state(seed, nBands=str(nBands))
+    v.seasons = Seasons(v, seed, CalendarType)
+    add_evaporation(v, seed)
+    v.CalendarType = CalendarType
+    add_crop(v, seed)
+    add_canopy(v, seed, CalendarType)
+    add_temperature(v, seed)
+    add_phenology(v, seed)
+    v.zGW2d = v.zGW[0]
+    v.Irr = np.zeros_like(v.Irr)
+    for name, module in modules:
+        setattr(v, name, module(v))
+    for name, module in modules:
+        getattr(v, name).initial()
+    v.band_executor = BandExecutor(v)
+    v.band_executor.initial()
+    return v
+
+def run(v, days):
+    result = []
+    for day in range(days):
+        v.seasons.start_day(v)
+        add_crop_day(v, day)
+        for name, args in sequence:
+            with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+                getattr(v, name).dynamic(*args)
+        result.append(dict([(name, np.copy(getattr(v, name))) for name in outputs]))
+    v.band_executor.shutdown()
+    return result
+
+@pytest.mark.parametrize('CalendarType', [1, 2])
+@pytest.mark.parametrize('seed', range(3))
+def test_bands_same_as_clone_map(seed, CalendarType):
+    a = run(make_model(1, seed, CalendarType), 30)
+    b = run(make_model(3, seed, CalendarType), 30)
+    for x, y in zip(a, b):
+        for name in x:
+            np.testing.assert_array_equal(x[name], y[name], err_msg=name)
+
+def test_bands_share_module_state():
+    v = make_model(3)
+    executor = v.band_executor
+    assert len(executor.instances) == 3
+
+    # all modules which can be computed in bands are
+    assert sorted(executor.instances[0].keys()) == sorted(BandExecutor.modules)
+
+    # arrays over the clone map are only held by the bands
+    assert 'WrAct' not in vars(v.root_zone_water_module.module)
+    assert 'Wsat' not in vars(v.soil_evaporation_module.module)
+    WrAct = [instances['root_zone_water_module'].WrAct for instances in executor.instances]
+    assert WrAct[0].base is WrAct[-1].base
+    assert sum([value.shape[-2] for value in WrAct]) == v.nLat
+    for instances in executor.instances:
+        W, Wabove = instances['soil_evaporation_module'].Wsat
+        assert W.shape[-3] == instances['soil_evaporation_module'].var.nLat
+
+    # values which are the same for all cells are shared
+    assert executor.instances[0]['soil_evaporation_module'].EvapTimeSteps == 20
+    assert v.drainage_module.use_numba is False
+    executor.shutdown()
+    assert executor.pool is None
+
+class Assign(object):
+    """Module which assigns a different value in each band"""
+
+    def __init__(self, Assign_variable):
+        self.var = Assign_variable
+
+    def initial(self):
+        pass
+
+    def dynamic(self, name):
+        setattr(self.var, name, self.var._rows.start)
+
+    def partial(self, name):
+        if self.var._rows.start == 0:
+            setattr(self.var, name, 0)
+
+def make_executor():
+    v = make_state(0, nBands="3")
+    executor = BandExecutor(v)
+    executor.initial()
+    executor.instances = [{'assign_module' : Assign(None)} for band in executor.bands]
+    return v, executor
+
+def test_merge_different_values():
+    v, executor = make_executor()
+    with pytest.raises(ValueError):
+        executor.run('assign_module', ('Offset',), {})
+    executor.shutdown()
+
+def test_merge_not_assigned_in_all_bands():
+    v, executor = make_executor()
+    for instances in executor.instances:
+        instances['assign_module'].dynamic = instances['assign_module'].partial
+    with pytest.raises(ValueError):
+        executor.run('assign_module', ('Offset',), {})
+    executor.shutdown()
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from CanopyCover import CanopyCover
+from GrowthStage import AQGrowthStage
+from tests.reference import CanopyCover as reference_canopy_cover
+from tests.state import make_state, clone
+from tests.test_growth_stage import Seasons
+
+# The module evaluates each branch for the cells which need it only, and
+# tests the phenological event bits set by the growth stage module
+# instead of the development time; the reference module evaluates each
+# branch over the full grid
+
+tolerance = 1e-12
+
+class WaterStress(object):
+    """Random water stress coefficients, with severe stress (and early
+    canopy senescence) in some cells"""
+
+    def __init__(self, WaterStress_variable, seed):
+        self.var = WaterStress_variable
+        self.r = np.random.RandomState(seed)
+
+    def dynamic(self, beta):
+        sh3 = (self.var.nCrop, self.var.nLat, self.var.nLon)
+        self.var.Ksw_Exp = np.clip(self.r.uniform(0.3, 1.5, sh3), None, 1)
+        self.var.Ksw_Sen = np.where(self.r.uniform(size=sh3) > 0.9, self.r.uniform(0.5, 1, sh3), 1.)
+
+def add_canopy(v, seed, CalendarType):
+    """Function to add the canopy parameters of the crops, per day or
+    per growing degree day"""
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    unit = 1. if CalendarType == 1 else 12.
+    v.CC0 = r.uniform(0.005, 0.05, sh3)
+    v.CCx = r.uniform(0.6, 0.95, sh3)
+    v.CGC = r.uniform(0.1, 0.3, sh3) / unit
+    v.CDC = r.uniform(0.05, 0.2, sh3) / unit
+
+def run(module, v, seed, CalendarType, days):
+    """Function to run the canopy cover module after the growth stage
+    and germination, as the model does"""
+    seasons = Seasons(v, seed, CalendarType)
+    add_canopy(v, seed, CalendarType)
+    v.water_stress_module = WaterStress(v, seed)
+    v.water_stress_module.dynamic(beta=True)
+    growth_stage = AQGrowthStage(v)
+    module = module(v)
+    growth_stage.initial()
+    module.initial()
+    for day in range(days):
+        seasons.start_day(v)
+        growth_stage.dynamic()
+        seasons.germinate(v)
+        growth_stage.dynamic()
+        v.water_stress_module.dynamic(beta=True)
+        with np.errstate(invalid='ignore'):
+            module.dynamic()
+        yield v
+
+@pytest.mark.parametrize('CalendarType', [1, 2])
+@pytest.mark.parametrize('seed', range(5))
+def test_canopy_cover(seed, CalendarType):
+    v = make_state(seed)
+    names = ['CC','CCadj','CC_NS','CCadj_NS','CCxAct','CCxAct_NS','CCxW','CCxW_NS',
+             'CCxEarlySen','CC0adj','tEarlySen','PrematSenes','CropDead']
+    for a, b in zip(run(reference_canopy_cover.CanopyCover, clone(v), seed, CalendarType, 80),
+                    run(CanopyCover, clone(v), seed, CalendarType, 80)):
+        for name in names:
+            np.testing.assert_allclose(getattr(b, name), getattr(a, name), rtol=0, atol=tolerance, err_msg=name)
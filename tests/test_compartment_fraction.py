@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+
+from SoilAndTopoParameters import SoilAndTopoParameters
+from tests.reference import RootZoneWater as reference_root_zone_water
+from tests.state import make_state
+
+# The compartment fraction tables replace factors which the modules used
+# to compute over the full grid on every call
+
+def soil_parameters(v):
+    module = SoilAndTopoParameters(v)
+    module.compute_compartment_fraction_tables()
+    return module
+
+def test_tables_match_test_state():
+    v = make_state(0)
+    tables = [np.copy(v.CompFrac), np.copy(v.CompIdx), np.copy(v.CompFracGerm)]
+    soil_parameters(v)
+    for a, b in zip(tables, [v.CompFrac, v.CompIdx, v.CompFracGerm]):
+        np.testing.assert_array_equal(a, b)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_root_zone_fraction(seed):
+    # root depths are rounded to cm, so the table gives identical factors
+    v = make_state(seed)
+    module = soil_parameters(v)
+    r = np.random.RandomState(seed)
+    v.Zmin = np.full(v.th.shape[:1] + v.th.shape[2:], 0.3)
+    v.Zroot = r.uniform(0, v.dzsum[-1], v.Zmin.shape)
+    v.Zroot[0,0,0] = 2.0
+    reference_root_zone_water.RootZoneWater(v).fraction_of_compartment_in_root_zone()
+    np.testing.assert_array_equal(module.compartment_fraction(v.RootDepth), v.RootFact)
+
+def test_germination_fraction():
+    v = make_state(0)
+    module = soil_parameters(v)
+    sh3 = v.th.shape[:1] + v.th.shape[2:]
+    for zgerm in np.arange(0, int(np.round(v.dzsum[-1] * 1000)) + 1) / 1000.:
+        zgerm = np.full(sh3, zgerm)
+        comp_sto = (np.round(v.dzsum_xy * 1000) <= np.round(np.broadcast_to(zgerm[:,None,:,:], v.th.shape) * 1000))
+        factor = 1. - np.round(((v.dzsum_xy - zgerm[:,None,...]) / v.dz_xy), 3)
+        factor = np.clip(factor, 0, 1) * comp_sto
+        np.testing.assert_array_equal(module.compartment_fraction(zgerm, v.CompFracGerm), factor)
+
+def test_evaporation_layer_fraction():
+    # the evaporation layer grows by repeated 0.001 m increments, so depths
+    # are whole mm to rounding error only
+    v = make_state(0)
+    module = soil_parameters(v)
+    sh3 = v.th.shape[:1] + v.th.shape[2:]
+    z = 0.1
+    while z < v.dzsum[-1]:
+        evapz = np.full(sh3, z)
+        evapz_comp = evapz[:,None,:,:] * np.ones((v.nComp))[None,:,None,None]
+        comp_sto = (np.round((v.dzsum_xy - v.dz_xy) * 1000) < np.round(evapz_comp * 1000))
+        factor = np.clip(1 - ((v.dzsum_xy - evapz_comp) / v.dz_xy), 0, 1) * comp_sto
+        np.testing.assert_allclose(module.compartment_fraction(evapz), factor, rtol=0, atol=1e-12)
+        z += 0.001
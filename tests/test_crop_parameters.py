@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+
+from CropParameters import CropParameters
+from CurrTimeStep import ModelTime
+from tests.reference import CropParameters as reference_crop_parameters
+from tests.state import make_state, clone
+
+# The growing season table replaces the daily comparison of the day of the
+# year with the adjusted planting and harvest dates. Crops are not present
+# where either date is missing or outside the year (see read_crop_presence),
+# so dates are either valid or both missing
+
+names = ['GrowingSeason','GrowingSeasonIndex','GrowingSeasonDayOne','DAP','PlantingDateAdj','HarvestDateAdj']
+
+def add_crop_calendar(v, seed):
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v._configuration.cropOptions = {'nCrop' : str(v.nCrop), 'cropParameterNC' : "None", 'cropPresenceNC' : "None"}
+    v.PlantingDate = r.choice([1, 30, 58, 59, 60, 61, 120, 250, 365, 366], sh3).astype(np.float64)
+    v.HarvestDate = r.choice([1, 58, 59, 60, 61, 150, 200, 300, 365, 366], sh3).astype(np.float64)
+    v.PlantingDate[(r.uniform(size=sh3) > 0.9) & (v.PlantingDate < 366)] += 0.5
+    equal = (r.uniform(size=sh3) > 0.9)
+    v.HarvestDate[equal] = v.PlantingDate[equal]
+    missing = (r.uniform(size=sh3) > 0.9)
+    v.PlantingDate[missing] = np.nan
+    v.HarvestDate[missing] = np.nan
+
+def run(module, v, seed, start, end):
+    v._modelTime = ModelTime()
+    v._modelTime.getStartEndTimeSteps(start, end, showNumberOfTimeSteps=False)
+    module = module(v)
+    module.initial()
+    module.read()
+    r = np.random.RandomState(seed)
+    result = []
+    for timestep in range(1, v._modelTime.nrOfTimeSteps + 1):
+        v._modelTime.update(timestep)
+        v.CropDead = r.uniform(size=v.DAP.shape) > 0.99
+        v.CropMature = r.uniform(size=v.DAP.shape) > 0.99
+        module.adjust_planting_and_harvesting_date()
+        module.update_growing_season()
+        result.append([np.copy(getattr(v, name)) for name in names])
+    return result
+
+@pytest.mark.parametrize('start,end', [
+    ('2000-03-15', '2003-10-01'),
+    ('2001-01-01', '2001-12-31'),
+    ('1999-07-01', '2005-02-28'),
+    ('2003-12-01', '2004-03-31')])
+@pytest.mark.parametrize('seed', range(2))
+def test_growing_season(seed, start, end):
+    v = make_state(seed, nCrop=2)
+    add_crop_calendar(v, seed)
+    a = run(reference_crop_parameters.CropParameters, clone(v), seed, start, end)
+    b = run(CropParameters, clone(v), seed, start, end)
+    for a_day, b_day in zip(a, b):
+        for name, x, y in zip(names, a_day, b_day):
+            np.testing.assert_array_equal(x, y, err_msg=name)
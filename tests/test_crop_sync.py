@@ -0,0 +1,94 @@
+import warnings
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+pytest.importorskip('scipy')
+
+import InitialCondition
+from CropParameters import CropParameters
+from CropSync import CropSync
+from SharedInput import fork_context, shared_array
+from tests.state import make_state, clone
+from tests.test_crop_parameters import add_crop_calendar, run
+
+class ModelTime(object):
+    isLeapYear = False
+    doy = 100
+
+def add_seasons(v, seed):
+    """Function to start growing seasons of some crops, in cells in which
+    other crops are or are not being grown"""
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v._modelTime = ModelTime()
+    v.GrowingSeasonIndex = r.uniform(size=sh3) > 0.4
+    v.GrowingSeasonDayOne = v.GrowingSeasonIndex & (r.uniform(size=sh3) > 0.6)
+    v.thChanged = np.zeros(sh3, dtype=bool)
+
+def run_crops(cropsync, v, crops, th):
+    """Function to compute the initial condition of the crops of one
+    worker process"""
+    w = clone(v)
+    w.nCrop = crops.stop - crops.start
+    for name in ['th','GrowingSeasonIndex','GrowingSeasonDayOne','thChanged']:
+        setattr(w, name, getattr(v, name)[crops])
+    cropsync.crops = crops
+    cropsync.dynamic(w)
+    th[crops] = w.th
+
+@pytest.mark.parametrize('nWorkers', [2, 3])
+@pytest.mark.parametrize('seed', range(3))
+def test_initial_condition_same_as_single_process(seed, nWorkers):
+    v = make_state(seed, nCrop=5)
+    add_seasons(v, seed)
+
+    # single process
+    a = clone(v)
+    # (cells in which all crops are being grown have no average)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        InitialCondition.InitialCondition(a).dynamic()
+
+    # crops split between worker processes
+    cropsync = CropSync(nWorkers, v.nCrop, v.nComp, v.nLat, v.nLon)
+    cropsync.plantingDays[int(ModelTime.isLeapYear), ModelTime.doy] = True
+    th = shared_array(v.th.shape, np.float64)
+    ctx = fork_context()
+    processes = []
+    for crops in np.array_split(np.arange(v.nCrop), nWorkers):
+        crops = slice(int(crops[0]), int(crops[-1]) + 1)
+        processes.append(ctx.Process(target=run_crops, args=(cropsync, v, crops, th)))
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(60)
+        assert p.exitcode == 0
+    np.testing.assert_array_equal(th, a.th)
+    assert np.any(th != v.th)
+
+@pytest.mark.parametrize('start,end', [
+    ('2000-03-15', '2003-10-01'),
+    ('2003-12-01', '2004-03-31')])
+@pytest.mark.parametrize('seed', range(2))
+def test_planting_days(seed, start, end):
+    # the planting days of the growing season table are the days on
+    # which growing seasons start
+    v = make_state(seed, nCrop=2)
+    add_crop_calendar(v, seed)
+    module = CropParameters(v)
+    v.crop_parameters_module = module
+    started = []
+    def update_growing_season():
+        CropParameters.update_growing_season(module)
+        if np.any(v.GrowingSeasonDayOne):
+            started.append((v._modelTime.isLeapYear, v._modelTime.doy))
+    module.update_growing_season = update_growing_season
+    run(lambda v: module, v, seed, start, end)
+    assert len(started) > 0
+
+    cropsync = CropSync(1, v.nCrop, v.nComp, v.nLat, v.nLon)
+    cropsync.initial(v)
+    for leap, doy in started:
+        assert cropsync.plantingDays[int(leap), doy]
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import GrowthStage as growth_stage
+from GrowthStage import AQGrowthStage
+from tests.reference import GrowthStage as reference_growth_stage
+from tests.state import make_state, clone
+
+# Event bits and the comparison of the development time with each event
+# which they replace
+events = [
+    (growth_stage.EMERGENCE_REACHED, lambda t, v: t >= v.Emergence),
+    (growth_stage.CANOPY10PCT_PASSED, lambda t, v: t > v.Canopy10Pct),
+    (growth_stage.MAXCANOPY_PASSED, lambda t, v: t > v.MaxCanopy),
+    (growth_stage.CANOPYDEVEND_REACHED, lambda t, v: t >= v.CanopyDevEnd),
+    (growth_stage.CANOPYDEVEND_PASSED, lambda t, v: t > v.CanopyDevEnd),
+    (growth_stage.HISTART_PASSED, lambda t, v: t > v.HIstart),
+    (growth_stage.SENESCENCE_REACHED, lambda t, v: t >= v.Senescence),
+    (growth_stage.SENESCENCE_PASSED, lambda t, v: t > v.Senescence),
+    (growth_stage.MATURITY_REACHED, lambda t, v: t >= v.Maturity),
+    (growth_stage.MATURITY_PASSED, lambda t, v: t > v.Maturity),
+    (growth_stage.MATURITY_DAY_PASSED, lambda t, v: np.round(t) > v.Maturity)]
+
+class Seasons(object):
+    """Random growing seasons with delayed germination, crop death and
+    re-planting with different crop parameters"""
+
+    def __init__(self, v, seed, CalendarType):
+        self.r = np.random.RandomState(seed)
+        sh3 = (v.nCrop, v.nLat, v.nLon)
+        v.CalendarType = CalendarType
+        v.GrowingSeasonIndex = np.zeros(sh3, dtype=bool)
+        v.GrowingSeasonDayOne = np.zeros(sh3, dtype=bool)
+        v.Germination = np.zeros(sh3, dtype=bool)
+        v.DAP = np.zeros(sh3)
+        v.DelayedCDs = np.zeros(sh3)
+        v.GDDcum = np.zeros(sh3)
+        v.DelayedGDDs = np.zeros(sh3)
+        for param in AQGrowthStage.phenology:
+            setattr(v, param, np.zeros(sh3))
+        self.plant(v, self.r.uniform(size=sh3) > 0.3)
+        v.GrowingSeasonDayOne[:] = False
+
+    def plant(self, v, cond):
+        r = self.r
+        unit = 1. if v.CalendarType == 1 else 12.
+        t = np.cumsum(r.choice([0, 1, 2, 3, 5], (len(AQGrowthStage.phenology),) + cond.shape), axis=0) + 4
+        t = t * unit + (r.uniform(-0.5, 0.5, t.shape) if v.CalendarType == 2 else 0)
+        for row, param in enumerate(AQGrowthStage.phenology):
+            getattr(v, param)[cond] = t[row][cond]
+        v.GrowingSeasonIndex[cond] = True
+        v.GrowingSeasonDayOne[:] = cond
+        v.Germination[cond] = False
+        v.DAP[cond] = 1
+        v.DelayedCDs[cond] = 0
+        v.GDDcum[cond] = 0
+        v.DelayedGDDs[cond] = 0
+
+    def start_day(self, v):
+        r = self.r
+        sh3 = v.DAP.shape
+        GDD = r.uniform(5, 20, sh3)
+        v.DAP[v.GrowingSeasonIndex] += 1
+        v.GDDcum[v.GrowingSeasonIndex] += GDD[v.GrowingSeasonIndex]
+        v.GDD = GDD
+        tAdj = (v.DAP - v.DelayedCDs) if v.CalendarType == 1 else (v.GDDcum - v.DelayedGDDs)
+        v.GrowingSeasonIndex[(tAdj > v.Maturity + 3) | (r.uniform(size=sh3) > 0.98)] = False
+        self.plant(v, np.logical_not(v.GrowingSeasonIndex) & (r.uniform(size=sh3) > 0.8))
+
+    def germinate(self, v):
+        r = self.r
+        cond = v.GrowingSeasonIndex & np.logical_not(v.Germination) & (r.uniform(size=v.DAP.shape) > 0.6)
+        v.Germination[cond] = True
+        cond = v.GrowingSeasonIndex & np.logical_not(v.Germination)
+        v.DelayedCDs[cond] += 1
+        v.DelayedGDDs[cond] += v.GDD[cond]
+
+def run(v, seed, CalendarType, days):
+    """Function to run the growth stage modules before and after
+    germination, as the model does, and yield the growth stage of the
+    reference module after each call"""
+    seasons = Seasons(v, seed, CalendarType)
+    module = AQGrowthStage(v)
+    reference = reference_growth_stage.AQGrowthStage(v)
+    module.initial()
+    reference.initial()
+    for day in range(days):
+        seasons.start_day(v)
+        for step in range(2):
+            GrowthStage = np.copy(v.GrowthStage)
+            v.GrowthStage = GrowthStage
+            reference.dynamic()
+            expected = np.copy(v.GrowthStage)
+            v.GrowthStage = GrowthStage
+            module.dynamic()
+            yield expected
+            if step == 0:
+                seasons.germinate(v)
+
+@pytest.mark.parametrize('CalendarType', [1, 2])
+@pytest.mark.parametrize('seed', range(3))
+def test_growth_stage(seed, CalendarType):
+    v = make_state(seed)
+    for expected in run(v, seed, CalendarType, 60):
+        np.testing.assert_array_equal(v.GrowthStage, expected)
+
+@pytest.mark.parametrize('CalendarType', [1, 2])
+@pytest.mark.parametrize('seed', range(3))
+def test_event_bits(seed, CalendarType):
+    v = make_state(seed)
+    for _ in run(v, seed, CalendarType, 60):
+        tAdj = (v.DAP - v.DelayedCDs) if CalendarType == 1 else (v.GDDcum - v.DelayedGDDs)
+        cond = v.GrowingSeasonIndex
+        for bit, compare in events:
+            np.testing.assert_array_equal(((v.PhenoEvents & bit) != 0)[cond], compare(tAdj, v)[cond])
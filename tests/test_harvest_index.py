@@ -0,0 +1,86 @@
+import numpy as np
+
+from HarvestIndex import HarvestIndex
+from tests.reference import HarvestIndex as reference_harvest_index
+from tests.state import make_state, clone
+
+def test_pollination_stress():
+    # the pollination adjustment is limited by the greatest of water, cold
+    # and heat stress, and the stress coefficients are not changed
+    v = make_state(0)
+    r = np.random.RandomState(0)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.FloweringWindow = np.ones(sh3, dtype=bool)
+    v.HIt = np.full(sh3, 5.)
+    v.FloweringCD = np.full(sh3, 15.)
+    v.CC = np.full(sh3, 0.8)
+    v.CCmin = np.full(sh3, 0.1)
+    v.exc = np.full(sh3, 50.)
+    v.Ksw_Pol = r.uniform(size=sh3)
+    v.Kst_PolC = r.uniform(size=sh3)
+    v.Kst_PolH = r.uniform(size=sh3)
+    Ks = [np.copy(v.Ksw_Pol), np.copy(v.Kst_PolC), np.copy(v.Kst_PolH)]
+    module = HarvestIndex(v)
+    module.initial()
+    module.HI_adj_pollination()
+    for a, b in zip(Ks, [v.Ksw_Pol, v.Kst_PolC, v.Kst_PolH]):
+        np.testing.assert_array_equal(a, b)
+    Fpol = np.copy(v.Fpol)
+
+    # without stress
+    v.Ksw_Pol = v.Kst_PolC = v.Kst_PolH = np.ones(sh3)
+    module.initial()
+    module.HI_adj_pollination()
+    np.testing.assert_allclose(Fpol, np.min(Ks, axis=0) * v.Fpol, rtol=1e-12)
+
+def add_post_anthesis(v, seed):
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.GrowingSeasonIndex = np.ones(sh3, dtype=bool)
+    v.YieldForm = np.ones(sh3, dtype=bool)
+    v.HIt = np.full(sh3, 5.)
+    v.YieldFormWindow = np.ones(sh3, dtype=bool)
+    v.CropType = r.choice([2, 3], sh3)
+    v.DelayedCDs = r.choice([0., 2., 5.], sh3)
+    v.HIstartCD = np.full(sh3, 60.)
+    v.CanopyDevEndCD = np.full(sh3, 75.)
+    v.HIendCD = np.full(sh3, 110.)
+    v.YldFormCD = np.full(sh3, 50.)
+    v.a_HI = np.full(sh3, 7.)
+    v.b_HI = np.full(sh3, 3.)
+    v.CC = np.full(sh3, 0.8)
+    v.Ksw_Exp = r.uniform(0.5, 1, sh3)
+    v.Ksw_Sto = r.uniform(0.5, 1, sh3)
+
+def test_post_anthesis_days_after_planting():
+    # the adjustment uses the days after planting less the delay in
+    # germination; the previous module subtracted the delay from DAP
+    # itself on every call, so that DAP went backwards
+    v = make_state(0)
+    add_post_anthesis(v, 0)
+    a = clone(v)
+    b = clone(v)
+    reference = reference_harvest_index.HarvestIndex(a)
+    reference.initial()
+    module = HarvestIndex(b)
+    module.initial()
+    for day in range(10):
+        DAP = 65. + day
+        a.DAP = np.full(v.HIt.shape, DAP)
+        b.DAP = np.full(v.HIt.shape, DAP)
+        reference.HI_adj_post_anthesis()
+        module.HI_adj_post_anthesis()
+        np.testing.assert_array_equal(a.DAP, DAP - v.DelayedCDs)
+        np.testing.assert_array_equal(b.DAP, DAP)
+        for name in ['sCor1','sCor2','fpost_upp','fpost_dwn','Fpost']:
+            np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=1e-12, err_msg=name)
+
+    # the model only increments DAP each day, so in the previous module
+    # the delay accumulated over the season
+    a.DAP = np.full(v.HIt.shape, 65.)
+    b.DAP = np.full(v.HIt.shape, 65.)
+    for day in range(10):
+        reference.HI_adj_post_anthesis()
+        module.HI_adj_post_anthesis()
+    np.testing.assert_array_equal(a.DAP, 65. - 10 * v.DelayedCDs)
+    np.testing.assert_array_equal(b.DAP, 65.)
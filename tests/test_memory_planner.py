@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+
+from MemoryPlanner import AQMemoryPlanner, FAO56MemoryPlanner
+from tests.state import make_state
+
+def make_planner(planner, memoryBudget=None):
+    v = make_state(0, nCrop=2, nLat=40, nLon=10)
+    v.memoryBudget = memoryBudget
+    planner = planner(v)
+    planner.nComp = v.nComp
+    planner.fixed_memory = 0
+    return planner
+
+def test_latitude_bands_within_budget():
+    planner = make_planner(AQMemoryPlanner)
+    planner.var.memoryBudget = planner.calendar_memory(366, 7)
+    bands = planner.latitude_bands(366)
+    assert [(band.start, band.stop) for band in bands] == [(0,7),(7,14),(14,21),(21,28),(28,35),(35,40)]
+
+def test_latitude_bands_without_budget():
+    planner = make_planner(AQMemoryPlanner)
+    assert planner.latitude_bands(366) == [slice(0, 40)]
+
+def test_latitude_bands_without_calendar():
+    # the FAO56 model keeps no crop calendar arrays
+    planner = make_planner(FAO56MemoryPlanner, memoryBudget=1024 ** 2)
+    assert planner.calendar_memory(366, 1) == 0
+    assert planner.latitude_bands(366) == [slice(0, 40)]
+
+def test_count_state():
+    planner = make_planner(AQMemoryPlanner)
+    v = planner.var
+    for name in list(vars(v).keys()):
+        if isinstance(getattr(v, name), np.ndarray):
+            delattr(v, name)
+
+    class Module(object):
+        pass
+
+    v.cache_module = Module()
+    v.cache_module.cache = np.zeros((v.nCrop, v.nComp, v.nLat, v.nLon))
+    v.cache_module.view = v.cache_module.cache[:,0,...]
+    v.A = np.zeros((v.nCrop, v.nLat, v.nLon))
+    v.B = np.zeros((v.nCrop, v.nLat, v.nLon), dtype=bool)
+    v.C = np.broadcast_to(np.zeros((v.nLat, v.nLon)), (v.nCrop, v.nLat, v.nLon))
+    v.D = np.zeros((v.nCrop, v.nComp, v.nLat, v.nLon))
+    v.E = v.D
+    assert planner.count_state() == (1.125, 2)
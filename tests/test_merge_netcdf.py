@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+nc = pytest.importorskip('netCDF4')
+
+import VirtualOS as vos
+from ncConverter import mergeNetCDF
+from Tiles import Tiles
+from tests.test_tiles import random_landmask
+
+def write_output(ncFile, data, latitudes, longitudes, static):
+    """Function to write model output in the format of np2netCDF, with
+    missing values at cells which are not land"""
+    f = nc.Dataset(ncFile, 'w', format='NETCDF4')
+    f.createDimension('time', None)
+    f.createDimension('lat', len(latitudes))
+    f.createDimension('lon', len(longitudes))
+    t = f.createVariable('time', 'f8', ('time',))
+    t.units = 'days since 2000-01-01'
+    t[:] = np.arange(data.shape[0])
+    f.createVariable('lat', 'f4', ('lat',))[:] = latitudes
+    f.createVariable('lon', 'f4', ('lon',))[:] = longitudes
+    var = f.createVariable('Y', 'f4', ('time','lat','lon'), fill_value=vos.MV, zlib=True)
+    var.units = 'tonne ha-1'
+    var[:] = data
+    f.createVariable('Zmax', 'f4', ('lat','lon'), fill_value=vos.MV)[:] = static
+    f.description = 'AquaCrop output'
+    f.close()
+
+def read_output(ncFile):
+    f = nc.Dataset(ncFile)
+    out = dict([(name, (f.variables[name][:], f.variables[name].ncattrs())) for name in f.variables])
+    out['_attributes'] = f.ncattrs()
+    f.close()
+    return out
+
+@pytest.mark.parametrize('cf', [False, True])
+@pytest.mark.parametrize('seed', range(3))
+def test_merge_same_as_single_process(tmpdir, seed, cf):
+    nLat, nLon, nTime = 11, 9, 5
+    landmask = random_landmask(seed, nLat, nLon)
+    r = np.random.RandomState(seed)
+    data = np.ma.masked_array(r.uniform(0, 10, (nTime, nLat, nLon)))
+    data[:, ~landmask] = np.ma.masked
+    static = np.ma.masked_array(r.uniform(0.3, 1.5, (nLat, nLon)), mask=~landmask)
+    latitudes = 30. - 0.5 * np.arange(nLat)
+    longitudes = 80. + 0.5 * np.arange(nLon)
+
+    # output written in the orientation of the configuration
+    def orient(x):
+        if cf:
+            return x[..., ::-1, :]
+        return x
+    def orient_lat(x):
+        if cf:
+            return x[::-1]
+        return x
+
+    single = str(tmpdir.join('single.nc'))
+    write_output(single, orient(data), orient_lat(latitudes), longitudes, orient(static))
+
+    tiles = Tiles(landmask, 4, 'blocks', cf)
+    tiles.make_tiles()
+    parts = []
+    for tile in tiles.tiles:
+        window = (slice(*tile['rows']), slice(*tile['cols']))
+        part = str(tmpdir.join('tile_%03i.nc' % tile['number']))
+        write_output(part, orient(data[(Ellipsis,) + window]), orient_lat(latitudes[window[0]]),
+                     longitudes[window[1]], orient(static[window]))
+        parts.append((part, tiles.tile_window(tile)))
+
+    merged = str(tmpdir.join('merged.nc'))
+    mergeNetCDF(merged, parts, {'lat' : nLat, 'lon' : nLon},
+                {'lat' : orient_lat(latitudes), 'lon' : longitudes}, chunkSize=2)
+
+    a = read_output(single)
+    b = read_output(merged)
+    assert sorted(a.keys()) == sorted(b.keys())
+    assert a['_attributes'] == b['_attributes']
+    for name in a:
+        if name == '_attributes':
+            continue
+        x, xattrs = a[name]
+        y, yattrs = b[name]
+        assert sorted(xattrs) == sorted(yattrs), name
+        np.testing.assert_array_equal(np.ma.getmaskarray(x), np.ma.getmaskarray(y), err_msg=name)
+        np.testing.assert_array_equal(np.ma.filled(x, 0), np.ma.filled(y, 0), err_msg=name)
+
+    f = nc.Dataset(merged)
+    assert f.variables['Y'].getncattr('_FillValue') == np.float32(vos.MV)
+    f.close()
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('numba')
+
+from Drainage import Drainage
+from tests.state import make_state, clone
+
+# The compiled kernels (globalOptions:UseNumba = 1) compute each soil
+# column in scalar arithmetic, and the numpy implementation evaluates
+# the same expressions on arrays: results agree to rounding error
+tolerance = 1e-12
+
+def assert_close(a, b, names):
+    for name in names:
+        np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=0, atol=tolerance, err_msg=name)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_drainage_kernel(seed):
+    v = make_state(seed)
+    results = []
+    for flag in ["0", "1"]:
+        w = clone(v)
+        w._configuration.globalOptions['UseNumba'] = flag
+        module = Drainage(w)
+        module.initial()
+        assert module.use_numba == (flag == "1")
+        for day in range(5):
+            module.dynamic()
+            w.th += np.random.RandomState(day).uniform(0, 0.02, w.th.shape)
+        results.append(w)
+    assert_close(results[0], results[1], ['th','FluxOut','DeepPerc'])
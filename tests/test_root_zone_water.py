@@ -0,0 +1,122 @@
+import numpy as np
+
+from Drainage import Drainage
+from Infiltration import Infiltration
+from CapillaryRise import CapillaryRise
+from RootZoneWater import AQRootZoneWater
+from CheckGroundwaterTable import CheckGroundwaterTable
+from SoilEvaporation import SoilEvaporation
+from Transpiration import Transpiration
+from Inflow import Inflow
+from tests.reference import RootZoneWater as reference_root_zone_water
+from tests.state import make_state, clone
+from tests.test_soil_evaporation import add_evaporation, add_weather
+
+# Root zone storages are cached between calls and updated in the cells
+# marked by the modules which change the water content; the reference
+# module recomputes every cell on every call
+
+tolerance = 1e-12
+
+def grow_roots(v, day):
+    r = np.random.RandomState(day)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.Zmin = np.full(sh3, 0.3)
+    if day == 0:
+        v.Zroot = r.uniform(0.2, 1.5, sh3)
+    else:
+        v.Zroot = v.Zroot + r.uniform(0, 0.05, sh3) * (r.uniform(size=sh3) > 0.5)
+    v.Aer = np.full(sh3, 5.) + 5 * (day > 5)
+    v.Infl = r.uniform(0, 40, sh3) * (r.uniform(size=sh3) > 0.5)
+
+def add_crop(v, seed):
+    """Function to add the crop variables read by the transpiration
+    module, with net irrigation in some cells
+    """
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    for name in ['AgeDays','AgeDays_NS','IrrNet','IrrNetCum']:
+        setattr(v, name, np.zeros(sh3))
+    v.CCadj_NS = np.copy(v.CCadj)
+    v.CCxW_NS = np.copy(v.CCxW)
+    v.CurrentConc = np.full(sh3, 369.)
+    v.RefConc = 369.
+    v.ETadj = np.ones(sh3)
+    v.Kcb = np.full(sh3, 1.1)
+    v.Ksw_StoLin = r.uniform(0.5, 1, sh3)
+    v.LagAer = np.full(sh3, 3)
+    v.NetIrrSMT = np.full(sh3, 100.)
+    v.SxTop = np.full(sh3, 0.05)
+    v.SxBot = np.full(sh3, 0.01)
+    v.rCor = np.ones(sh3)
+    v.a_Tr = np.ones(sh3)
+    v.fage = np.full(sh3, 0.15)
+    v.fshape_w2 = np.full(sh3, 3.)
+    v.p_up2 = np.full(sh3, 0.5)
+    v.p_lo2 = np.ones(sh3)
+    v.IrrMethod = np.where(r.uniform(size=sh3) > 0.8, 4, 1)
+
+def test_daily_sequence():
+    # the reference module broadcasts Aer against the compartments, which
+    # only works for a single crop
+    v = make_state(7, nCrop=1)
+    results = []
+    for root_zone_water in [reference_root_zone_water.AQRootZoneWater, AQRootZoneWater]:
+        w = clone(v)
+        modules = [Drainage(w), Infiltration(w), CapillaryRise(w), root_zone_water(w)]
+        for module in modules:
+            module.initial()
+        result = []
+        for day in range(10):
+            grow_roots(w, day)
+            for module in modules:
+                module.dynamic()
+            result.append([np.copy(getattr(w, name)) for name in ['thRZ_Act','thRZ_Sat','thRZ_Fc','thRZ_Wp','thRZ_Dry','thRZ_Aer','TAW','Dr','Wr']])
+        results.append(result)
+    for a, b in zip(*results):
+        for x, y in zip(a, b):
+            np.testing.assert_allclose(x, y, rtol=0, atol=tolerance)
+
+def test_full_daily_sequence():
+    # all modules which change the water content, in the order in which
+    # they are called in AquaCrop, with root zone water computed between
+    # them; there are no roots in cells without data
+    v = make_state(11, nCrop=1)
+    add_evaporation(v, 11)
+    add_crop(v, 11)
+    zGW = v.zGW[0]
+    results = []
+    for root_zone_water in [reference_root_zone_water.AQRootZoneWater, AQRootZoneWater]:
+        w = clone(v)
+        w.root_zone_water_module = root_zone_water(w)
+        modules = [CheckGroundwaterTable(w), Drainage(w), w.root_zone_water_module,
+                   Infiltration(w), CapillaryRise(w), w.root_zone_water_module,
+                   SoilEvaporation(w), w.root_zone_water_module,
+                   Transpiration(w), Inflow(w), w.root_zone_water_module]
+        for module in modules:
+            module.initial()
+        result = []
+        for day in range(10):
+            grow_roots(w, day)
+            w.Zroot[:,0,:] = np.nan
+            add_weather(w, day)
+            w.zGW = zGW - 0.2 * (day // 3)
+            for module in modules:
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    module.dynamic()
+            result.append([np.copy(getattr(w, name)) for name in ['th','thRZ_Act','thRZ_Sat','thRZ_Fc','thRZ_Wp','thRZ_Dry','thRZ_Aer','TAW','Dr','Wr','TrAct','IrrNet']])
+        results.append(result)
+    for a, b in zip(*results):
+        for x, y in zip(a, b):
+            np.testing.assert_allclose(x, y, rtol=0, atol=tolerance)
+
+def test_water_content_changes_are_marked():
+    v = make_state(3)
+    grow_roots(v, 0)
+    for module in [Drainage(v), Infiltration(v), CapillaryRise(v)]:
+        module.initial()
+        v.thChanged[:] = False
+        th = np.copy(v.th)
+        module.dynamic()
+        changed = np.any(v.th != th, axis=1)
+        assert np.all(v.thChanged[changed])
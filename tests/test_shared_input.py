@@ -0,0 +1,139 @@
+import datetime
+import time
+
+import numpy as np
+import pytest
+
+pytest.importorskip('pcraster')
+nc = pytest.importorskip('netCDF4')
+
+import VirtualOS as vos
+from SharedInput import SharedInput, fork_context, shared_array
+
+def fill(a):
+    a[:] = 1
+
+def test_fork_context():
+    # worker processes must be forked to inherit the shared memory, also
+    # where the default start method is spawn or forkserver
+    ctx = fork_context()
+    assert ctx.get_start_method() == 'fork'
+    a = shared_array((3, 4), np.float64)
+    p = ctx.Process(target=fill, args=(a,))
+    p.start()
+    p.join()
+    assert p.exitcode == 0
+    np.testing.assert_array_equal(a, 1)
+
+class Configuration(object):
+    """Configuration with daily precipitation only, read over the whole
+    extent of the netCDF file (no clone map)"""
+
+    def __init__(self, ncFile, nDays, nSlots):
+        endTime = datetime.date(2000, 1, 1) + datetime.timedelta(days=nDays - 1)
+        self.globalOptions = {'startTime' : '2000-01-01',
+                              'endTime' : str(endTime),
+                              'sharedInputSlots' : str(nSlots),
+                              'initialConditionNC' : "None"}
+        self.soilOptions = {'soilAndTopoNC' : "None"}
+        self.cropOptions = {'cropParameterNC' : "None", 'cropPresenceNC' : "None"}
+        self.irrMgmtOptions = {'irrMgmtParameterNC' : "None"}
+        self.fieldMgmtOptions = {'fieldMgmtParameterNC' : "None"}
+        self.meteoOptions = {'precipitationNC' : ncFile,
+                             'temperatureNC' : "None",
+                             'refETPotFileNC' : "None"}
+        self.cloneMap = None
+
+def write_forcing(ncFile, nDays, nLat=6, nLon=5, seed=0):
+    r = np.random.RandomState(seed)
+    f = nc.Dataset(ncFile, 'w')
+    f.createDimension('time', None)
+    f.createDimension('lat', nLat)
+    f.createDimension('lon', nLon)
+    t = f.createVariable('time', 'f8', ('time',))
+    t.units = 'days since 2000-01-01'
+    t.calendar = 'standard'
+    t[:] = np.arange(nDays)
+    f.createVariable('lat', 'f8', ('lat',))[:] = 10. - 0.5 * np.arange(nLat)
+    f.createVariable('lon', 'f8', ('lon',))[:] = 80. + 0.5 * np.arange(nLon)
+    p = f.createVariable('precipitation', 'f8', ('time','lat','lon'), fill_value=1e20)
+    data = np.ma.masked_array(r.uniform(0, 20, (nDays, nLat, nLon)))
+    data[:, 0, 0] = np.ma.masked
+    data[r.uniform(size=data.shape) > 0.9] = np.ma.masked
+    p[:] = data
+    f.close()
+
+def date(day):
+    return str(datetime.date(2000, 1, 1) + datetime.timedelta(days=day))
+
+def read(shared, ncFile, reader, rows, data, mask, failed):
+    """Function to read the forcing of every day (in a worker process),
+    at a different pace for each worker"""
+    r = np.random.RandomState(reader)
+    shared.set_window(rows, (0, data.shape[-1]))
+    try:
+        for day in range(data.shape[1]):
+            d = shared.get_forcing(ncFile, 'precipitation', date(day))
+            data[reader, day, rows[0]:rows[1]] = np.ma.getdata(d)
+            mask[reader, day, rows[0]:rows[1]] = np.ma.getmaskarray(d)
+            time.sleep(r.uniform(0, 0.01))
+    except RuntimeError:
+        failed[reader] = True
+    shared.release()
+
+def run_readers(shared, ncFile, nDays, windows):
+    nLat, nLon = shared.forcing[(ncFile, 'precipitation')]['data'].shape[1:]
+    data = shared_array((len(windows), nDays, nLat, nLon), np.float64)
+    mask = shared_array((len(windows), nDays, nLat, nLon), bool)
+    failed = shared_array((len(windows),), bool)
+    processes = [fork_context().Process(target=read, args=(shared, ncFile, reader, rows, data, mask, failed))
+                 for reader, rows in enumerate(windows)]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join(60)
+        assert not p.is_alive()
+    shared.stop()
+    return data, mask, failed
+
+@pytest.mark.parametrize('nSlots', [1, 3])
+def test_forcing_ring_buffer(tmpdir, nSlots):
+    # more days than slots, so that the loader must wait for the readers
+    nDays = 10
+    ncFile = str(tmpdir.join('precipitation.nc'))
+    write_forcing(ncFile, nDays)
+    windows = [(0, 2), (2, 5), (5, 6)]
+    shared = SharedInput(Configuration(ncFile, nDays, nSlots), len(windows))
+    shared.start()
+    data, mask, failed = run_readers(shared, ncFile, nDays, windows)
+    assert not np.any(failed)
+
+    # every reader gets the forcing of the day it asked for
+    for day in range(nDays):
+        d = vos.netcdf2PCRobjClone(ncFile, 'precipitation', date(day))
+        for reader, rows in enumerate(windows):
+            window = slice(rows[0], rows[1])
+            np.testing.assert_array_equal(mask[reader, day, window], np.ma.getmaskarray(d)[window])
+            np.testing.assert_array_equal(np.where(mask[reader, day, window], 0, data[reader, day, window]),
+                                          np.ma.filled(d, 0)[window])
+    vos.filecache.clear()
+
+def test_loader_failure(tmpdir, monkeypatch):
+    # readers raise, rather than wait forever, if the loader fails
+    nDays = 10
+    ncFile = str(tmpdir.join('precipitation.nc'))
+    write_forcing(ncFile, nDays)
+    netcdf2PCRobjClone = vos.netcdf2PCRobjClone
+    def fail_after(ncFile, varName, dateInput, **kwargs):
+        if dateInput > date(4):
+            raise IOError('cannot read ' + dateInput)
+        return netcdf2PCRobjClone(ncFile, varName, dateInput, **kwargs)
+    monkeypatch.setattr(vos, 'netcdf2PCRobjClone', fail_after)
+
+    windows = [(0, 3), (3, 6)]
+    shared = SharedInput(Configuration(ncFile, nDays, 2), len(windows))
+    shared.start()
+    data, mask, failed = run_readers(shared, ncFile, nDays, windows)
+    assert np.all(failed)
+    assert shared.loaderFailed.value == 1
+    vos.filecache.clear()
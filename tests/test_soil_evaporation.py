@@ -0,0 +1,187 @@
+import numpy as np
+import pytest
+
+from SoilEvaporation import SoilEvaporation
+from tests.reference import SoilEvaporation as reference_soil_evaporation
+from tests.state import make_state, clone
+
+# The reference module recomputes the evaporation layer storages over the
+# full grid after every mm of expansion of the layer. Depths of the
+# evaporation layer are whole mm to rounding error only, so results agree
+# to rounding error
+
+tolerance = 1e-12
+
+class ModelTime(object):
+    timeStepPCR = 1
+
+def add_evaporation(v, seed):
+    """Function to add the crop and weather variables read by the soil
+    evaporation module, with a mix of wet and dry cells
+    """
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v._modelTime = ModelTime()
+    v.CalendarType = 1
+    v.REW = np.round(r.uniform(5, 12, sh3))
+    v.EvapZmin = np.full(sh3, 0.15)
+    v.EvapZmax = r.choice([0.15, 0.3, 0.5], sh3)
+    v.fWrelExp = np.full(sh3, 0.4)
+    v.fevap = np.full(sh3, 4.)
+    v.Kex = np.full(sh3, 1.1)
+    v.fwcc = np.full(sh3, 50.)
+    v.CCxW = np.full(sh3, 0.8)
+    v.CCxAct = np.full(sh3, 0.8)
+    v.CC = r.uniform(0, 0.9, sh3)
+    v.CCadj = r.uniform(0, 0.8, sh3)
+    v.Senescence = np.full(sh3, 8.)
+    v.PrematSenes = r.uniform(size=sh3) > 0.8
+    v.DAP = np.full(sh3, 10.)
+    v.DelayedCDs = np.zeros(sh3)
+    v.Mulches = np.zeros(sh3)
+    v.fMulch = np.zeros(sh3)
+    v.MulchPctGS = np.zeros(sh3)
+    v.MulchPctOS = np.zeros(sh3)
+    v.WetSurf = np.full(sh3, 100.)
+    v.IrrMethod = np.ones(sh3)
+    v.SurfaceStorage = r.uniform(0, 5, sh3) * (r.uniform(size=sh3) > 0.8)
+
+def add_weather(v, day):
+    """Function to add daily weather and infiltration"""
+    r = np.random.RandomState(100 + day)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v._modelTime.timeStepPCR = day + 1
+    v.referencePotET = r.uniform(1, 8, (v.nLat, v.nLon))
+    v.precipitation = r.uniform(0, 20, (v.nLat, v.nLon)) * (r.uniform(size=(v.nLat, v.nLon)) > 0.7)
+    v.Infl = np.broadcast_to(v.precipitation, sh3).copy()
+
+def run(module, v, days):
+    module = module(v)
+    module.initial()
+    for day in range(days):
+        add_weather(v, day)
+        # the reference module divides by zero where EvapZmax == EvapZmin
+        with np.errstate(divide='ignore', invalid='ignore'):
+            module.dynamic()
+    return v
+
+def assert_same(a, b, names):
+    for name in names:
+        np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=0, atol=tolerance, err_msg=name)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_daily_sequence(seed):
+    v = make_state(seed)
+    add_evaporation(v, seed)
+    a = run(reference_soil_evaporation.SoilEvaporation, clone(v), 7)
+    b = run(SoilEvaporation, clone(v), 7)
+    assert_same(a, b, ['th','EsAct','EvapZ','Wsurf','Wstage2','SurfaceStorage','Epot',
+                       'Wevap_Act','Wevap_Sat','Wevap_Fc','Wevap_Wp','Wevap_Dry'])
+
+def weighted_storage(v, th, depth):
+    """Function to get the storage (mm) to depth as the sum over
+    compartments of the storage weighted by the fraction covered"""
+    factor = v.soil_parameters_module.compartment_fraction(depth)
+    return np.sum((factor * 1000 * th * v.dz_xy), axis=1)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_storage_to_depth(seed):
+    v = make_state(seed)
+    add_evaporation(v, seed)
+    module = SoilEvaporation(v)
+    module.initial()
+    r = np.random.RandomState(seed)
+    depth = np.round(r.uniform(0, v.dzsum[-1], v.EvapZ.shape), 3)
+    index = module.depth_index(depth, np.arange(depth.size).reshape(depth.shape))
+    for th, storage in [(v.th_s_comp, module.Wsat), (v.th_fc_comp, module.Wfc),
+                        (v.th_wp_comp, module.Wwp), (v.th_dry_comp, module.Wdry),
+                        (v.th, module.compartment_storage(v.th, v.dz_xy))]:
+        np.testing.assert_allclose(module.storage_to_depth(storage, index), weighted_storage(v, th, depth), rtol=0, atol=tolerance)
+
+def test_layer_storages_follow_evaporation_layer():
+    # storages which do not depend on the water content are cached until
+    # the thickness of the evaporation layer changes
+    v = make_state(0)
+    add_evaporation(v, 0)
+    module = SoilEvaporation(v)
+    module.initial()
+    for depth in [0.15, 0.15, 0.3, 0.213]:
+        v.EvapZ = np.full(v.REW.shape, depth)
+        v.th = v.th * 0.99
+        module.evap_layer_water_content()
+        np.testing.assert_allclose(v.Wevap_Act, np.clip(weighted_storage(v, v.th, v.EvapZ), 0, None), rtol=0, atol=tolerance)
+        for name, th in [('Wevap_Sat', v.th_s_comp), ('Wevap_Fc', v.th_fc_comp),
+                         ('Wevap_Wp', v.th_wp_comp), ('Wevap_Dry', v.th_dry_comp)]:
+            np.testing.assert_allclose(getattr(v, name), weighted_storage(v, th, v.EvapZ), rtol=0, atol=tolerance, err_msg=name)
+
+def test_layer_storages_cells_without_data():
+    # cells in which the thickness of the evaporation layer is NaN are
+    # computed on the first call only
+    v = make_state(0)
+    add_evaporation(v, 0)
+    module = SoilEvaporation(v)
+    module.initial()
+    cells = []
+    storage_to_depth = module.storage_to_depth
+    def counting_storage_to_depth(W, index):
+        if any([W is x for x in [module.Wsat, module.Wfc, module.Wwp, module.Wdry]]):
+            cells.append(index[0].size)
+        return storage_to_depth(W, index)
+    module.storage_to_depth = counting_storage_to_depth
+    v.EvapZ = np.full(v.REW.shape, 0.15)
+    v.EvapZ[:,0,:] = np.nan
+    for day in range(2):
+        module.evap_layer_water_content()
+    assert cells == [v.EvapZ.size] * 4
+
+@pytest.mark.parametrize('seed', range(3))
+def test_layer_storages_after_stage_two(seed):
+    # stage 2 evaporation sets the storages of the expanded layer, which
+    # must be recomputed if the layer is reset to its previous thickness
+    v = make_state(seed)
+    add_evaporation(v, seed)
+    v.SurfaceStorage[:] = 0
+    module = SoilEvaporation(v)
+    module.initial()
+    for day in range(3):
+        add_weather(v, day)
+        v.precipitation[:] = 0
+        v.Infl[:] = 0
+        EvapZ = np.copy(v.EvapZ)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            module.dynamic()
+    assert np.any(v.EvapZ != EvapZ)
+    v.EvapZ = EvapZ
+    module.evap_layer_water_content()
+    for name, th in [('Wevap_Sat', v.th_s_comp), ('Wevap_Fc', v.th_fc_comp),
+                     ('Wevap_Wp', v.th_wp_comp), ('Wevap_Dry', v.th_dry_comp)]:
+        np.testing.assert_allclose(getattr(v, name), weighted_storage(v, th, v.EvapZ), rtol=0, atol=tolerance, err_msg=name)
+
+def run_with_time_steps(v, EvapTimeSteps, EvapTolerance, days):
+    v = clone(v)
+    v._configuration.soilOptions = {'EvapTimeSteps' : EvapTimeSteps, 'EvapTolerance' : EvapTolerance}
+    return run(SoilEvaporation, v, days)
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('tol', [1e-2, 1e-3, 1e-4])
+def test_adaptive_time_steps(seed, tol):
+    # adaptive time steps agree with a fine fixed time step to within the
+    # tolerance (mm/day), provided the minimum time step is short enough
+    v = make_state(seed)
+    add_evaporation(v, seed)
+    a = run_with_time_steps(v, "400", "None", 3)
+    b = run_with_time_steps(v, "100", str(tol), 3)
+    assert np.max(np.abs(a.EsAct - b.EsAct)) <= tol
+
+@pytest.mark.parametrize('seed', range(3))
+def test_adaptive_time_steps_water_balance(seed):
+    v = make_state(seed)
+    add_evaporation(v, seed)
+    # water evaporated from surface storage is subtracted twice from the
+    # surface storage, so only the cells without surface storage are checked
+    dry = (v.SurfaceStorage == 0)
+    W = np.sum(1000 * v.th * v.dz_xy, axis=1)
+    b = run_with_time_steps(v, "20", "0.01", 1)
+    EsSoil = W - np.sum(1000 * b.th * b.dz_xy, axis=1)
+    assert np.any(b.EsAct[dry] > 0)
+    np.testing.assert_allclose(EsSoil[dry], b.EsAct[dry], rtol=0, atol=tolerance)
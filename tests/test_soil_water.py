@@ -0,0 +1,103 @@
+import numpy as np
+import pytest
+
+from Drainage import Drainage
+from Infiltration import Infiltration
+from CapillaryRise import CapillaryRise
+from CheckGroundwaterTable import CheckGroundwaterTable
+from tests.reference import Drainage as reference_drainage
+from tests.reference import Infiltration as reference_infiltration
+from tests.reference import CapillaryRise as reference_capillary_rise
+from tests.state import make_state, add_inflow, clone
+
+# The modules update the water content in place; the reference modules
+# copy the water content at the start and end of each call. Excess water
+# is redistributed upwards in a different order of operations (see
+# Drainage.redistribute_excess), so results agree to rounding error
+
+tolerance = 1e-12
+
+def run(module, v, seed=None):
+    module = module(v)
+    module.initial()
+    if seed is not None:
+        add_inflow(v, seed)
+    module.dynamic()
+    return v
+
+def assert_same(a, b, names):
+    for name in names:
+        np.testing.assert_allclose(getattr(a, name), getattr(b, name), rtol=0, atol=tolerance, err_msg=name)
+
+@pytest.mark.parametrize('seed', range(10))
+def test_drainage(seed):
+    v = make_state(seed)
+    a = run(reference_drainage.Drainage, clone(v))
+    b = run(Drainage, clone(v))
+    assert_same(a, b, ['th','FluxOut','DeepPerc'])
+
+@pytest.mark.parametrize('seed', range(10))
+def test_infiltration(seed):
+    v = make_state(seed)
+    a = run(reference_infiltration.Infiltration, clone(v), seed)
+    b = run(Infiltration, clone(v), seed)
+    assert_same(a, b, ['th','FluxOut','DeepPerc','Runoff','Infl','SurfaceStorage'])
+
+@pytest.mark.parametrize('seed', range(10))
+def test_capillary_rise(seed):
+    v = make_state(seed)
+    a = run(reference_capillary_rise.CapillaryRise, clone(v), seed)
+    b = run(CapillaryRise, clone(v), seed)
+    assert_same(a, b, ['th','CrTot'])
+
+def test_daily_sequence():
+    v = make_state(42)
+    results = []
+    for modules in [(reference_drainage.Drainage, reference_infiltration.Infiltration, reference_capillary_rise.CapillaryRise),
+                    (Drainage, Infiltration, CapillaryRise)]:
+        w = clone(v)
+        modules = [module(w) for module in modules]
+        for module in modules:
+            module.initial()
+        for day in range(10):
+            r = np.random.RandomState(day)
+            w.Infl = r.uniform(0, 40, w.Infl.shape) * (r.uniform(size=w.Infl.shape) > 0.5)
+            for module in modules:
+                module.dynamic()
+        results.append(w)
+    assert_same(results[0], results[1], ['th','FluxOut','DeepPerc','Runoff','SurfaceStorage','CrTot'])
+
+@pytest.mark.parametrize('module', [Drainage, Infiltration, CapillaryRise])
+def test_water_content_updated_in_place(module):
+    v = make_state(0)
+    th = v.th
+    run(module, v, 0)
+    assert v.th is th
+
+class CountingGroundwaterTable(CheckGroundwaterTable):
+    """CheckGroundwaterTable which records the cells in which field
+    capacity is adjusted"""
+
+    def adjust_field_capacity(self, zGW, *args):
+        self.adjusted.append(zGW.size)
+        return super(CountingGroundwaterTable, self).adjust_field_capacity(zGW, *args)
+
+def test_groundwater_table_cells_without_data():
+    v = make_state(0)
+    zGW = np.random.RandomState(0).uniform(0.5, 4, (v.nLat, v.nLon))
+    zGW[0,:] = np.nan
+    module = CountingGroundwaterTable(v)
+    module.initial()
+    module.adjusted = []
+    for day in range(3):
+        if day == 2:
+            zGW[1,1] = 1.
+        v.zGW = np.copy(zGW)
+        module.dynamic()
+
+    # cells without data are computed on the first day only
+    assert module.adjusted == [v.nCrop * v.nLat * v.nLon, v.nCrop]
+    expected = module.adjust_field_capacity(
+        v.zGW.ravel(),
+        *[np.moveaxis(x, 1, -1).reshape(-1, v.nComp) for x in [v.Xmax, v.th_fc_comp, v.th_s_comp, v.dV]])
+    np.testing.assert_array_equal(np.moveaxis(v.th_fc_adj, 1, -1).reshape(-1, v.nComp), expected)
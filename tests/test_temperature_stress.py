@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from TemperatureStress import TemperatureStress
+from tests.reference import TemperatureStress as reference_temperature_stress
+from tests.state import make_state, clone
+
+# Pollination stress coefficients are only used during flowering, so the
+# heat stress coefficient is compared inside the flowering window only.
+# The cold stress coefficient is compared with AquaCrop-OS, as the
+# reference module gives the logistic reduction below Tmin_lo and keeps
+# the previous value between Tmin_lo and Tmin_up
+
+def add_temperature(v, seed):
+    r = np.random.RandomState(seed)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.BioTempStress = r.choice([0, 1], sh3)
+    v.PolHeatStress = r.choice([0, 1], sh3)
+    v.PolColdStress = r.choice([0, 1], sh3)
+    v.GDD_up = np.full(sh3, 12.)
+    v.GDD_lo = np.full(sh3, 0.)
+    v.Tmax_lo = np.full(sh3, 35.)
+    v.Tmax_up = np.full(sh3, 40.)
+    v.Tmin_lo = np.full(sh3, 3.)
+    v.Tmin_up = np.full(sh3, 8.)
+    v.fshape_b = np.full(sh3, 13.8135)
+
+def add_weather(v, day):
+    r = np.random.RandomState(100 + day)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.tmin = r.uniform(-2, 12, (v.nLat, v.nLon))
+    v.tmax = r.uniform(25, 45, (v.nLat, v.nLon))
+    v.GDD = r.uniform(-2, 15, sh3)
+    FloweringWindow = r.uniform(size=sh3) > 0.5
+    v.PolHeatWindow = FloweringWindow & (v.PolHeatStress == 1)
+    v.PolColdWindow = FloweringWindow & (v.PolColdStress == 1)
+
+def run(module, v, days):
+    module = module(v)
+    module.initial()
+    result = []
+    for day in range(days):
+        add_weather(v, day)
+        module.dynamic()
+        result.append([np.copy(v.Kst_Bio), np.copy(v.Kst_PolH), np.copy(v.Kst_PolC), np.copy(v.PolHeatWindow), np.copy(v.PolColdWindow), np.copy(v.tmin)])
+    return result
+
+@pytest.mark.parametrize('seed', range(5))
+def test_daily_sequence(seed):
+    v = make_state(seed)
+    add_temperature(v, seed)
+    a = run(reference_temperature_stress.TemperatureStress, clone(v), 10)
+    b = run(TemperatureStress, clone(v), 10)
+    for (a_bio, a_polh, _, window, _, _), (b_bio, b_polh, _, _, _, _) in zip(a, b):
+        np.testing.assert_array_equal(a_bio, b_bio)
+        np.testing.assert_array_equal(a_polh[window], b_polh[window])
+
+def cold_stress(v, tmin, KsPol_up=1, KsPol_lo=0.001):
+    """Function to calculate the cold stress coefficient on pollination as
+    AquaCrop-OS"""
+    tmin = np.broadcast_to(tmin, v.Tmin_lo.shape)
+    Trel = (v.Tmin_up - tmin) / (v.Tmin_up - v.Tmin_lo)
+    Kst_PolC = (KsPol_up * KsPol_lo) / (KsPol_lo + (KsPol_up - KsPol_lo) * np.exp(-v.fshape_b * (1 - Trel)))
+    Kst_PolC[tmin >= v.Tmin_up] = 1
+    Kst_PolC[tmin <= v.Tmin_lo] = 0
+    return Kst_PolC
+
+@pytest.mark.parametrize('seed', range(5))
+def test_cold_stress(seed):
+    v = make_state(seed)
+    add_temperature(v, seed)
+    for _, _, Kst_PolC, _, window, tmin in run(TemperatureStress, v, 10):
+        assert np.any(window)
+        np.testing.assert_allclose(Kst_PolC[window], cold_stress(v, tmin)[window], rtol=1e-12)
+        np.testing.assert_array_equal(Kst_PolC[~window], 1)
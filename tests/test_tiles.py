@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from Tiles import Tiles
+
+def random_landmask(seed, nLat, nLon):
+    # land in a few blobs, with empty rows and columns in between
+    r = np.random.RandomState(seed)
+    landmask = r.uniform(size=(nLat, nLon)) > 0.6
+    landmask[r.uniform(size=nLat) > 0.7, :] = False
+    landmask[:, r.uniform(size=nLon) > 0.7] = False
+    return landmask
+
+@pytest.mark.parametrize('n', [1, 2, 5, 20])
+@pytest.mark.parametrize('seed', range(5))
+def test_split(seed, n):
+    weights = np.random.RandomState(seed).randint(0, 10, 12)
+    parts = Tiles(np.ones((2, 2), bool), 1, 'rows').split(weights, n)
+    assert 0 < len(parts) <= n
+    assert parts[0][0] == 0 and parts[-1][1] == weights.size
+    for (a0, a1), (b0, b1) in zip(parts[:-1], parts[1:]):
+        assert a0 < a1 == b0 < b1
+
+@pytest.mark.parametrize('tileShape', ['rows', 'blocks'])
+@pytest.mark.parametrize('nTiles', [1, 3, 8, 100])
+@pytest.mark.parametrize('seed', range(5))
+def test_tiles_cover_land_once(seed, nTiles, tileShape):
+    landmask = random_landmask(seed, 23, 17)
+    tiles = Tiles(landmask, nTiles, tileShape)
+    tiles.make_tiles()
+    assert 0 < len(tiles.tiles) <= nTiles
+
+    count = np.zeros(landmask.shape, int)
+    for number, tile in enumerate(tiles.tiles):
+        assert tile['number'] == number
+        window = (slice(*tile['rows']), slice(*tile['cols']))
+        count[window] += 1
+        # trimmed to the bounding box of its land cells
+        land = landmask[window]
+        assert land[0, :].any() and land[-1, :].any()
+        assert land[:, 0].any() and land[:, -1].any()
+        assert tile['nLand'] == land.sum()
+        assert tile['cost'] == land.size
+    assert count.max() == 1
+    assert np.all(count[landmask] == 1)
+
+def test_empty_landmask():
+    tiles = Tiles(np.zeros((4, 5), bool), 3, 'blocks')
+    tiles.make_tiles()
+    assert tiles.tiles == []
+
+def test_tile_shape():
+    with pytest.raises(ValueError):
+        Tiles(np.ones((4, 5), bool), 3, 'columns')
@@ -0,0 +1,51 @@
+import numpy as np
+
+from Transpiration import Transpiration
+from tests.state import make_state
+
+def test_number_of_root_zone_compartments():
+    # roots grow through the season and are reset to the minimum root
+    # depth in some cells at the start of a new season
+    v = make_state(0)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    r = np.random.RandomState(0)
+    v.Zmin = np.full(sh3, 0.3)
+    v.Zroot = r.uniform(0.3, 1., sh3)
+    v.SxTop = np.full(sh3, 0.05)
+    v.SxBot = np.full(sh3, 0.01)
+    v.rCor = np.ones(sh3)
+    v.IrrMethod = np.ones(sh3)
+    module = Transpiration(v)
+    module.initial()
+    for day in range(40):
+        v.Zroot = np.minimum(v.Zroot + r.uniform(0, 0.1, sh3), v.dzsum[-1])
+        if day % 10 == 9:
+            v.Zroot[r.uniform(size=sh3) > 0.5] = 0.3
+        if day == 29:
+            v.Zroot[:] = 0.3
+        module.max_sink_term()
+        assert module.nCompRoot == np.max(np.sum(module.RootFact > 0, axis=1))
+
+def test_sink_term_cells_without_data():
+    # cells in which the root depth is NaN are computed on the first call
+    # only
+    v = make_state(0)
+    sh3 = (v.nCrop, v.nLat, v.nLon)
+    v.Zmin = np.full(sh3, 0.3)
+    v.Zroot = np.full(sh3, 0.5)
+    v.Zroot[:,0,:] = np.nan
+    v.SxTop = np.full(sh3, 0.05)
+    v.SxBot = np.full(sh3, 0.01)
+    v.rCor = np.ones(sh3)
+    v.IrrMethod = np.ones(sh3)
+    module = Transpiration(v)
+    module.initial()
+    cells = []
+    compartment_fraction = v.soil_parameters_module.compartment_fraction
+    def counting_compartment_fraction(depth):
+        cells.append(depth.size)
+        return compartment_fraction(depth)
+    v.soil_parameters_module.compartment_fraction = counting_compartment_fraction
+    for day in range(2):
+        module.max_sink_term()
+    assert cells == [v.Zroot.size]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# AquaCrop crop growth model
+
+import os
+import sys
+import shutil
+import logging
+import multiprocessing
+
+import numpy as np
+import pcraster as pcr
+
+from Configuration import Configuration
+import VirtualOS as vos
+from ncConverter import mergeNetCDF
+from SharedInput import SharedInput, fork_context
+from Tiles import Tiles
+import deterministic_runner
+
+logger = logging.getLogger(__name__)
+
+class TileRunner(Tiles):
+    """Class to run AquaCrop or FAO56 over the clone map in tiles, using
+    a pool of worker processes. The model has no lateral flow, so each
+    tile is simulated by an independent model instance whose clone map
+    covers only the tile. Input files are read through the clone map, so
+    each worker reads only its window of the forcing and parameter
+    files. Once all tiles have finished the tile output is merged into
+    the netCDF files of the complete clone map.
+    """
+
+    # Number of time steps copied at once when merging tile output
+    merge_chunk_size = 366
+
+    def __init__(self, configuration, model, debug_mode = False):
+        self.configuration = configuration
+        self.model = model
+        self.debug_mode = debug_mode
+
+        nWorkers = self.configuration.globalOptions['nWorkers']
+        if nWorkers == "None":
+            self.nWorkers = multiprocessing.cpu_count()
+        else:
+            self.nWorkers = max(int(nWorkers), 1)
+
+        nTiles = self.configuration.globalOptions['nTiles']
+        if nTiles == "None":
+            nTiles = 2 * self.nWorkers
+        else:
+            nTiles = max(int(nTiles), 1)
+
+        # with shared input all tiles read the forcing of the same day, so
+        # they must run at the same time
+        self.sharedInput = self.configuration.globalOptions['sharedInput'] == "1"
+        if self.sharedInput and nTiles != self.nWorkers:
+            logger.info('Using one tile per worker process to share the input')
+            nTiles = self.nWorkers
+
+        # clone map and land mask (as in Model.__init__)
+        pcr.setclone(self.configuration.cloneMap)
+        landmask = vos.readPCRmapClone(self.configuration.globalOptions['landmask'],
+                                       self.configuration.cloneMap,
+                                       self.configuration.tmpDir,
+                                       self.configuration.globalOptions['inputDir'],
+                                       True)
+        landmask = landmask > 0  # boolean
+
+        # NB exact cell size is needed to locate the tiles
+        self.attr = vos.getMapAttributesALL(self.configuration.cloneMap, arcDegree=False)
+
+        netcdf_y_orientation_follow_cf_convention = False
+        if 'netcdf_y_orientation_follow_cf_convention' in self.configuration.reportingOptions.keys() and\
+            self.configuration.reportingOptions['netcdf_y_orientation_follow_cf_convention'] == "True":
+            netcdf_y_orientation_follow_cf_convention = True
+
+        Tiles.__init__(self, landmask, nTiles, self.configuration.globalOptions['tileShape'],
+                       netcdf_y_orientation_follow_cf_convention)
+
+    def write_tile_maps(self):
+        """Function to write the clone map and land mask of each tile"""
+        cellsize = self.attr['cellsize']
+        for tile in self.tiles:
+            r0, r1 = tile['rows']
+            c0, c1 = tile['cols']
+            tile['outputDir'] = vos.getFullPath("tiles/tile_%03i/" % tile['number'], self.configuration.tmpDir)
+            if os.path.exists(tile['outputDir']):
+                shutil.rmtree(tile['outputDir'])
+            os.makedirs(tile['outputDir'])
+
+            pcr.setclone(r1 - r0, c1 - c0, cellsize,
+                         self.attr['xUL'] + c0 * cellsize,
+                         self.attr['yUL'] - r0 * cellsize)
+            tile['cloneMap'] = tile['outputDir'] + 'clone.map'
+            pcr.report(pcr.boolean(1.0), tile['cloneMap'])
+            tile['landmask'] = tile['outputDir'] + 'landmask.map'
+            pcr.report(pcr.numpy2pcr(pcr.Boolean, self.landmask[r0:r1,c0:c1].astype(np.int32), -1), tile['landmask'])
+
+        pcr.setclone(self.configuration.cloneMap)
+
+    def run(self):
+        self.make_tiles()
+        self.write_tile_maps()
+
+        tasks = [(self.configuration.iniFileName, self.model, tile, self.debug_mode) for tile in self.tiles]
+
+        # read the input once for all workers, which inherit the shared
+        # memory when they are forked
+        nWorkers = self.nWorkers
+        if self.sharedInput and len(tasks) > 0:
+            nWorkers = len(tasks)
+            vos.sharedcache = SharedInput(self.configuration, len(tasks))
+            vos.sharedcache.start()
+
+        # one task per process, so that the memory used by a model instance
+        # (and the file cache of VirtualOS) is released after each tile
+        logger.info('Running %i tiles on %i worker processes', len(tasks), nWorkers)
+        pool = fork_context().Pool(processes=max(nWorkers, 1), maxtasksperchild=1)
+        try:
+            for number, outNCDir in pool.imap_unordered(run_tile, tasks, chunksize=1):
+                self.tiles[number]['outNCDir'] = outNCDir
+                logger.info('Tile %i finished', number)
+            pool.close()
+        except:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            if vos.sharedcache is not None:
+                vos.sharedcache.stop()
+                vos.sharedcache = None
+
+        self.merge_output()
+
+    def merge_output(self):
+        """Function to merge the output of the tiles into the netCDF
+        files of the complete clone map
+        """
+        # coordinates of the clone map (as in ncConverter.np2netCDF)
+        cloneMap = pcr.boolean(1.0)
+        self.latitudes  = np.unique(pcr.pcr2numpy(pcr.ycoordinate(cloneMap), vos.MV))[::-1]
+        self.longitudes = np.unique(pcr.pcr2numpy(pcr.xcoordinate(cloneMap), vos.MV))
+        if self.netcdf_y_orientation_follow_cf_convention:
+            self.latitudes = self.latitudes[::-1]
+
+        if len(self.tiles) == 0:
+            logger.warning('The land mask is empty: no output is written')
+            return
+
+        for ncFileName in sorted(os.listdir(self.tiles[0]['outNCDir'])):
+            logger.info('Merging tile output into %s', ncFileName)
+            self.merge_file(ncFileName)
+
+        for tile in self.tiles:
+            shutil.rmtree(tile['outNCDir'])
+
+    def merge_file(self, ncFileName):
+        parts = [(os.path.join(tile['outNCDir'], ncFileName), self.tile_window(tile)) for tile in self.tiles]
+        mergeNetCDF(os.path.join(self.configuration.outNCDir, ncFileName),
+                    parts,
+                    {'lat' : self.nLat, 'lon' : self.nLon},
+                    {'lat' : self.latitudes, 'lon' : self.longitudes},
+                    self.merge_chunk_size)
+
+def run_tile(task):
+    """Function to run the model over one tile (in a worker process)"""
+    iniFileName, model, tile, debug_mode = task
+
+    # the worker should only log to the files of its tile
+    logging.getLogger().handlers = []
+
+    configuration = Configuration(iniFileName=iniFileName, debug_mode=debug_mode, no_modification=False)
+    configuration.globalOptions['outputDir'] = tile['outputDir']
+    configuration.globalOptions['cloneMap'] = tile['cloneMap']
+    configuration.globalOptions['landmask'] = tile['landmask']
+    configuration.globalOptions['log_level_console'] = "WARNING"
+    configuration.set_configuration()
+
+    if configuration.globalOptions['sharedInput'] == "1" and vos.sharedcache is None:
+        raise RuntimeError('The shared input was not inherited by the worker process')
+    if vos.sharedcache is not None:
+        vos.sharedcache.set_window(tile['rows'], tile['cols'])
+
+    deterministic_runner.run(configuration, model)
+
+    if vos.sharedcache is not None:
+        vos.sharedcache.release()
+    return tile['number'], configuration.outNCDir
+
+def main():
+
+    # get the full path of the configuration/ini file provided
+    # as system argument
+    iniFileName = os.path.abspath(sys.argv[1])
+    model = sys.argv[2].lower()
+
+    # TODO: debug option
+    debug_mode = False
+
+    # object to handle configuration/ini file
+    configuration = Configuration(iniFileName=iniFileName, debug_mode=debug_mode)
+
+    tile_runner = TileRunner(configuration, model, debug_mode)
+    tile_runner.run()
+
+if __name__ == '__main__':
+    sys.exit(main())